@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the JSON layer used on outbound messages and API responses.
+Times building a task list card and encoding it with each available backend.
+
+Usage: python benchmark_json.py [task_count ...]
+"""
+import sys
+import time
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent / 'botper'))
+
+from bson import ObjectId
+from utils.helpers import format_task_card
+from utils.json_codec import BACKENDS
+
+def make_tasks(count):
+    """Fake tasks shaped like the ones in Mongo, every fifth one a meeting"""
+    tasks = []
+    for i in range(count):
+        task = {'_id': ObjectId(), 'title': f"Task number {i} with a realistic ünïcode title", 'completed': i % 3 == 0}
+        if i % 5 == 0:
+            task.update(type='meeting', meeting_link=f"https://company.webex.com/meet/m{i}")
+        tasks.append(task)
+    return tasks
+
+def best_of(func, repeat=5, number=20):
+    """Fastest average milliseconds per call over several rounds"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        best = min(best, (time.perf_counter() - start) / number)
+    return best * 1000
+
+def run(task_count):
+    tasks = make_tasks(task_count)
+    build_ms = best_of(lambda: format_task_card(tasks, platform="webex"))
+    body = {'roomId': 'room', 'text': '📋 Tasks', 'attachments': [{'contentType': 'application/vnd.microsoft.card.adaptive', 'content': format_task_card(tasks, platform="webex")}]}
+    print(f"\n{task_count} tasks: card build {build_ms:.3f} ms")
+    for name, (dumps, loads) in BACKENDS.items():
+        encoded = dumps(body)
+        encode_ms = best_of(lambda: dumps(body))
+        decode_ms = best_of(lambda: loads(encoded))
+        print(f"  {name:<8} encode {encode_ms:8.3f} ms   decode {decode_ms:8.3f} ms   {len(encoded) / 1024:8.1f} KiB")
+
+if __name__ == "__main__":
+    counts = [int(arg) for arg in sys.argv[1:]] or [10, 100, 1000]
+    for count in counts:
+        run(count)
@@ -2,6 +2,9 @@
 from abc import ABC, abstractmethod
 
 class BaseBot(ABC):
+	platform = None
+	live_updates = None
+
 	@abstractmethod
 	def start(self):
 		"""Start the bot (webhook server, polling, etc.)"""
@@ -17,7 +20,23 @@ class BaseBot(ABC):
 		"""Handle task-related commands (create, list, update, delete)."""
 		pass
 
+	@abstractmethod
+	def send_task_list(self, user_id):
+		"""Send the current task list card to a user or room."""
+		pass
+
 	@abstractmethod
 	def handle_meeting_command(self, command, user_id, data=None):
 		"""Handle meeting-related commands (schedule, list, etc.)."""
 		pass
+
+	def tenant_for(self, target):
+		"""Tenant (org) a room or conversation belongs to, as learned from its events."""
+		return self.task_manager.tenants.resolve(self.platform, target)
+
+	def refresh_task_list(self, target):
+		"""Show the list after a task write: via the change-stream watcher when it runs, else right away."""
+		if self.live_updates is not None and self.live_updates.active:
+			self.live_updates.track_view(self.platform, target, self.tenant_for(target))
+		else:
+			self.send_task_list(target)
@@ -0,0 +1,97 @@
+
+import gzip
+import hashlib
+import hmac
+import os
+import queue
+import secrets
+import threading
+import time
+from utils.json_codec import dumps, loads
+from .config import get_instance_id
+
+# Directory captured webhook traffic is written to; unset disables capture
+CAPTURE_DIR = os.getenv("BOTPER_CAPTURE_DIR")
+# Events buffered for the writer thread; beyond this they are dropped, not waited for
+CAPTURE_QUEUE_SIZE = 10000
+# Free text that may identify people or meetings; replaced, keeping only its length
+REDACTED_KEYS = {'title', 'agenda', 'text', 'markdown', 'html', 'password', 'webLink', 'sipAddress', 'displayName'}
+
+class WebhookRecorder:
+	"""Appends sanitized inbound webhook events to a gzip-compressed JSONL file.
+
+	Each line is {"t": unix time, "path": route, "body": event}. Email
+	addresses are replaced by pseudonyms that stay stable within one capture
+	file (so one user's bursts still look like one user) and free text is
+	redacted. The request path only enqueues the raw body; decoding,
+	sanitizing and compression happen on a background thread.
+	`replay_webhooks.py` re-drives a capture against a test instance.
+	"""
+
+	def __init__(self, platform, directory=CAPTURE_DIR):
+		os.makedirs(directory, exist_ok=True)
+		instance = get_instance_id().replace(':', '-')
+		self.path = os.path.join(directory, f"{platform}-{instance}-{time.strftime('%Y%m%d-%H%M%S')}.jsonl.gz")
+		self.salt = secrets.token_bytes(16)
+		self.queue = queue.Queue(maxsize=CAPTURE_QUEUE_SIZE)
+		self.recorded = 0
+		self.dropped = 0
+		self.thread = None
+		self.lock = threading.Lock()
+
+	def record(self, path, body):
+		"""Queue one raw request body for capture; never blocks the request."""
+		self.start()
+		try:
+			self.queue.put_nowait((time.time(), path, body))
+		except queue.Full:
+			self.dropped += 1
+
+	def start(self):
+		if self.thread is None:
+			with self.lock:
+				if self.thread is None:
+					print(f"Capturing webhook traffic to {self.path}")
+					self.thread = threading.Thread(target=self._run, name="botper-capture", daemon=True)
+					self.thread.start()
+
+	def stop(self, timeout=None):
+		if self.thread is not None:
+			self.queue.put(None)
+			self.thread.join(timeout)
+			self.thread = None
+
+	def pseudonym(self, email):
+		digest = hmac.new(self.salt, email.lower().encode('utf-8'), hashlib.sha256).hexdigest()[:12]
+		return f"user-{digest}@example.invalid"
+
+	def sanitize(self, value, key=None):
+		if isinstance(value, dict):
+			return {k: self.sanitize(v, k) for k, v in value.items()}
+		if isinstance(value, list):
+			return [self.sanitize(v, key) for v in value]
+		if isinstance(value, str) and key:
+			if key.lower().endswith(('email', 'emails')):
+				return self.pseudonym(value)
+			if key in REDACTED_KEYS:
+				return 'x' * len(value)
+		return value
+
+	def _run(self):
+		with gzip.open(self.path, 'ab') as f:
+			while True:
+				item = self.queue.get()
+				if item is None:
+					break
+				received_at, path, body = item
+				try:
+					f.write(dumps({'t': received_at, 'path': path, 'body': self.sanitize(loads(body))}) + b'\n')
+					self.recorded += 1
+				except Exception as e:
+					print(f"Error capturing webhook event: {e}")
+				if self.queue.empty():
+					# Idle: make what we have readable even if the process dies
+					f.flush()
+
+	def stats(self):
+		return {'recorded': self.recorded, 'dropped': self.dropped, 'queued': self.queue.qsize()}
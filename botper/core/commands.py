@@ -0,0 +1,119 @@
+
+import threading
+import time
+
+class CommandContext:
+	"""Where a command came from and where replies go."""
+	__slots__ = ('platform', 'target', 'person_id', 'person_email', 'text')
+
+	def __init__(self, platform, target, person_id=None, person_email=None, text=""):
+		self.platform = platform
+		self.target = target
+		self.person_id = person_id
+		self.person_email = person_email
+		self.text = text
+
+class CommandRouter:
+	"""Table-driven dispatch for chat commands and card actions.
+
+	Exact commands are a dict lookup on the normalized text. Prefix commands
+	are bucketed by their first word, so a message is matched with one dict
+	lookup plus a check of the (few) prefixes sharing that word instead of a
+	linear if/elif chain. Card actions are a dict keyed by the `action` value.
+	Every dispatch is timed per command.
+	"""
+
+	def __init__(self):
+		self.exact = {}
+		self.prefixes = {}
+		self.actions = {}
+		self.timings = {}
+		self.lock = threading.Lock()
+
+	def command(self, name, handler, exact=False):
+		"""Register handler(ctx, args) for `name` (exact text or leading words)."""
+		name = name.lower()
+		if exact:
+			self.exact[name] = (name, handler)
+		else:
+			bucket = self.prefixes.setdefault(name.split()[0], [])
+			bucket.append((name, handler))
+			# Longest prefix first so "schedule meeting" wins over "schedule"
+			bucket.sort(key=lambda entry: len(entry[0]), reverse=True)
+
+	def action(self, name, handler):
+		"""Register handler(ctx, data) for card submissions with data['action'] == name."""
+		self.actions[name] = handler
+
+	def dispatch_text(self, ctx, text):
+		"""Run the matching command; returns False if nothing matched."""
+		text = text.strip()
+		lowered = text.lower()
+		entry = self.exact.get(lowered)
+		if entry is not None:
+			self._timed(entry[0], entry[1], ctx, "")
+			return True
+		for name, handler in self.prefixes.get(lowered.split(' ', 1)[0], ()):
+			if lowered == name or lowered.startswith(name + " "):
+				self._timed(name, handler, ctx, text[len(name):].strip())
+				return True
+		return False
+
+	def dispatch_action(self, ctx, data):
+		name = data.get('action')
+		handler = self.actions.get(name)
+		if handler is None:
+			return False
+		self._timed(f"action:{name}", handler, ctx, data)
+		return True
+
+	def _timed(self, name, handler, ctx, args):
+		started = time.perf_counter()
+		failed = False
+		try:
+			return handler(ctx, args)
+		except Exception:
+			failed = True
+			raise
+		finally:
+			elapsed = (time.perf_counter() - started) * 1000
+			with self.lock:
+				stat = self.timings.setdefault(name, {'count': 0, 'errors': 0, 'total_ms': 0.0, 'max_ms': 0.0})
+				stat['count'] += 1
+				stat['errors'] += failed
+				stat['total_ms'] += elapsed
+				stat['max_ms'] = max(stat['max_ms'], elapsed)
+
+	def stats(self):
+		with self.lock:
+			return {
+				name: dict(stat, avg_ms=round(stat['total_ms'] / stat['count'], 2))
+				for name, stat in self.timings.items()
+			}
+
+def register_task_commands(router, bot):
+	"""Commands every platform supports, so all bots behave identically."""
+	def greet(ctx, args):
+		bot.send_greeting(ctx.target)
+
+	def create_task(ctx, args):
+		if args:
+			bot.handle_task_command("create", ctx.target, {"title": args})
+
+	def list_tasks(ctx, args):
+		bot.handle_task_command("list", ctx.target)
+
+	def delete_task(ctx, args):
+		bot.handle_task_command("delete", ctx.target, {"task_id": args})
+
+	def find_tasks(ctx, args):
+		if args:
+			bot.handle_task_command("search", ctx.target, {"query": args, "page": 0})
+
+	for word in ("hello", "hi", "help"):
+		router.command(word, greet, exact=True)
+	router.command("list", list_tasks, exact=True)
+	router.command("task", create_task)
+	router.command("delete", delete_task)
+	router.command("find", find_tasks)
+	return router
@@ -0,0 +1,27 @@
+
+import os
+import socket
+from pathlib import Path
+from dotenv import load_dotenv
+
+# .env lives in the project root, next to run_all.py
+ENV_PATH = Path(__file__).parent.parent.parent / '.env'
+
+_loaded = False
+_instance_id = None
+
+def load_config():
+	"""Load .env into the environment once per process; later calls are no-ops."""
+	global _loaded
+	if not _loaded:
+		load_dotenv(dotenv_path=ENV_PATH)
+		_loaded = True
+	return ENV_PATH
+
+def get_instance_id():
+	"""Identifies this process among replicas sharing one database."""
+	global _instance_id
+	if _instance_id is None:
+		load_config()
+		_instance_id = os.getenv('BOTPER_INSTANCE_ID') or f"{socket.gethostname()}:{os.getpid()}"
+	return _instance_id
@@ -1,9 +1,44 @@
 
 import os
+from datetime import datetime
 from pymongo import MongoClient
-from dotenv import load_dotenv
+from .config import load_config
 
-load_dotenv()
+load_config()
+
+# Milliseconds the health ping may take, server selection included (pymongo waits 30s by default)
+MONGO_PING_TIMEOUT_MS = int(os.getenv("BOTPER_MONGO_PING_TIMEOUT_MS", "2000"))
+
+# One MongoClient (and therefore one connection pool) per URI and options,
+# shared by every manager and platform bot hosted in this process.
+_clients = {}
+
+def get_client(uri, **options):
+	key = (uri, tuple(sorted(options.items())))
+	client = _clients.get(key)
+	if client is None:
+		client = MongoClient(uri, **options)
+		_clients[key] = client
+	return client
+
+def ping(timeout_ms=MONGO_PING_TIMEOUT_MS):
+	"""Round-trip to Mongo on a dedicated one-connection client that gives up after timeout_ms."""
+	client = get_client(MongoDB().uri, serverSelectionTimeoutMS=timeout_ms, connectTimeoutMS=timeout_ms, socketTimeoutMS=timeout_ms, maxPoolSize=1)
+	client.admin.command('ping')
+
+def run_once(db, name, migrate):
+	"""Run migrate() unless the `migrations` collection records `name` as applied.
+
+	Startup then costs one _id lookup per migration instead of a collection
+	scan. Steps must be idempotent: replicas starting together may both run one.
+	"""
+	col = db['migrations']
+	if col.find_one({'_id': name}, {'_id': 1}) is not None:
+		return False
+	print(f"Applying migration '{name}'")
+	migrate()
+	col.update_one({'_id': name}, {'$set': {'applied_at': datetime.utcnow()}}, upsert=True)
+	return True
 
 class MongoDB:
 	def __init__(self):
@@ -16,7 +51,8 @@ class MongoDB:
 			uri = f"mongodb://{username}:{password}@{','.join([f'{h}:{port}' for h in hosts])}/{dbname}?authSource=admin"
 		else:
 			uri = f"mongodb://{','.join([f'{h}:{port}' for h in hosts])}/{dbname}"
-		self.client = MongoClient(uri)
+		self.uri = uri
+		self.client = get_client(uri)
 		self.db = self.client[dbname]
 		self.tasks_col = self.db['tasks']
 		self.meetings_col = self.db['meetings']
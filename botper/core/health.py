@@ -0,0 +1,56 @@
+
+import threading
+import time
+
+class HealthChecker:
+	"""Named dependency checks whose results are cached for a short TTL.
+
+	A check is a callable returning (ok, detail). Probes hitting /readyz every
+	second share one cached result instead of pinging Mongo or Webex each time.
+	"""
+
+	def __init__(self, default_ttl=5.0):
+		self.default_ttl = default_ttl
+		self.checks = {}
+		self.results = {}
+		self.lock = threading.Lock()
+
+	def register(self, name, func, ttl=None, critical=True):
+		self.checks[name] = (func, self.default_ttl if ttl is None else ttl, critical)
+
+	def run_check(self, name):
+		func, ttl, critical = self.checks[name]
+		cached = self.results.get(name)
+		now = time.monotonic()
+		if cached and now - cached['checked_at'] < ttl:
+			return cached
+		with self.lock:
+			# Another probe may have refreshed it while we waited
+			cached = self.results.get(name)
+			if cached and time.monotonic() - cached['checked_at'] < ttl:
+				return cached
+			started = time.perf_counter()
+			try:
+				ok, detail = func()
+			except Exception as e:
+				ok, detail = False, str(e)
+			result = {
+				'ok': bool(ok),
+				'critical': critical,
+				'detail': detail,
+				'latency_ms': round((time.perf_counter() - started) * 1000, 1),
+				'checked_at': time.monotonic()
+			}
+			self.results[name] = result
+			return result
+
+	def report(self):
+		"""Return (all critical checks ok, per-check results)."""
+		checks = {}
+		healthy = True
+		for name in self.checks:
+			result = self.run_check(name)
+			checks[name] = {k: v for k, v in result.items() if k != 'checked_at'}
+			if result['critical'] and not result['ok']:
+				healthy = False
+		return healthy, checks
@@ -0,0 +1,119 @@
+
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError, PyMongoError
+from .config import get_instance_id
+from .database import MongoDB
+
+# Seconds a lease stays valid without a heartbeat; a crashed leader is replaced after at most this long
+LEADER_LEASE_SECONDS = float(os.getenv("BOTPER_LEADER_LEASE_SECONDS", "15"))
+# Heartbeats per lease period; renewing a few times per lease rides out a slow round-trip
+HEARTBEATS_PER_LEASE = 3
+
+class LeaderElection:
+	"""Runs singleton background jobs on exactly one replica, using leases in `leader_leases`.
+
+	Each job has a lease document {_id: job, owner, expires_at}. A replica
+	becomes leader by taking a missing or expired lease and keeps it by
+	renewing it from a heartbeat thread; the job is started when the lease
+	is won and stopped when it is lost or released. A leader that cannot
+	renew steps down before its lease can expire, so two replicas never run
+	the same job at once (given clocks roughly in sync). Shutdown releases
+	the leases so another replica takes over at its next heartbeat.
+	"""
+
+	def __init__(self, lease_seconds=LEADER_LEASE_SECONDS):
+		self.col = MongoDB().db['leader_leases']
+		# Leases nobody renews are removed by Mongo's TTL monitor
+		self.col.create_index('expires_at', expireAfterSeconds=0)
+		self.lease = timedelta(seconds=lease_seconds)
+		self.interval = lease_seconds / HEARTBEATS_PER_LEASE
+		self.jobs = {}
+		self.held = {}
+		self.stopping = threading.Event()
+		self.thread = None
+		self.lock = threading.Lock()
+
+	def register(self, name, start, stop):
+		"""start() runs the job while this replica holds the `name` lease; stop(timeout) ends it."""
+		self.jobs[name] = (start, stop)
+
+	def start(self):
+		if self.thread is None and self.jobs:
+			self.stopping.clear()
+			self.thread = threading.Thread(target=self._run, name="botper-leader", daemon=True)
+			self.thread.start()
+
+	def stop(self, timeout=None):
+		"""Stop held jobs and release their leases (shutdown hook)."""
+		self.stopping.set()
+		if self.thread is not None:
+			self.thread.join(timeout)
+			self.thread = None
+		for name in list(self.held):
+			self._step_down(name, timeout)
+			try:
+				self.col.delete_one({'_id': name, 'owner': get_instance_id()})
+			except PyMongoError as e:
+				print(f"Could not release lease '{name}': {e}")
+
+	def try_acquire(self, name):
+		"""Take or renew the lease; False if another replica holds an unexpired one."""
+		now = datetime.utcnow()
+		try:
+			self.col.find_one_and_update(
+				{'_id': name, '$or': [{'owner': get_instance_id()}, {'expires_at': {'$lt': now}}]},
+				{'$set': {'owner': get_instance_id(), 'expires_at': now + self.lease, 'renewed_at': now}},
+				upsert=True,
+				return_document=ReturnDocument.AFTER
+			)
+			return True
+		except DuplicateKeyError:
+			# The lease exists and is someone else's: our upsert collided with it
+			return False
+
+	def _run(self):
+		while not self.stopping.is_set():
+			for name in self.jobs:
+				self.heartbeat(name)
+			self.stopping.wait(self.interval)
+
+	def heartbeat(self, name):
+		try:
+			acquired = self.try_acquire(name)
+		except PyMongoError as e:
+			renewed_at = self.held.get(name)
+			# Can't reach Mongo: keep running only while our last renewal is surely still valid
+			if renewed_at is not None and time.monotonic() - renewed_at > self.lease.total_seconds() - self.interval:
+				print(f"Lost contact with lease store, stepping down from '{name}': {e}")
+				self._step_down(name, self.interval)
+			return
+		if acquired:
+			if name not in self.held:
+				print(f"Became leader for '{name}' ({get_instance_id()})")
+				self._start_job(name)
+			self.held[name] = time.monotonic()
+		elif name in self.held:
+			print(f"Lease for '{name}' taken over by another replica, stepping down")
+			self._step_down(name, self.interval)
+
+	def _start_job(self, name):
+		try:
+			self.jobs[name][0]()
+		except Exception as e:
+			print(f"Error starting leader job '{name}': {e}")
+
+	def _step_down(self, name, timeout=None):
+		with self.lock:
+			if self.held.pop(name, None) is None:
+				return
+		try:
+			self.jobs[name][1](timeout)
+		except Exception as e:
+			print(f"Error stopping leader job '{name}': {e}")
+
+	def stats(self):
+		return {'instance': get_instance_id(), 'leading': sorted(self.held), 'jobs': sorted(self.jobs)}
@@ -0,0 +1,153 @@
+
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from pymongo.errors import OperationFailure, PyMongoError
+from .config import get_instance_id
+from .database import MongoDB
+
+# A room counts as "showing the task list" for this long after it was last listed
+TASK_VIEW_TTL = int(os.getenv("BOTPER_TASK_VIEW_TTL", "3600"))
+# Changes arriving within this window are coalesced into one refresh per room
+REFRESH_DEBOUNCE = float(os.getenv("BOTPER_REFRESH_DEBOUNCE", "0.5"))
+
+class TaskViews:
+	"""Rooms currently displaying the task list, stored in `task_views`.
+
+	Each view is owned by the replica that last rendered it, so when several
+	replicas watch the same change stream only one refreshes a given room.
+	"""
+
+	def __init__(self):
+		self.col = MongoDB().db['task_views']
+		self.col.create_index('viewed_at', expireAfterSeconds=TASK_VIEW_TTL)
+		self.col.create_index('owner')
+
+	def touch(self, platform, target, tenant_id=None):
+		self.col.update_one(
+			{'_id': f"{platform}:{target}"},
+			{'$set': {'platform': platform, 'target': target, 'tenant_id': tenant_id, 'owner': get_instance_id(), 'viewed_at': datetime.utcnow()}},
+			upsert=True
+		)
+
+	def owned(self, tenants=None):
+		"""Views this replica renders; with tenants, only those showing one of these tenants' lists."""
+		cutoff = datetime.utcnow() - timedelta(seconds=TASK_VIEW_TTL)
+		query = {'owner': get_instance_id(), 'viewed_at': {'$gte': cutoff}}
+		if tenants is not None:
+			# Views saved before tenants were tracked have none: refresh those too
+			query['tenant_id'] = {'$in': list(tenants) + [None]}
+		return list(self.col.find(query, {'platform': 1, 'target': 1}))
+
+def change_tenant(change):
+	"""Tenant of the task a change event touched, or None when the event doesn't say."""
+	doc = change.get('fullDocument') or change.get('fullDocumentBeforeChange') or {}
+	return doc.get('tenant_id')
+
+class TaskChangeWatcher:
+	"""Watches the tasks collection and re-renders the list in rooms viewing it.
+
+	Requires MongoDB running as a replica set (change streams). If the
+	server does not support them, `active` stays False and bots fall back to
+	re-listing eagerly after each write.
+	"""
+
+	def __init__(self, tasks_col):
+		self.tasks_col = tasks_col
+		self.views = TaskViews()
+		self.refreshers = {}
+		self.listeners = []
+		self.active = False
+		self.stopping = False
+		self.resume_token = None
+		self.thread = None
+
+	def register(self, platform, func):
+		"""func(target) re-sends the current task list to one room."""
+		self.refreshers[platform] = func
+
+	def subscribe(self, func):
+		"""func(change) is called with every raw change event, before refreshes are debounced."""
+		self.listeners.append(func)
+
+	def track_view(self, platform, target, tenant_id=None):
+		if self.active:
+			self.views.touch(platform, target, tenant_id)
+
+	def start(self):
+		if self.thread is not None:
+			return
+		try:
+			# Probe once synchronously so bots know right away whether to rely on us
+			self.tasks_col.watch(max_await_time_ms=1).close()
+			self.active = True
+		except OperationFailure as e:
+			print(f"WARNING: Task change streams unavailable ({e}); using eager list refresh")
+			return
+		try:
+			# Deletes only say which tenant they hit through the pre-image (MongoDB 6.0+)
+			self.tasks_col.database.command('collMod', self.tasks_col.name, changeStreamPreAndPostImages={'enabled': True})
+		except OperationFailure as e:
+			print(f"Task pre-images unavailable ({e}); deletes refresh every tenant's views")
+		self.thread = threading.Thread(target=self._run, name="botper-task-watcher", daemon=True)
+		self.thread.start()
+
+	def stop(self, timeout=None):
+		self.stopping = True
+		if self.thread is not None:
+			self.thread.join(timeout)
+
+	def _run(self):
+		# Tenants of changes already consumed (past the resume token) but not yet refreshed
+		tenants = set()
+		while not self.stopping:
+			try:
+				with self.tasks_col.watch(resume_after=self.resume_token, max_await_time_ms=500, full_document='updateLookup', full_document_before_change='whenAvailable') as stream:
+					while not self.stopping:
+						change = stream.try_next()
+						if change is None:
+							continue
+						self.resume_token = stream.resume_token
+						self.notify(change)
+						tenants = {change_tenant(change)}
+						# Coalesce a burst of writes into one refresh per affected tenant
+						deadline = time.monotonic() + REFRESH_DEBOUNCE
+						while time.monotonic() < deadline and not self.stopping:
+							change = stream.try_next()
+							if change is not None:
+								self.resume_token = stream.resume_token
+								self.notify(change)
+								tenants.add(change_tenant(change))
+						# An unknown tenant (no pre-image, drop, ...) refreshes everything
+						self.refresh_viewers(None if None in tenants else tenants)
+						tenants = set()
+			except PyMongoError as e:
+				print(f"Task change stream error, resuming: {e}")
+				# Events may have been missed; listeners should drop derived state
+				self.notify({'operationType': 'invalidate'})
+				if tenants:
+					# The stream resumes after these changes, so refresh their views now
+					pending, tenants = tenants, set()
+					try:
+						self.refresh_viewers(None if None in pending else pending)
+					except PyMongoError as e:
+						print(f"Could not refresh task views: {e}")
+				time.sleep(1)
+
+	def notify(self, change):
+		for listener in self.listeners:
+			try:
+				listener(change)
+			except Exception as e:
+				print(f"Error in task change listener: {e}")
+
+	def refresh_viewers(self, tenants=None):
+		for view in self.views.owned(tenants):
+			refresher = self.refreshers.get(view['platform'])
+			if refresher is None:
+				continue
+			try:
+				refresher(view['target'])
+			except Exception as e:
+				print(f"Error refreshing task list for {view['_id']}: {e}")
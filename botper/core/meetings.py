@@ -1,18 +1,79 @@
 
-from .database import MongoDB
+from datetime import datetime, timedelta
+from .database import MongoDB, run_once
+from .tasks import parse_start_time
+from .tenants import DEFAULT_TENANT
+
+def day_range(now=None):
+	"""[start, end) of the current UTC day."""
+	now = now or datetime.utcnow()
+	start = datetime(now.year, now.month, now.day)
+	return start, start + timedelta(days=1)
+
+def week_range(now=None):
+	"""[start, end) of the current UTC week, Monday to Sunday."""
+	start, _ = day_range(now)
+	start -= timedelta(days=start.weekday())
+	return start, start + timedelta(days=7)
 
 class MeetingManager:
 	def __init__(self):
 		self.db = MongoDB().get_meetings_collection()
+		self.ensure_indexes()
+
+	def ensure_indexes(self):
+		run_once(self.db.database, 'meetings_tenants', self.migrate_to_tenants)
+		self.db.create_index('meeting_id', unique=True, partialFilterExpression={'meeting_id': {'$exists': True}})
+		# Every view is a start-time range within one tenant, optionally one host/room
+		self.db.create_index([('tenant_id', 1), ('start_at', 1)])
+		self.db.create_index([('tenant_id', 1), ('host_email', 1), ('start_at', 1)])
+		self.db.create_index([('tenant_id', 1), ('room_id', 1), ('start_at', 1)])
+
+	def migrate_to_tenants(self):
+		"""Assign pre-tenant meetings to the default tenant and drop the unprefixed indexes."""
+		self.db.update_many({'tenant_id': {'$exists': False}}, {'$set': {'tenant_id': DEFAULT_TENANT}})
+		existing = self.db.index_information()
+		for name in ('start_at_1', 'host_email_1_start_at_1', 'room_id_1_start_at_1'):
+			if name in existing:
+				self.db.drop_index(name)
 
 	def create_meeting(self, meeting):
 		return self.db.insert_one(meeting)
 
+	def upsert_meeting(self, meeting_id, meeting, tenant=None):
+		"""Create or refresh a meeting record keyed by the provider's meeting id."""
+		fields = dict(meeting, meeting_id=meeting_id, tenant_id=tenant or DEFAULT_TENANT)
+		if 'start_time' in fields:
+			fields['start_at'] = parse_start_time(fields['start_time'])
+		if 'end_time' in fields:
+			fields['end_at'] = parse_start_time(fields['end_time'])
+		if fields.get('host_email'):
+			fields['host_email'] = fields['host_email'].lower()
+		return self.db.update_one({'meeting_id': meeting_id}, {'$set': fields}, upsert=True)
+
 	def list_meetings(self, filter_query=None):
 		if filter_query is None:
 			filter_query = {}
 		return list(self.db.find(filter_query))
 
+	def meetings_between(self, start, end, room_id=None, host_email=None, tenant=None, limit=50):
+		"""One tenant's meetings starting in [start, end), earliest first.
+
+		With room_id and/or host_email, only meetings scheduled from that room
+		or hosted by that person; each side is served by its compound index.
+		"""
+		query = {'tenant_id': tenant or DEFAULT_TENANT, 'start_at': {'$gte': start, '$lt': end}}
+		scopes = []
+		if room_id:
+			scopes.append({'room_id': room_id})
+		if host_email:
+			scopes.append({'host_email': host_email.lower()})
+		if len(scopes) == 1:
+			query.update(scopes[0])
+		elif scopes:
+			query['$or'] = scopes
+		return list(self.db.find(query).sort('start_at', 1).limit(limit))
+
 	def update_meeting(self, meeting_id, update_fields):
 		from bson import ObjectId
 		return self.db.update_one({'_id': ObjectId(meeting_id)}, {'$set': update_fields})
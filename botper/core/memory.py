@@ -0,0 +1,86 @@
+
+import os
+import threading
+import time
+import tracemalloc
+
+# Stack depth recorded per allocation once tracing is switched on
+TRACEMALLOC_FRAMES = int(os.getenv("BOTPER_TRACEMALLOC_FRAMES", "10"))
+
+def _rss_bytes():
+	"""Current resident set size from /proc (Linux); None elsewhere."""
+	try:
+		with open("/proc/self/statm") as f:
+			return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+	except (OSError, ValueError, IndexError):
+		return None
+
+def _location(traceback):
+	frame = traceback[0]
+	return f"{frame.filename}:{frame.lineno}"
+
+class MemoryMonitor:
+	"""Reports the size of registered in-process structures and diffs tracemalloc snapshots.
+
+	A source is a callable returning a number or a dict of numbers (e.g. a
+	cache's stats()). Tracing is off until the first snapshot is taken, since
+	tracemalloc slows every allocation down; stop() switches it off again.
+	"""
+
+	def __init__(self):
+		self.sources = {}
+		self.baseline = None
+		self.latest = None
+		self.lock = threading.Lock()
+
+	def register(self, name, func):
+		self.sources[name] = func
+
+	def report(self):
+		structures = {}
+		for name, func in self.sources.items():
+			try:
+				structures[name] = func()
+			except Exception as e:
+				structures[name] = {'error': str(e)}
+		body = {
+			'rss_bytes': _rss_bytes(),
+			'threads': threading.active_count(),
+			'structures': structures,
+			'tracemalloc': {'tracing': tracemalloc.is_tracing()}
+		}
+		if tracemalloc.is_tracing():
+			current, peak = tracemalloc.get_traced_memory()
+			body['tracemalloc'].update(traced_bytes=current, peak_traced_bytes=peak, has_baseline=self.baseline is not None)
+		return body
+
+	def snapshot(self, limit=20, against="previous"):
+		"""Take a snapshot and return the top allocation sites, diffed against the previous or baseline one."""
+		with self.lock:
+			if not tracemalloc.is_tracing():
+				tracemalloc.start(TRACEMALLOC_FRAMES)
+				self.baseline = self.latest = None
+			snap = tracemalloc.take_snapshot().filter_traces((
+				tracemalloc.Filter(False, tracemalloc.__file__),
+				tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+				tracemalloc.Filter(False, "<unknown>")
+			))
+			reference = self.baseline if against == "baseline" else self.latest
+			if self.baseline is None:
+				self.baseline = snap
+			self.latest = snap
+		body = {'taken_at': time.time(), 'traced_bytes': tracemalloc.get_traced_memory()[0], 'compared_to': against if reference is not None else None}
+		if reference is None:
+			body['top'] = [{'location': _location(stat.traceback), 'size': stat.size, 'count': stat.count} for stat in snap.statistics('lineno')[:limit]]
+		else:
+			body['top'] = [
+				{'location': _location(stat.traceback), 'size': stat.size, 'size_diff': stat.size_diff, 'count': stat.count, 'count_diff': stat.count_diff}
+				for stat in snap.compare_to(reference, 'lineno')[:limit]
+			]
+		return body
+
+	def stop(self):
+		with self.lock:
+			self.baseline = self.latest = None
+			if tracemalloc.is_tracing():
+				tracemalloc.stop()
@@ -0,0 +1,246 @@
+
+import os
+import random
+import threading
+import time
+from datetime import datetime, timedelta
+from pymongo import ReturnDocument
+from .database import MongoDB
+
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("BOTPER_OUTBOX_MAX_ATTEMPTS", "8"))
+OUTBOX_BASE_DELAY = float(os.getenv("BOTPER_OUTBOX_BASE_DELAY", "1"))
+OUTBOX_MAX_DELAY = float(os.getenv("BOTPER_OUTBOX_MAX_DELAY", "300"))
+# A 'sending' claim older than this is assumed lost (crash) and retried
+OUTBOX_LEASE_SECONDS = 60
+# Delivery threads per process; each claims and sends one message at a time
+OUTBOX_WORKERS = int(os.getenv("BOTPER_OUTBOX_WORKERS", "4"))
+
+class Outbox:
+	"""Persistent queue for every outbound message, card and notification.
+
+	Messages are written to the `outbox` collection and delivered by
+	OUTBOX_WORKERS background threads through the sender registered for
+	their platform. A worker never claims a message for a room another
+	worker of this process is sending to, so each room's messages keep
+	their order.
+	Failed sends are retried with jittered exponential backoff; after
+	OUTBOX_MAX_ATTEMPTS they move to `outbox_dead`.
+
+	Messages enqueued with a replace_key (e.g. the task list) replace the
+	room's previous message with that key: it is edited in place where the
+	platform allows it, otherwise the new one is posted and the old deleted.
+	Only the newest pending message per room and key is kept.
+	"""
+
+	def __init__(self, workers=OUTBOX_WORKERS):
+		db = MongoDB().db
+		self.col = db['outbox']
+		self.dead_col = db['outbox_dead']
+		self.live_col = db['live_messages']
+		self.col.create_index([('status', 1), ('next_attempt_at', 1)])
+		self.col.create_index([('platform', 1), ('target', 1), ('replace_key', 1)])
+		self.senders = {}
+		self.updaters = {}
+		self.deleters = {}
+		self.wakeup = threading.Event()
+		self.stopping = False
+		self.workers = max(1, workers)
+		self.threads = []
+		# (platform, target) pairs a worker is sending to right now
+		self.in_flight = set()
+		self.claim_lock = threading.Lock()
+
+	def register_sender(self, platform, func, update=None, delete=None):
+		"""func(target, message, card) delivers one message, returns its id and raises on failure.
+
+		update(target, message_id, message, card) and delete(target, message_id)
+		are optional and used for messages sent with a replace_key.
+		"""
+		self.senders[platform] = func
+		if update is not None:
+			self.updaters[platform] = update
+		if delete is not None:
+			self.deleters[platform] = delete
+
+	def enqueue(self, platform, target, message, card=None, kind="message", replace_key=None):
+		now = datetime.utcnow()
+		if replace_key:
+			# An undelivered older version is superseded by this one
+			self.col.delete_many({'platform': platform, 'target': target, 'replace_key': replace_key, 'status': 'pending'})
+		result = self.col.insert_one({
+			'platform': platform,
+			'target': target,
+			'message': message,
+			'card': card,
+			'kind': kind,
+			'replace_key': replace_key,
+			'status': 'pending',
+			'attempts': 0,
+			'created_at': now,
+			'next_attempt_at': now
+		})
+		self.start()
+		self.wakeup.set()
+		return result.inserted_id
+
+	def start(self):
+		if self.threads or self.stopping:
+			return
+		with self.claim_lock:
+			if self.threads:
+				return
+			for i in range(self.workers):
+				thread = threading.Thread(target=self._run, name=f"botper-outbox-{i}", daemon=True)
+				thread.start()
+				self.threads.append(thread)
+
+	def backoff(self, attempts):
+		delay = min(OUTBOX_MAX_DELAY, OUTBOX_BASE_DELAY * (2 ** (attempts - 1)))
+		# Equal jitter: at least half the delay, so retries from many rooms spread out
+		return delay / 2 + random.uniform(0, delay / 2)
+
+	def _claim(self):
+		"""Claim the next due message for a room no local worker is sending to."""
+		now = datetime.utcnow()
+		query = {'$or': [
+			{'status': 'pending', 'next_attempt_at': {'$lte': now}},
+			{'status': 'sending', 'claimed_at': {'$lt': now - timedelta(seconds=OUTBOX_LEASE_SECONDS)}}
+		]}
+		# Held across the claim so two workers cannot pick up the same room at once
+		with self.claim_lock:
+			if self.in_flight:
+				query['$nor'] = [{'platform': platform, 'target': target} for platform, target in self.in_flight]
+			doc = self.col.find_one_and_update(
+				query,
+				{'$set': {'status': 'sending', 'claimed_at': now}},
+				sort=[('next_attempt_at', 1), ('created_at', 1)],
+				return_document=ReturnDocument.AFTER
+			)
+			if doc is not None:
+				self.in_flight.add((doc['platform'], doc['target']))
+			return doc
+
+	def _release(self, doc):
+		with self.claim_lock:
+			self.in_flight.discard((doc['platform'], doc['target']))
+		# Idle workers may have skipped this room's next message while it was busy
+		self.wakeup.set()
+
+	def _deliver(self, doc):
+		sender = self.senders.get(doc['platform'])
+		try:
+			if sender is None:
+				raise Exception(f"no sender registered for platform '{doc['platform']}'")
+			if doc.get('replace_key'):
+				self._deliver_replacing(doc, sender)
+			else:
+				sender(doc['target'], doc['message'], card=doc.get('card'))
+			self.col.delete_one({'_id': doc['_id']})
+			return True
+		except Exception as e:
+			attempts = doc.get('attempts', 0) + 1
+			# Client errors other than rate limiting will not succeed on retry
+			status_code = getattr(e, 'status_code', None)
+			permanent = isinstance(status_code, int) and 400 <= status_code < 500 and status_code != 429
+			if permanent or attempts >= OUTBOX_MAX_ATTEMPTS:
+				doc.update({'attempts': attempts, 'status': 'dead', 'last_error': str(e), 'failed_at': datetime.utcnow()})
+				self.dead_col.insert_one(doc)
+				self.col.delete_one({'_id': doc['_id']})
+				print(f"ERROR: Outbound {doc['platform']} message to {doc['target']} dead-lettered after {attempts} attempts: {e}")
+			else:
+				delay = self.backoff(attempts)
+				self.col.update_one({'_id': doc['_id']}, {'$set': {
+					'status': 'pending',
+					'attempts': attempts,
+					'last_error': str(e),
+					'next_attempt_at': datetime.utcnow() + timedelta(seconds=delay)
+				}})
+				print(f"WARNING: Send to {doc['target']} failed (attempt {attempts}), retrying in {delay:.1f}s: {e}")
+			return False
+
+	def _deliver_replacing(self, doc, sender):
+		platform, target = doc['platform'], doc['target']
+		key = f"{platform}:{target}:{doc['replace_key']}"
+		live = self.live_col.find_one({'_id': key})
+		previous_id = live.get('message_id') if live else None
+		updater = self.updaters.get(platform)
+		if previous_id and updater:
+			try:
+				updater(target, previous_id, doc['message'], card=doc.get('card'))
+				return
+			except Exception as e:
+				print(f"Could not edit message {previous_id} in place, posting a new one: {e}")
+		message_id = sender(target, doc['message'], card=doc.get('card'))
+		self.live_col.update_one({'_id': key}, {'$set': {'message_id': message_id, 'updated_at': datetime.utcnow()}}, upsert=True)
+		deleter = self.deleters.get(platform)
+		if previous_id and previous_id != message_id and deleter:
+			try:
+				deleter(target, previous_id)
+			except Exception as e:
+				# Already deleted by a user, or too old: the new message is what matters
+				print(f"Could not delete previous message {previous_id}: {e}")
+
+	def _seconds_until_next(self):
+		doc = self.col.find_one({'status': 'pending'}, {'next_attempt_at': 1}, sort=[('next_attempt_at', 1)])
+		if doc is None:
+			return OUTBOX_LEASE_SECONDS
+		return max(0.0, (doc['next_attempt_at'] - datetime.utcnow()).total_seconds())
+
+	def _run(self):
+		while not self.stopping:
+			try:
+				# Clear before claiming so an enqueue during the claim still wakes us
+				self.wakeup.clear()
+				doc = self._claim()
+				if doc is not None:
+					try:
+						self._deliver(doc)
+					finally:
+						self._release(doc)
+					continue
+				self.wakeup.wait(min(self._seconds_until_next(), OUTBOX_LEASE_SECONDS))
+			except Exception as e:
+				print(f"Error in outbox delivery loop: {e}")
+				time.sleep(1)
+
+	def flush(self, timeout):
+		"""Deliver everything currently due within timeout, then stop the delivery threads."""
+		deadline = time.monotonic() + timeout
+		self.stopping = True
+		self.wakeup.set()
+		for thread in self.threads:
+			thread.join(max(0.0, deadline - time.monotonic()))
+		self.threads = []
+		while time.monotonic() < deadline:
+			doc = self._claim()
+			if doc is None:
+				break
+			try:
+				self._deliver(doc)
+			finally:
+				self._release(doc)
+		left = self.col.count_documents({'status': 'pending'})
+		if left:
+			print(f"Outbox: {left} message(s) left pending; they will be sent after restart")
+
+	def retry_dead_letters(self, filter_query=None):
+		"""Move dead-lettered messages back into the outbox for another round of attempts."""
+		moved = 0
+		for doc in self.dead_col.find(filter_query or {}):
+			doc.update({'status': 'pending', 'attempts': 0, 'next_attempt_at': datetime.utcnow()})
+			self.col.insert_one(doc)
+			self.dead_col.delete_one({'_id': doc['_id']})
+			moved += 1
+		if moved:
+			self.start()
+			self.wakeup.set()
+		return moved
+
+	def stats(self):
+		return {
+			'pending': self.col.count_documents({'status': 'pending'}),
+			'sending': self.col.count_documents({'status': 'sending'}),
+			'dead': self.dead_col.estimated_document_count(),
+			'workers': len(self.threads),
+			'in_flight': len(self.in_flight)
+		}
@@ -0,0 +1,132 @@
+
+import heapq
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+
+# Remind this many minutes before a meeting starts
+REMINDER_LEAD_MINUTES = int(os.getenv("BOTPER_REMINDER_LEAD_MINUTES", "10"))
+# Reminders due within this many seconds are held in memory
+REMINDER_WINDOW = float(os.getenv("BOTPER_REMINDER_WINDOW", "3600"))
+# How often the window is re-read from Mongo to pick up new or moved meetings
+REMINDER_RELOAD_INTERVAL = float(os.getenv("BOTPER_REMINDER_RELOAD_INTERVAL", "60"))
+
+class ReminderScheduler:
+	"""Fires a "starting soon" reminder once per meeting task.
+
+	Only reminders due within REMINDER_WINDOW are loaded, with one range
+	query on the `start_at` index every REMINDER_RELOAD_INTERVAL, into an
+	in-memory heap; a single thread sleeps until the earliest one is due.
+	Before sending, the task is claimed by setting `reminded_at` only if it
+	is still unset and the start time unchanged, so a restart or a second
+	replica never sends the same reminder twice.
+	"""
+
+	def __init__(self, tasks_col, lead_minutes=REMINDER_LEAD_MINUTES):
+		self.col = tasks_col
+		self.lead = timedelta(minutes=lead_minutes)
+		self.notifiers = {}
+		self.heap = []
+		self.scheduled = {}
+		self.cond = threading.Condition()
+		self.stopping = False
+		self.thread = None
+
+	def register(self, platform, func):
+		"""func(task, minutes) sends the reminder for a task created on that platform."""
+		self.notifiers[platform] = func
+
+	def start(self):
+		if self.thread is None and self.notifiers:
+			self.stopping = False
+			self.thread = threading.Thread(target=self._run, name="botper-reminders", daemon=True)
+			self.thread.start()
+
+	def stop(self, timeout=None):
+		with self.cond:
+			self.stopping = True
+			self.cond.notify()
+		if self.thread is not None:
+			self.thread.join(timeout)
+			self.thread = None
+
+	def load(self):
+		"""Schedule every unfired reminder for a meeting starting within the window."""
+		now = datetime.utcnow()
+		cursor = self.col.find(
+			{
+				'start_at': {'$gt': now, '$lte': now + self.lead + timedelta(seconds=REMINDER_WINDOW)},
+				'reminded_at': {'$exists': False},
+				'completed': {'$ne': True},
+				'platform': {'$in': list(self.notifiers)}
+			},
+			{'start_at': 1}
+		)
+		for task in cursor:
+			self.schedule(task['_id'], task['start_at'])
+		return len(self.scheduled)
+
+	def schedule(self, task_id, start_at):
+		with self.cond:
+			if self.scheduled.get(task_id) == start_at:
+				return
+			# A moved meeting gets a new entry; the old one fails its claim and is dropped
+			self.scheduled[task_id] = start_at
+			fire_at = (start_at - self.lead - datetime.utcnow()).total_seconds() + time.time()
+			heapq.heappush(self.heap, (fire_at, task_id, start_at))
+			self.cond.notify()
+
+	def stats(self):
+		with self.cond:
+			return {'scheduled': len(self.scheduled), 'next_in': round(self.heap[0][0] - time.time(), 1) if self.heap else None}
+
+	def _run(self):
+		next_load = 0
+		while True:
+			if time.time() >= next_load:
+				try:
+					self.load()
+				except Exception as e:
+					print(f"Error loading reminders: {e}")
+				next_load = time.time() + REMINDER_RELOAD_INTERVAL
+			with self.cond:
+				if self.stopping:
+					return
+				wait = next_load - time.time()
+				if self.heap:
+					wait = min(wait, self.heap[0][0] - time.time())
+				if wait > 0:
+					self.cond.wait(wait)
+					continue
+				if not self.heap:
+					continue
+				_, task_id, start_at = heapq.heappop(self.heap)
+				if self.scheduled.get(task_id) == start_at:
+					del self.scheduled[task_id]
+			try:
+				self.fire(task_id, start_at)
+			except Exception as e:
+				# e.g. Mongo briefly unreachable: the task is still unclaimed, so the next load retries it
+				print(f"Error firing reminder for task {task_id}: {e}")
+
+	def fire(self, task_id, start_at):
+		# Millisecond precision, as Mongo stores it, so the release below can match the claim exactly
+		claimed_at = datetime.utcnow()
+		claimed_at = claimed_at.replace(microsecond=claimed_at.microsecond // 1000 * 1000)
+		task = self.col.find_one_and_update(
+			{'_id': task_id, 'start_at': start_at, 'reminded_at': {'$exists': False}, 'completed': {'$ne': True}},
+			{'$set': {'reminded_at': claimed_at}}
+		)
+		if task is None:
+			return
+		notifier = self.notifiers.get(task.get('platform'))
+		if notifier is None:
+			return
+		minutes = max(1, round((start_at - datetime.utcnow()).total_seconds() / 60))
+		try:
+			notifier(task, minutes)
+		except Exception as e:
+			print(f"Error sending reminder for task {task_id}, releasing it for a retry: {e}")
+			# Only our own claim: the next load() schedules the reminder again
+			self.col.update_one({'_id': task_id, 'reminded_at': claimed_at}, {'$unset': {'reminded_at': 1}})
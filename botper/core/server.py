@@ -0,0 +1,253 @@
+
+import asyncio
+import hmac
+import os
+import time
+from fastapi import FastAPI, Request
+from utils.json_codec import FastJSONResponse
+from utils.http import breaker_states
+from .tasks import TaskManager
+from .meetings import MeetingManager
+from .workers import WorkerPool
+from .database import ping
+from .health import HealthChecker
+from .outbox import Outbox
+from .live_updates import TaskChangeWatcher
+from .reminders import ReminderScheduler
+from .memory import MemoryMonitor
+from .leader import LeaderElection
+
+# Readiness fails once the shared worker queue is this full
+WORKER_SATURATION_LIMIT = float(os.getenv("BOTPER_WORKER_SATURATION_LIMIT", "0.9"))
+# Seconds allowed for in-flight requests and queued background work on shutdown
+SHUTDOWN_TIMEOUT = float(os.getenv("BOTPER_SHUTDOWN_TIMEOUT", "20"))
+# Bearer token for the /admin endpoints; unset leaves them disabled
+ADMIN_TOKEN = os.getenv("BOTPER_ADMIN_TOKEN")
+# Event loop stall (seconds) that counts as unhealthy; Zoom drops webhooks not acked within 3s
+LOOP_LAG_LIMIT = float(os.getenv("BOTPER_LOOP_LAG_LIMIT", "1.0"))
+# Seconds between event loop lag probes
+LOOP_PROBE_INTERVAL = 0.25
+
+class BotServer:
+	"""One ASGI application hosting every configured platform bot.
+
+	Each bot registers its routes (/webex/..., /teams/..., /zoom/...) on the
+	shared app and uses the shared managers and worker pool, so running all
+	platforms costs one process, one port and one Mongo connection pool.
+	"""
+
+	def __init__(self):
+		self.app = FastAPI(default_response_class=FastJSONResponse)
+		self.task_manager = TaskManager()
+		self.meeting_manager = MeetingManager()
+		self.workers = WorkerPool()
+		self.outbox = Outbox()
+		self.live_updates = TaskChangeWatcher(self.task_manager.db)
+		if self.task_manager.cache is not None:
+			# Other replicas' writes reach our task list cache through the change stream
+			self.live_updates.subscribe(self.task_manager.cache.on_change)
+		self.reminders = ReminderScheduler(self.task_manager.db)
+		# Singleton jobs run on whichever replica holds their lease
+		self.leader = LeaderElection()
+		self.leader.register('reminders', self.reminders.start, self.reminders.stop)
+		self.health = HealthChecker()
+		self.memory = MemoryMonitor()
+		self.ready = False
+		self.draining = False
+		self.loop_lag_peak = 0.0
+		self.shutdown_hooks = []
+		self.bots = []
+		self.setup_health()
+		self.setup_shutdown()
+		self.setup_admin()
+		self.on_shutdown(self.live_updates.stop)
+		self.on_shutdown(self.leader.stop)
+		self.on_shutdown(self.outbox.flush)
+
+	def setup_health(self):
+		self.health.register('mongo', self.check_mongo)
+		self.health.register('workers', self.check_workers, ttl=1.0)
+		self.health.register('outbox', self.check_outbox, critical=False)
+		self.health.register('leader', lambda: (True, self.leader.stats()), ttl=1.0, critical=False)
+		self.health.register('event_loop', self.check_event_loop, ttl=1.0, critical=False)
+		# An open breaker means outbound calls to that host fail fast; the outbox retries them later
+		self.health.register('http_breakers', self.check_breakers, ttl=1.0, critical=False)
+
+		@self.app.on_event("startup")
+		async def mark_ready():
+			self.ready = True
+			asyncio.get_running_loop().create_task(self.probe_event_loop())
+
+		@self.app.get("/healthz")
+		def healthz():
+			"""Liveness: the process is up and serving requests."""
+			return {"status": "ok"}
+
+		@self.app.get("/readyz")
+		def readyz():
+			"""Readiness: Mongo reachable, platform tokens valid, workers not saturated."""
+			healthy, checks = self.health.report()
+			ready = self.ready and healthy
+			body = {"status": "ready" if ready else "not ready", "started": self.ready, "checks": checks}
+			return FastJSONResponse(body, status_code=200 if ready else 503)
+
+	def setup_admin(self):
+		self.memory.register('workers', lambda: self.workers.stats()['queued'])
+		self.memory.register('reminders', lambda: self.reminders.stats()['scheduled'])
+		self.memory.register('tenant_targets', lambda: len(self.task_manager.tenants.targets))
+		if self.task_manager.cache is not None:
+			self.memory.register('task_cache', self.task_manager.cache.stats)
+
+		def denied(request):
+			"""Error response unless the request carries the admin token."""
+			if not ADMIN_TOKEN:
+				return FastJSONResponse({"status": "not found"}, status_code=404)
+			if not hmac.compare_digest(request.headers.get('Authorization', ''), f"Bearer {ADMIN_TOKEN}"):
+				return FastJSONResponse({"status": "unauthorized"}, status_code=401)
+			return None
+
+		@self.app.get("/admin/memory")
+		def memory_report(request: Request):
+			"""Process RSS and the size of every registered in-memory structure."""
+			return denied(request) or self.memory.report()
+
+		@self.app.post("/admin/memory/snapshot")
+		def memory_snapshot(request: Request, limit: int = 20, against: str = "previous"):
+			"""Take a tracemalloc snapshot (tracing starts on first use) and diff it against the previous or baseline one."""
+			return denied(request) or self.memory.snapshot(limit=limit, against=against)
+
+		@self.app.delete("/admin/memory/snapshot")
+		def memory_stop_tracing(request: Request):
+			"""Stop tracemalloc and drop the stored snapshots."""
+			error = denied(request)
+			if error:
+				return error
+			self.memory.stop()
+			return {"status": "ok"}
+
+		@self.app.post("/admin/outbox/retry")
+		def outbox_retry(request: Request, platform: str = None):
+			"""Move dead-lettered messages (optionally one platform's) back into the outbox."""
+			error = denied(request)
+			if error:
+				return error
+			moved = self.outbox.retry_dead_letters({'platform': platform} if platform else None)
+			return {"status": "ok", "moved": moved}
+
+	def setup_shutdown(self):
+		@self.app.middleware("http")
+		async def reject_while_draining(request: Request, call_next):
+			# Platforms redeliver webhooks answered with 503, so a draining
+			# instance hands new events back instead of half-processing them.
+			if self.draining and request.url.path.endswith("/webhook"):
+				return FastJSONResponse({"status": "shutting down"}, status_code=503)
+			return await call_next(request)
+
+		@self.app.on_event("shutdown")
+		def drain_background_work():
+			self.shutdown()
+
+	def on_shutdown(self, func):
+		"""Register a callable(deadline_seconds) run after workers drain, e.g. to flush sends."""
+		self.shutdown_hooks.append(func)
+		return func
+
+	def begin_drain(self):
+		if not self.draining:
+			print("Shutdown requested: no longer accepting new webhook events")
+		self.draining = True
+		self.ready = False
+
+	def shutdown(self, timeout=SHUTDOWN_TIMEOUT):
+		"""Stop accepting events, drain queued work and flush pending sends within timeout."""
+		self.begin_drain()
+		deadline = time.monotonic() + timeout
+		left = self.workers.drain(timeout)
+		if left:
+			print(f"WARNING: {left} background job(s) still running after {timeout:.0f}s")
+		else:
+			print("OK: Background work drained")
+		self.workers.stop()
+		for hook in self.shutdown_hooks:
+			try:
+				hook(max(0.0, deadline - time.monotonic()))
+			except Exception as e:
+				print(f"Error in shutdown hook {getattr(hook, '__name__', hook)}: {e}")
+
+	def check_mongo(self):
+		# Not the shared client: its 30s server selection would hold the health lock that long
+		ping()
+		return True, "ping ok"
+
+	async def probe_event_loop(self):
+		"""Record how late the loop wakes us: any blocking call in an async route shows up here."""
+		loop = asyncio.get_running_loop()
+		while not self.draining:
+			started = loop.time()
+			await asyncio.sleep(LOOP_PROBE_INTERVAL)
+			lag = loop.time() - started - LOOP_PROBE_INTERVAL
+			if lag > LOOP_LAG_LIMIT:
+				print(f"WARNING: event loop blocked for {lag:.2f}s; webhook acks were delayed as long")
+			self.loop_lag_peak = max(self.loop_lag_peak, lag)
+
+	def check_event_loop(self):
+		peak, self.loop_lag_peak = self.loop_lag_peak, 0.0
+		return peak < LOOP_LAG_LIMIT, {'peak_lag_ms': round(peak * 1000, 1)}
+
+	def check_breakers(self):
+		states = breaker_states()
+		return all(state == 'closed' for state in states.values()), states
+
+	def check_workers(self):
+		stats = self.workers.stats()
+		return stats['saturation'] < WORKER_SATURATION_LIMIT, stats
+
+	def check_outbox(self):
+		stats = self.outbox.stats()
+		return stats['dead'] == 0, stats
+
+	def add_bot(self, name, bot_class):
+		bot = bot_class(
+			app=self.app,
+			task_manager=self.task_manager,
+			meeting_manager=self.meeting_manager,
+			workers=self.workers,
+			outbox=self.outbox,
+			live_updates=self.live_updates
+		)
+		self.live_updates.register(bot.platform, bot.send_task_list)
+		if hasattr(bot, 'send_meeting_reminder'):
+			self.reminders.register(bot.platform, bot.send_meeting_reminder)
+		if hasattr(bot, 'register_health_checks'):
+			bot.register_health_checks(self.health)
+		if hasattr(bot, 'commands'):
+			# Per-command counts, errors and latency; informational only
+			self.health.register(f'{bot.platform}_commands', lambda: (True, bot.commands.stats()), ttl=1.0, critical=False)
+		if hasattr(bot, 'memory_stats'):
+			self.memory.register(name, bot.memory_stats)
+		if hasattr(bot, 'start_background_jobs'):
+			self.leader.register(f"{name}-background", bot.start_background_jobs, bot.stop_background_jobs)
+		if hasattr(bot, 'close'):
+			self.on_shutdown(bot.close)
+		self.bots.append((name, bot))
+		return bot
+
+	def start(self, port=8000):
+		import uvicorn
+		for name, bot in self.bots:
+			bot.current_port = port
+		self.workers.start()
+		self.outbox.start()
+		self.live_updates.start()
+		self.leader.start()
+		server = self
+
+		class GracefulServer(uvicorn.Server):
+			def handle_exit(self, sig, frame):
+				# Flip to draining as soon as SIGINT/SIGTERM arrives, before
+				# uvicorn waits for in-flight requests to finish.
+				server.begin_drain()
+				super().handle_exit(sig, frame)
+
+		config = uvicorn.Config(self.app, host="0.0.0.0", port=port, timeout_graceful_shutdown=SHUTDOWN_TIMEOUT)
+		GracefulServer(config).run()
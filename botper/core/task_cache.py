@@ -0,0 +1,165 @@
+
+import os
+import threading
+import time
+from collections import OrderedDict
+
+# Task lists kept in memory (one per tenant); 0 disables the cache
+TASK_CACHE_SIZE = int(os.getenv("BOTPER_TASK_CACHE_SIZE", "0"))
+# Upper bound on staleness when another replica's write is missed (e.g. no change streams)
+TASK_CACHE_TTL = float(os.getenv("BOTPER_TASK_CACHE_TTL", "30"))
+# Our own writes echoed back by the change stream within this window don't invalidate
+OWN_WRITE_WINDOW = 30.0
+
+class TaskListCache:
+	"""LRU of rendered task lists, kept current by the writes that go through TaskManager.
+
+	Local creates, updates and deletes are applied to the cached list in
+	place (write-through), so the list shown right after a write needs no
+	Mongo read. Writes from other replicas arrive through the task change
+	stream (`on_change`) and drop the affected list. Changes caused by our
+	own writes are recognised by task id and skipped.
+
+	A list read from Mongo is only cached if no write to its tenant was
+	seen while it was being read: take generation(tenant) before the read
+	and hand it to put(), which drops the list when the tenant was
+	invalidated in between.
+	"""
+
+	def __init__(self, max_entries=TASK_CACHE_SIZE, ttl=TASK_CACHE_TTL):
+		self.max_entries = max_entries
+		self.ttl = ttl
+		self.entries = OrderedDict()
+		self.owners = {}
+		self.own_writes = {}
+		# tenant -> counter at its last invalidation; epoch covers "every tenant"
+		self.generations = {}
+		self.counter = 0
+		self.epoch = 0
+		self.lock = threading.Lock()
+		self.hits = 0
+		self.misses = 0
+
+	def get(self, tenant):
+		with self.lock:
+			entry = self.entries.get(tenant)
+			if entry is None or time.monotonic() - entry[0] > self.ttl:
+				if entry is not None:
+					self._evict(tenant)
+				self.misses += 1
+				return None
+			self.entries.move_to_end(tenant)
+			self.hits += 1
+			return list(entry[1])
+
+	def generation(self, tenant):
+		"""Token to pass to put() for a list about to be read from Mongo."""
+		with self.lock:
+			return (self.epoch, self.generations.get(tenant, 0))
+
+	def _bump(self, tenant):
+		"""Mark tenant (None: every tenant) as written, so reads already under way are not cached."""
+		if tenant is None:
+			self.epoch += 1
+			return
+		self.counter += 1
+		self.generations[tenant] = self.counter
+		if len(self.generations) > 10 * self.max_entries + 1000:
+			# Forgetting per-tenant counters is safe as long as every older token is invalidated
+			self.generations.clear()
+			self.epoch += 1
+
+	def put(self, tenant, records, generation=None):
+		"""Cache a freshly read list; returns False if the tenant changed since generation was taken."""
+		with self.lock:
+			if generation is not None and generation != (self.epoch, self.generations.get(tenant, 0)):
+				return False
+			if tenant in self.entries:
+				self._evict(tenant)
+			self.entries[tenant] = (time.monotonic(), list(records))
+			for record in records:
+				self.owners[record._id] = tenant
+			while len(self.entries) > self.max_entries:
+				self._evict(next(iter(self.entries)))
+			return True
+
+	def invalidate(self, tenant=None):
+		with self.lock:
+			self._bump(tenant)
+			if tenant is None:
+				self.entries.clear()
+				self.owners.clear()
+			elif tenant in self.entries:
+				self._evict(tenant)
+
+	def _evict(self, tenant):
+		_, records = self.entries.pop(tenant)
+		for record in records:
+			self.owners.pop(record._id, None)
+
+	def _mark_own(self, task_id):
+		now = time.monotonic()
+		self.own_writes[task_id] = now
+		if len(self.own_writes) > 10000:
+			self.own_writes = {k: t for k, t in self.own_writes.items() if now - t < OWN_WRITE_WINDOW}
+
+	def added(self, tenant, record):
+		with self.lock:
+			self._mark_own(record._id)
+			entry = self.entries.get(tenant)
+			if entry is not None:
+				entry[1].append(record)
+				self.owners[record._id] = tenant
+			else:
+				self._bump(tenant)
+
+	def updated(self, task_id, fields, tenant=None):
+		with self.lock:
+			self._mark_own(task_id)
+			owner = self.owners.get(task_id)
+			if owner is None:
+				self._bump(tenant)
+				return
+			tenant = owner
+			for record in self.entries[tenant][1]:
+				if record._id == task_id:
+					for key, value in fields.items():
+						if key in record.__slots__:
+							setattr(record, key, value)
+					return
+
+	def removed(self, task_id, tenant=None):
+		with self.lock:
+			self._mark_own(task_id)
+			owner = self.owners.pop(task_id, None)
+			if owner is None:
+				self._bump(tenant)
+				return
+			records = self.entries[owner][1]
+			records[:] = [record for record in records if record._id != task_id]
+
+	def on_change(self, change):
+		"""Change stream hook: drop the list a foreign write touched."""
+		task_id = change.get('documentKey', {}).get('_id')
+		with self.lock:
+			written_at = self.own_writes.pop(task_id, None)
+			if written_at is not None and time.monotonic() - written_at < OWN_WRITE_WINDOW:
+				return
+			if change.get('operationType') in ('insert', 'update', 'replace', 'delete'):
+				# Post-image (updateLookup) or pre-image tell the tenant even when the list isn't cached
+				doc = change.get('fullDocument') or change.get('fullDocumentBeforeChange') or {}
+				tenant = self.owners.get(task_id) or doc.get('tenant_id')
+			else:
+				# drop / rename / invalidate: start over
+				self._bump(None)
+				self.entries.clear()
+				self.owners.clear()
+				return
+			# Unknown tenant: a list being read right now may be stale, whichever it is
+			self._bump(tenant)
+			if tenant in self.entries:
+				self._evict(tenant)
+
+	def stats(self):
+		with self.lock:
+			return {'entries': len(self.entries), 'max_entries': self.max_entries, 'hits': self.hits, 'misses': self.misses}
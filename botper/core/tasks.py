@@ -1,22 +1,264 @@
 
-from .database import MongoDB
+import re
+import unicodedata
+from datetime import datetime, timezone
+from bson.codec_options import CodecOptions
+from bson.raw_bson import RawBSONDocument
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from .database import MongoDB, run_once
+from .tenants import TenantDirectory, DEFAULT_TENANT
+from .task_cache import TaskListCache, TASK_CACHE_SIZE
+
+SEARCH_PAGE_SIZE = 10
+# migrations document naming the org that took over the tasks from before tenants existed
+LEGACY_OWNER_ID = 'tasks_legacy_owner'
+# The only fields task cards render; list reads fetch nothing else
+TASK_CARD_PROJECTION = {'title': 1, 'completed': 1, 'type': 1, 'meeting_link': 1}
+
+def normalize_title(title):
+	"""Lowercase, accent-free, single-spaced form of a title for matching."""
+	decomposed = unicodedata.normalize('NFKD', title or '')
+	stripped = ''.join(c for c in decomposed if not unicodedata.combining(c))
+	return ' '.join(stripped.lower().split())
+
+def parse_start_time(value):
+	"""Naive UTC datetime (as pymongo returns them) from an ISO 8601 start time, or None."""
+	if not value:
+		return None
+	try:
+		parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+	except (AttributeError, ValueError):
+		return None
+	if parsed.tzinfo is not None:
+		parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+	return parsed
+
+def with_start_at(fields):
+	"""Add the indexed `start_at` datetime next to a display `start_time` string."""
+	if 'start_time' in fields:
+		fields = dict(fields, start_at=parse_start_time(fields['start_time']))
+	return fields
+
+class TaskRecord:
+	"""Compact read-only task holding just the fields cards render.
+
+	Supports the dict-style access (`task['title']`, `task.get(...)`) the
+	card formatters already use, without a per-task dict.
+	"""
+	__slots__ = ('_id', 'title', 'completed', 'type', 'meeting_link')
+
+	def __init__(self, _id, title, completed=False, type=None, meeting_link=None):
+		self._id = _id
+		self.title = title
+		self.completed = completed
+		self.type = type
+		self.meeting_link = meeting_link
+
+	@classmethod
+	def from_document(cls, doc):
+		# On a RawBSONDocument each get() decodes only that one field
+		return cls(doc.get('_id'), doc.get('title', ''), doc.get('completed', False), doc.get('type'), doc.get('meeting_link'))
+
+	def get(self, key, default=None):
+		value = getattr(self, key, None) if key in self.__slots__ else None
+		return default if value is None else value
+
+	def __getitem__(self, key):
+		if key not in self.__slots__:
+			raise KeyError(key)
+		return getattr(self, key)
 
 class TaskManager:
+	"""Tasks partitioned by tenant (org) through a `tenant_id` key.
+
+	Every index used by task reads leads with tenant_id, so a query touches
+	only its own tenant's slice of each index no matter how large other
+	tenants grow. Task counts per tenant are capped by TenantDirectory.
+
+	With BOTPER_TASK_CACHE_SIZE > 0, full task lists are also kept in a
+	write-through TaskListCache (see core/task_cache.py).
+	"""
+
 	def __init__(self):
 		self.db = MongoDB().get_tasks_collection()
+		# Same collection, but results stay undecoded BSON until a field is read
+		self.raw = self.db.with_options(codec_options=CodecOptions(document_class=RawBSONDocument))
+		self.tenants = TenantDirectory()
+		self.cache = TaskListCache() if TASK_CACHE_SIZE > 0 else None
+		self.ensure_indexes()
+		self.legacy_unclaimed = self.db.database['migrations'].find_one({'_id': LEGACY_OWNER_ID}, {'_id': 1}) is None
+		self.tenants.subscribe(self.adopt_legacy_tasks)
 
-	def create_task(self, task):
-		return self.db.insert_one(task)
+	def ensure_indexes(self):
+		database = self.db.database
+		# Documents written before these fields existed; each runs once per database
+		run_once(database, 'tasks_normalized_titles', self.backfill_normalized_titles)
+		run_once(database, 'tasks_start_at', self.backfill_start_at)
+		run_once(database, 'tasks_tenants', self.migrate_to_tenants)
+		# Language 'none' disables stemming/stop words so short task words still match
+		self.db.create_index([('tenant_id', 1), ('title', 'text')], name='tenant_title_text', default_language='none')
+		self.db.create_index([('tenant_id', 1), ('title_normalized', 1)])
+		self.db.create_index([('tenant_id', 1), ('_id', 1)])
+		# One task per provider meeting, so calendar sync and webhooks upsert instead of duplicating
+		self.db.create_index('meeting_id', unique=True, partialFilterExpression={'meeting_id': {'$exists': True}})
+		# Meeting reminders range-scan upcoming start times
+		self.db.create_index('start_at', partialFilterExpression={'start_at': {'$type': 'date'}})
 
-	def list_tasks(self, filter_query=None):
+	def backfill_normalized_titles(self):
+		for task in self.db.find({'title_normalized': {'$exists': False}}, {'title': 1}):
+			self.db.update_one({'_id': task['_id']}, {'$set': {'title_normalized': normalize_title(task.get('title'))}})
+
+	def backfill_start_at(self):
+		for task in self.db.find({'start_time': {'$exists': True}, 'start_at': {'$exists': False}}, {'start_time': 1}):
+			self.db.update_one({'_id': task['_id']}, {'$set': {'start_at': parse_start_time(task.get('start_time'))}})
+
+	def migrate_to_tenants(self):
+		"""Park pre-tenant tasks in the default tenant until an org adopts them; drop the unprefixed search indexes."""
+		if self.db.update_many({'tenant_id': {'$exists': False}}, {'$set': {'tenant_id': DEFAULT_TENANT, 'legacy_tenant': True}}).modified_count:
+			self.tenants.recount(self.db)
+		# A collection may have only one text index, so title_text must go before tenant_title_text is built
+		existing = self.db.index_information()
+		for name in ('title_text', 'title_normalized_1'):
+			if name in existing:
+				self.db.drop_index(name)
+
+	def adopt_legacy_tasks(self, tenant):
+		"""Hand the pre-tenant tasks to the first org whose room is learned.
+
+		Before tenants existed every room shared one task list, so the first
+		org seen (across all replicas) takes all of it; rooms are learned on
+		their first event, so users keep seeing their tasks after upgrading.
+		"""
+		if not self.legacy_unclaimed or tenant == DEFAULT_TENANT:
+			return
+		migrations = self.db.database['migrations']
+		try:
+			owner = migrations.find_one_and_update(
+				{'_id': LEGACY_OWNER_ID},
+				{'$setOnInsert': {'tenant_id': tenant, 'applied_at': datetime.utcnow()}},
+				upsert=True,
+				return_document=ReturnDocument.AFTER
+			)['tenant_id']
+		except DuplicateKeyError:
+			# Another replica claimed them at the same moment
+			owner = migrations.find_one({'_id': LEGACY_OWNER_ID})['tenant_id']
+		moved = self.db.update_many(
+			{'tenant_id': DEFAULT_TENANT, 'legacy_tenant': True},
+			{'$set': {'tenant_id': owner}, '$unset': {'legacy_tenant': 1}}
+		).modified_count
+		self.legacy_unclaimed = False
+		if moved:
+			print(f"Moved {moved} task(s) from before tenants existed to org {owner}")
+			self.tenants.transfer_tasks(DEFAULT_TENANT, owner, moved)
+			if self.cache is not None:
+				self.cache.invalidate(DEFAULT_TENANT)
+				self.cache.invalidate(owner)
+
+	def scoped(self, query, tenant):
+		return dict(query, tenant_id=tenant) if tenant else query
+
+	def create_task(self, task, tenant=None):
+		tenant = tenant or DEFAULT_TENANT
+		self.tenants.reserve_task(tenant)
+		task['tenant_id'] = tenant
+		task.setdefault('title_normalized', normalize_title(task.get('title')))
+		if 'start_time' in task:
+			task.setdefault('start_at', parse_start_time(task['start_time']))
+		try:
+			result = self.db.insert_one(task)
+		except Exception:
+			self.tenants.release_task(tenant)
+			raise
+		if self.cache is not None:
+			self.cache.added(tenant, TaskRecord.from_document(task))
+		return result
+
+	def upsert_meeting_task(self, meeting_id, task, tenant=None):
+		"""Create or refresh the task for a meeting; a task without meeting_id is just created."""
+		if not meeting_id:
+			return self.create_task(task, tenant=tenant)
+		tenant = tenant or DEFAULT_TENANT
+		fields = with_start_at(dict(task, meeting_id=meeting_id))
+		# Completion belongs to the user: set on insert only, never reset by a re-sync
+		completed = fields.pop('completed', False)
+		fields.pop('tenant_id', None)
+		if 'title' in fields:
+			fields['title_normalized'] = normalize_title(fields['title'])
+		result = self.db.update_one(
+			{'meeting_id': meeting_id},
+			{'$set': fields, '$setOnInsert': {'completed': completed, 'tenant_id': tenant}},
+			upsert=True
+		)
+		if result.upserted_id is not None:
+			try:
+				self.tenants.reserve_task(tenant)
+			except Exception:
+				self.db.delete_one({'_id': result.upserted_id})
+				raise
+		if self.cache is not None and (result.upserted_id is not None or result.modified_count):
+			self.cache.invalidate(tenant)
+		return result
+
+	def list_tasks(self, filter_query=None, tenant=None):
 		if filter_query is None:
 			filter_query = {}
-		return list(self.db.find(filter_query))
+		return list(self.db.find(self.scoped(filter_query, tenant)))
+
+	def list_task_records(self, filter_query=None, tenant=None):
+		"""Tasks as TaskRecords, fetching only the fields task cards render."""
+		tenant = tenant or DEFAULT_TENANT
+		cacheable = self.cache is not None and not filter_query
+		if cacheable:
+			records = self.cache.get(tenant)
+			if records is not None:
+				return records
+			# Taken before the read: a write seen meanwhile keeps this list out of the cache
+			generation = self.cache.generation(tenant)
+		cursor = self.raw.find(self.scoped(filter_query or {}, tenant), TASK_CARD_PROJECTION)
+		records = [TaskRecord.from_document(doc) for doc in cursor]
+		if cacheable:
+			self.cache.put(tenant, records, generation=generation)
+		return records
+
+	def get_task(self, task_id, projection=None, tenant=None):
+		from bson import ObjectId
+		return self.db.find_one(self.scoped({'_id': ObjectId(task_id)}, tenant), projection)
+
+	def search_tasks(self, query, page=0, page_size=SEARCH_PAGE_SIZE, tenant=None):
+		"""Ranked, paginated title search within one tenant; returns (TaskRecords, has_more)."""
+		normalized = normalize_title(query)
+		if not normalized:
+			return [], False
+		tenant = tenant or DEFAULT_TENANT
+		skip = page * page_size
+		# Text index: whole-word matches ranked by relevance
+		cursor = self.raw.find(
+			{'tenant_id': tenant, '$text': {'$search': normalized}},
+			dict(TASK_CARD_PROJECTION, score={'$meta': 'textScore'})
+		).sort([('score', {'$meta': 'textScore'})]).skip(skip).limit(page_size + 1)
+		tasks = list(cursor)
+		if not tasks and page == 0:
+			# Partial words ("meet" for "meeting"): anchored prefix on the indexed normalized title
+			cursor = self.raw.find({'tenant_id': tenant, 'title_normalized': {'$regex': '^' + re.escape(normalized)}}, TASK_CARD_PROJECTION).limit(page_size + 1)
+			tasks = list(cursor)
+		return [TaskRecord.from_document(doc) for doc in tasks[:page_size]], len(tasks) > page_size
 
-	def update_task(self, task_id, update_fields):
+	def update_task(self, task_id, update_fields, tenant=None):
 		from bson import ObjectId
-		return self.db.update_one({'_id': ObjectId(task_id)}, {'$set': update_fields})
+		if 'title' in update_fields:
+			update_fields = dict(update_fields, title_normalized=normalize_title(update_fields['title']))
+		update_fields = with_start_at(update_fields)
+		result = self.db.update_one(self.scoped({'_id': ObjectId(task_id)}, tenant), {'$set': update_fields})
+		if self.cache is not None and result.modified_count:
+			self.cache.updated(ObjectId(task_id), update_fields, tenant=tenant)
+		return result
 
-	def delete_task(self, task_id):
+	def delete_task(self, task_id, tenant=None):
 		from bson import ObjectId
-		return self.db.delete_one({'_id': ObjectId(task_id)})
+		deleted = self.db.find_one_and_delete(self.scoped({'_id': ObjectId(task_id)}, tenant), {'tenant_id': 1})
+		if deleted is not None:
+			self.tenants.release_task(deleted.get('tenant_id', DEFAULT_TENANT))
+			if self.cache is not None:
+				self.cache.removed(deleted['_id'], tenant=deleted.get('tenant_id'))
+		return deleted
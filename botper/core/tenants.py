@@ -0,0 +1,88 @@
+
+import os
+from pymongo.errors import DuplicateKeyError
+from utils.cache import BoundedDict
+from .database import MongoDB
+
+# Tasks from rooms whose org is not known yet (and from before tenants existed)
+DEFAULT_TENANT = "default"
+# Default cap on stored tasks per tenant; override per tenant with `max_tasks` in `tenants`
+TENANT_MAX_TASKS = int(os.getenv("BOTPER_TENANT_MAX_TASKS", "10000"))
+# Room -> tenant mappings kept in memory; older ones are re-read from Mongo when needed
+TENANT_CACHE_SIZE = int(os.getenv("BOTPER_TENANT_CACHE_SIZE", "10000"))
+
+class TenantDirectory:
+	"""Maps rooms to the org (tenant) they belong to and enforces per-tenant limits.
+
+	The tenant of a room is learned from incoming events (Webex orgId, Teams
+	tenant id, Zoom account id) and kept in memory and in `tenant_targets`.
+	`tenants` holds one document per tenant with its live task count and an
+	optional `max_tasks` override.
+	"""
+
+	def __init__(self):
+		db = MongoDB().db
+		self.targets_col = db['tenant_targets']
+		self.col = db['tenants']
+		self.targets = BoundedDict(TENANT_CACHE_SIZE)
+		self.listeners = []
+
+	def subscribe(self, func):
+		"""Call func(tenant_id) whenever a room's org is stored."""
+		self.listeners.append(func)
+
+	def remember(self, platform, target, tenant_id):
+		if not target or not tenant_id:
+			return
+		key = f"{platform}:{target}"
+		if self.targets.get(key) == tenant_id:
+			return
+		self.targets[key] = tenant_id
+		self.targets_col.update_one({'_id': key}, {'$set': {'tenant_id': tenant_id}}, upsert=True)
+		for func in self.listeners:
+			try:
+				func(tenant_id)
+			except Exception as e:
+				print(f"Error in tenant listener {getattr(func, '__name__', func)}: {e}")
+
+	def resolve(self, platform, target):
+		key = f"{platform}:{target}"
+		tenant_id = self.targets.get(key)
+		if tenant_id is None:
+			doc = self.targets_col.find_one({'_id': key}, {'tenant_id': 1})
+			tenant_id = doc['tenant_id'] if doc else DEFAULT_TENANT
+			if doc:
+				self.targets[key] = tenant_id
+		return tenant_id
+
+	def max_tasks(self, tenant_id):
+		doc = self.col.find_one({'_id': tenant_id}, {'max_tasks': 1})
+		return (doc or {}).get('max_tasks', TENANT_MAX_TASKS)
+
+	def reserve_task(self, tenant_id):
+		"""Count one more task for the tenant in one round trip; raises once it is at its limit."""
+		# Matches only below the tenant's own max_tasks (or the default); a new tenant is inserted with a count of 1
+		below_limit = {'_id': tenant_id, '$expr': {'$lt': [{'$ifNull': ['$task_count', 0]}, {'$ifNull': ['$max_tasks', TENANT_MAX_TASKS]}]}}
+		for attempt in range(2):
+			try:
+				self.col.find_one_and_update(below_limit, {'$inc': {'task_count': 1}}, projection={'_id': 1}, upsert=True)
+				return
+			except DuplicateKeyError:
+				# The tenant exists but did not match (at its limit), or a concurrent first task inserted it: retry once
+				pass
+		raise Exception(f"Task limit reached for this organization ({self.max_tasks(tenant_id)} tasks)")
+
+	def transfer_tasks(self, from_tenant, to_tenant, count):
+		"""Move count tasks from one tenant's count to another's (no limit check)."""
+		if count:
+			self.release_task(from_tenant, count)
+			self.col.update_one({'_id': to_tenant}, {'$inc': {'task_count': count}}, upsert=True)
+
+	def release_task(self, tenant_id, count=1):
+		if count:
+			self.col.update_one({'_id': tenant_id, 'task_count': {'$gte': count}}, {'$inc': {'task_count': -count}})
+
+	def recount(self, tasks_col):
+		"""Rebuild every tenant's task count from the tasks themselves."""
+		for row in tasks_col.aggregate([{'$group': {'_id': '$tenant_id', 'count': {'$sum': 1}}}]):
+			self.col.update_one({'_id': row['_id']}, {'$set': {'task_count': row['count']}}, upsert=True)
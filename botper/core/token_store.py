@@ -0,0 +1,52 @@
+
+import time
+from .database import MongoDB
+
+# Refresh a user's access token this many seconds before it expires
+TOKEN_REFRESH_MARGIN = 300
+
+class TokenStore:
+	"""Users' OAuth tokens persisted in `oauth_tokens`, keyed by provider and user id."""
+
+	def __init__(self, provider="webex"):
+		self.provider = provider
+		self.col = MongoDB().db['oauth_tokens']
+		self.col.create_index([('provider', 1), ('user_id', 1)], unique=True)
+		self.col.create_index([('provider', 1), ('email', 1)])
+
+	def save(self, user_id, token_data, user_info=None):
+		fields = {
+			'provider': self.provider,
+			'user_id': user_id,
+			'access_token': token_data['access_token'],
+			'expires_at': time.time() + int(token_data.get('expires_in') or 0)
+		}
+		if token_data.get('refresh_token'):
+			fields['refresh_token'] = token_data['refresh_token']
+		if user_info is not None:
+			email = (user_info.get('emails') or [None])[0]
+			fields['email'] = email.lower() if email else None
+			fields['display_name'] = user_info.get('displayName')
+			fields['org_id'] = user_info.get('orgId')
+		self.col.update_one({'provider': self.provider, 'user_id': user_id}, {'$set': fields}, upsert=True)
+
+	def get(self, user_id):
+		return self.col.find_one({'provider': self.provider, 'user_id': user_id})
+
+	def find_by_email(self, email):
+		return self.col.find_one({'provider': self.provider, 'email': (email or '').lower()})
+
+	def access_token(self, doc, refresh):
+		"""Current access token for a stored user, refreshed first via refresh(refresh_token) if expiring."""
+		if doc.get('expires_at', 0) - TOKEN_REFRESH_MARGIN > time.time() or not doc.get('refresh_token'):
+			return doc['access_token']
+		token_data = refresh(doc['refresh_token'])
+		self.save(doc['user_id'], token_data)
+		doc.update(access_token=token_data['access_token'], expires_at=time.time() + int(token_data.get('expires_in') or 0))
+		return doc['access_token']
+
+	def all(self):
+		return list(self.col.find({'provider': self.provider}))
+
+	def set_watermark(self, user_id, name, value):
+		self.col.update_one({'provider': self.provider, 'user_id': user_id}, {'$set': {f'watermarks.{name}': value}})
@@ -0,0 +1,76 @@
+
+import queue
+import threading
+import time
+
+class WorkerPool:
+	"""Fixed set of background threads shared by every platform bot."""
+
+	def __init__(self, size=4, max_queue=1000, name="botper-worker"):
+		self.size = size
+		self.max_queue = max_queue
+		self.name = name
+		self.jobs = queue.Queue(maxsize=max_queue)
+		self.threads = []
+		self.closed = False
+
+	def start(self):
+		if self.threads or self.closed:
+			return
+		for i in range(self.size):
+			thread = threading.Thread(target=self._run, name=f"{self.name}-{i}", daemon=True)
+			thread.start()
+			self.threads.append(thread)
+
+	def submit(self, func, *args, **kwargs):
+		"""Queue a job; returns False when the queue is full or the pool is stopped."""
+		if self.closed:
+			print(f"WARNING: {self.name} is stopped, dropping job {getattr(func, '__name__', func)}")
+			return False
+		self.start()
+		try:
+			self.jobs.put_nowait((func, args, kwargs))
+			return True
+		except queue.Full:
+			print(f"WARNING: {self.name} queue full, dropping job {getattr(func, '__name__', func)}")
+			return False
+
+	def stats(self):
+		queued = self.jobs.qsize()
+		return {
+			'threads': len(self.threads),
+			'queued': queued,
+			'max_queue': self.max_queue,
+			'saturation': round(queued / self.max_queue, 3) if self.max_queue else 0.0
+		}
+
+	def drain(self, timeout):
+		"""Wait up to timeout seconds for queued and running jobs; returns jobs left."""
+		deadline = time.monotonic() + timeout
+		while self.jobs.unfinished_tasks and time.monotonic() < deadline:
+			time.sleep(0.05)
+		return self.jobs.unfinished_tasks
+
+	def stop(self):
+		"""Ask idle worker threads to exit once the queue is empty."""
+		self.closed = True
+		for thread in self.threads:
+			try:
+				self.jobs.put_nowait(None)
+			except queue.Full:
+				break
+		self.threads = []
+
+	def _run(self):
+		while True:
+			job = self.jobs.get()
+			if job is None:
+				self.jobs.task_done()
+				return
+			func, args, kwargs = job
+			try:
+				func(*args, **kwargs)
+			except Exception as e:
+				print(f"Error in background job {getattr(func, '__name__', func)}: {e}")
+			finally:
+				self.jobs.task_done()
@@ -1,19 +1,35 @@
 
 import os
 import sys
+import signal
 import socket
 import subprocess
 import time
 from pathlib import Path
-from dotenv import load_dotenv
+
+_launch_started = time.perf_counter()
 
 # Add current directory to path for imports
 current_dir = Path(__file__).parent
 sys.path.insert(0, str(current_dir))
 
-# Load .env from project root
-env_path = current_dir.parent / '.env'
-load_dotenv(dotenv_path=env_path)
+# Load .env from project root (once for the whole process)
+from core.config import load_config
+env_path = load_config()
+
+IS_WINDOWS = os.name == 'nt'
+
+def elapsed_ms(since):
+    return (time.perf_counter() - since) * 1000
+
+def wait_until(condition, timeout, interval=0.05):
+    """Poll condition() until it returns a truthy value or timeout seconds pass"""
+    deadline = time.monotonic() + timeout
+    while True:
+        result = condition()
+        if result or time.monotonic() >= deadline:
+            return result
+        time.sleep(interval)
 
 # Smart startup functionality
 def find_available_port(start_port=8001, max_attempts=10):
@@ -27,35 +43,77 @@ def find_available_port(start_port=8001, max_attempts=10):
             continue
     return None
 
-def kill_processes_on_port(port):
-    """Kill any processes using the specified port (Windows)"""
+def _listening_pids_linux(port):
+    """Find PIDs listening on port by reading /proc (no netstat/lsof needed)"""
+    inodes = set()
+    for table in ('/proc/net/tcp', '/proc/net/tcp6'):
+        try:
+            with open(table) as f:
+                next(f)
+                for line in f:
+                    parts = line.split()
+                    local_port = int(parts[1].rsplit(':', 1)[1], 16)
+                    if local_port == port and parts[3] == '0A':  # 0A = LISTEN
+                        inodes.add(parts[9])
+        except (OSError, StopIteration):
+            continue
+    if not inodes:
+        return []
+    targets = {f'socket:[{inode}]' for inode in inodes}
+    pids = []
+    for pid in os.listdir('/proc'):
+        if not pid.isdigit() or int(pid) == os.getpid():
+            continue
+        fd_dir = f'/proc/{pid}/fd'
+        try:
+            for fd in os.listdir(fd_dir):
+                if os.readlink(f'{fd_dir}/{fd}') in targets:
+                    pids.append(int(pid))
+                    break
+        except OSError:
+            continue
+    return pids
+
+def _listening_pids_windows(port):
+    """Find PIDs listening on port using netstat"""
+    result = subprocess.run(['netstat', '-ano'], capture_output=True, text=True)
+    pids = []
+    for line in result.stdout.split('\n'):
+        if f':{port}' in line and 'LISTENING' in line:
+            parts = line.strip().split()
+            if len(parts) >= 5 and parts[-1].isdigit():
+                pids.append(int(parts[-1]))
+    return pids
+
+def kill_processes_on_port(port, timeout=5):
+    """Stop any processes listening on the specified port and wait until it is free"""
     try:
-        # Use netstat to find processes using the port
-        result = subprocess.run(['netstat', '-ano'], capture_output=True, text=True)
-        lines = result.stdout.split('\n')
-        
-        pids = []
-        for line in lines:
-            if f':{port}' in line and 'LISTENING' in line:
-                parts = line.strip().split()
-                if len(parts) >= 5:
-                    pid = parts[-1]
-                    if pid.isdigit():
-                        pids.append(pid)
+        pids = _listening_pids_windows(port) if IS_WINDOWS else _listening_pids_linux(port)
         
         killed = 0
         for pid in pids:
             try:
-                subprocess.run(['taskkill', '/F', '/PID', pid], capture_output=True)
+                if IS_WINDOWS:
+                    subprocess.run(['taskkill', '/F', '/PID', str(pid)], capture_output=True)
+                else:
+                    os.kill(pid, signal.SIGTERM)
                 print(f"Killed process PID {pid} using port {port}")
                 killed += 1
             except Exception:
                 pass
         
-        if killed > 0:
-            time.sleep(2)  # Give processes time to clean up
-            return True
-        return False
+        if killed == 0:
+            return False
+        
+        # Poll until the port is released instead of sleeping a fixed interval
+        if not wait_until(lambda: check_port_available(port), timeout) and not IS_WINDOWS:
+            for pid in pids:
+                try:
+                    os.kill(pid, signal.SIGKILL)
+                except OSError:
+                    pass
+            wait_until(lambda: check_port_available(port), 1)
+        return True
         
     except Exception:
         return False
@@ -69,33 +127,66 @@ def check_port_available(port):
     except OSError:
         return False
 
-def start_ngrok_if_available(port):
+def find_ngrok():
+    """Locate the ngrok binary in the project root or on PATH"""
+    import shutil
+    name = 'ngrok.exe' if IS_WINDOWS else 'ngrok'
+    local_path = current_dir.parent / name
+    if local_path.exists():
+        return local_path
+    found = shutil.which('ngrok')
+    return Path(found) if found else None
+
+def get_ngrok_public_url():
+    """Return the public URL of the local ngrok agent, or None if it is not up yet"""
+    import json
+    from urllib.request import urlopen
+    try:
+        with urlopen('http://127.0.0.1:4040/api/tunnels', timeout=0.5) as response:
+            tunnels = json.load(response).get('tunnels', [])
+        for tunnel in tunnels:
+            if tunnel.get('public_url', '').startswith('https://'):
+                return tunnel['public_url']
+        return tunnels[0]['public_url'] if tunnels else None
+    except Exception:
+        return None
+
+def start_ngrok_if_available(port, timeout=10):
     """Start ngrok tunnel if available"""
-    ngrok_path = current_dir.parent / 'ngrok.exe'
+    ngrok_path = find_ngrok()
     
-    if not ngrok_path.exists():
-        print(f"WARNING: ngrok.exe not found at {ngrok_path}")
+    if ngrok_path is None:
+        print(f"WARNING: ngrok not found in {current_dir.parent} or on PATH")
         print("Download from: https://ngrok.com/download")
-        print("Place ngrok.exe in the project root directory")
+        print("Place ngrok in the project root directory")
         print(f"\nBot is running on: http://localhost:{port}")
         print("You can manually start ngrok with: ngrok http " + str(port))
         return None
     
     try:
         print(f"Starting ngrok tunnel on port {port}...")
+        started = time.perf_counter()
         
         ngrok_process = subprocess.Popen([
             str(ngrok_path), 
             'http', 
             str(port)
-        ], stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+        ], stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
         
-        time.sleep(3)  # Give ngrok time to start
+        # Poll the ngrok agent API until the tunnel is up or the process exits
+        public_url = wait_until(
+            lambda: get_ngrok_public_url() or ngrok_process.poll() is not None,
+            timeout,
+            interval=0.1
+        )
         
         if ngrok_process.poll() is None:
-            print("OK: ngrok tunnel started!")
+            print(f"OK: ngrok tunnel started in {elapsed_ms(started):.0f} ms!")
             print(f"Check ngrok dashboard: http://127.0.0.1:4040")
-            print(f"Webhook URL format: https://your-ngrok-url.ngrok.io/webex/webhook")
+            if isinstance(public_url, str):
+                print(f"Webhook URL: {public_url}/webex/webhook")
+            else:
+                print(f"Webhook URL format: https://your-ngrok-url.ngrok.io/webex/webhook")
             return ngrok_process
         else:
             # Get error output
@@ -131,8 +222,14 @@ def is_teams_ready():
                 bot_password and bot_password != 'your_teams_bot_app_password_here')
 
 def is_zoom_ready():
-    # For now, return False since Zoom requires more setup
-    return False
+    return all(os.getenv(name) for name in ('ZOOM_CLIENT_ID', 'ZOOM_CLIENT_SECRET', 'ZOOM_BOT_JID', 'ZOOM_SECRET_TOKEN'))
+
+# name -> (readiness check, module, class); SDKs are imported only for ready platforms
+PLATFORMS = {
+    'Webex': (is_webex_ready, 'platforms.webex_bot', 'WebexBot'),
+    'Teams': (is_teams_ready, 'platforms.teams_bot', 'TeamsBot'),
+    'Zoom': (is_zoom_ready, 'platforms.zoom_bot', 'ZoomBot'),
+}
 
 def start_bot_with_smart_port():
     """Start bot with intelligent port management"""
@@ -148,50 +245,41 @@ def start_bot_with_smart_port():
     print("OK: Configuration loaded")
     
     # Check platforms
-    webex_ready = is_webex_ready()
-    teams_ready = is_teams_ready()
-    zoom_ready = is_zoom_ready()
+    ready = {name: check() for name, (check, module, cls) in PLATFORMS.items()}
     
     print(f"\nPlatform Status:")
-    print(f"  Webex: {'READY' if webex_ready else 'NOT CONFIGURED'}")
-    print(f"  Teams: {'READY' if teams_ready else 'NOT CONFIGURED'}")
-    print(f"  Zoom:  {'READY' if zoom_ready else 'NOT CONFIGURED'}")
-    
-    # Initialize bots
-    bots = []
-    if webex_ready:
-        try:
-            from platforms.webex_bot import WebexBot
-            bot = WebexBot()
-            bots.append(('Webex', bot))
-            print("OK: Webex bot initialized")
-        except Exception as e:
-            print(f"ERROR: Error initializing Webex bot: {e}")
+    for name, is_ready in ready.items():
+        print(f"  {name + ':':<6} {'READY' if is_ready else 'NOT CONFIGURED'}")
     
-    if teams_ready:
-        try:
-            from platforms.teams_bot import TeamsBot
-            bot = TeamsBot()
-            bots.append(('Teams', bot))
-            print("OK: Teams bot initialized")
-        except Exception as e:
-            print(f"ERROR: Error initializing Teams bot: {e}")
-    
-    if zoom_ready:
+    # Initialize bots on one shared ASGI app (one port, shared Mongo pool and workers)
+    import importlib
+    try:
+        started = time.perf_counter()
+        from core.server import BotServer
+        server = BotServer()
+        print(f"OK: Shared server initialized ({elapsed_ms(started):.0f} ms)")
+    except Exception as e:
+        print(f"ERROR: Error initializing shared server: {e}")
+        return 1
+    bots = server.bots
+    for name, (check, module_name, class_name) in PLATFORMS.items():
+        if not ready[name]:
+            continue
         try:
-            from platforms.zoom_bot import ZoomBot
-            bot = ZoomBot()
-            bots.append(('Zoom', bot))
-            print("OK: Zoom bot initialized")
+            started = time.perf_counter()
+            bot_class = getattr(importlib.import_module(module_name), class_name)
+            import_ms = elapsed_ms(started)
+            server.add_bot(name, bot_class)
+            print(f"OK: {name} bot initialized (import {import_ms:.0f} ms, total {elapsed_ms(started):.0f} ms)")
         except Exception as e:
-            print(f"ERROR: Error initializing Zoom bot: {e}")
+            print(f"ERROR: Error initializing {name} bot: {e}")
 
     if not bots:
         print("\nERROR: No platform bots are ready!")
         print("\nTo configure:")
         print("  - Webex: Set WEBEX_BOT_TOKEN in .env")
         print("  - Teams: Set TEAMS_BOT_ID and TEAMS_BOT_PASSWORD in .env")
-        print("  - Zoom: Configure Zoom credentials")
+        print("  - Zoom: Set ZOOM_CLIENT_ID, ZOOM_CLIENT_SECRET, ZOOM_BOT_JID and ZOOM_SECRET_TOKEN in .env")
         return 1
 
     # Smart port management
@@ -204,7 +292,6 @@ def start_bot_with_smart_port():
         print("Attempting to free the port...")
         
         if kill_processes_on_port(preferred_port):
-            time.sleep(2)
             if check_port_available(preferred_port):
                 print(f"OK: Port {preferred_port} is now available")
                 port = preferred_port
@@ -229,10 +316,11 @@ def start_bot_with_smart_port():
     if '--no-ngrok' not in sys.argv:
         ngrok_process = start_ngrok_if_available(port)
     
-    # Start bot
-    name, bot = bots[0]  # Start first available bot
-    print(f"\nStarting {name} bot...")
-    print(f"Webhook endpoint: http://localhost:{port}/{name.lower()}/webhook")
+    # Start all bots in one process
+    names = ', '.join(name for name, bot in bots)
+    print(f"\nStarting {names} bot(s)...")
+    for name, bot in bots:
+        print(f"Webhook endpoint: http://localhost:{port}/{name.lower()}/webhook")
     
     if ngrok_process:
         print("\nComplete setup ready!")
@@ -247,11 +335,11 @@ def start_bot_with_smart_port():
     
     print(f"\nPress Ctrl+C to stop")
     
-    try:
-        # Start the bot
-        bot.start(port=port)
-    except KeyboardInterrupt:
-        print(f"\nStopping {name} bot...")
+    @server.app.on_event("startup")
+    async def report_startup_time():
+        print(f"OK: Serving webhooks {elapsed_ms(_launch_started):.0f} ms after launch")
+    
+    def stop_ngrok():
         if ngrok_process:
             try:
                 ngrok_process.terminate()
@@ -260,6 +348,16 @@ def start_bot_with_smart_port():
             except:
                 ngrok_process.kill()
                 print("OK: ngrok force stopped")
+    
+    try:
+        # Start the shared server; SIGINT/SIGTERM trigger a graceful drain inside
+        server.start(port=port)
+        print(f"\nStopped {names} bot(s)")
+        stop_ngrok()
+        print("OK: Shutdown complete")
+    except KeyboardInterrupt:
+        print(f"\nStopping {names} bot(s)...")
+        stop_ngrok()
         print("OK: Shutdown complete")
     except Exception as e:
         print(f"ERROR: {e}")
@@ -277,7 +375,7 @@ def main():
             print("Usage: python main.py [options]")
             print("\nOptions:")
             print("  --no-ngrok    Start bot without ngrok tunnel")
-            print("  --port PORT   Use specific port (default: 8001)")
+            print("  --port PORT   Use specific port (default: 8000)")
             print("  -h, --help    Show this help")
             return 0
         elif sys.argv[1] == '--port' and len(sys.argv) > 2:
@@ -286,4 +384,4 @@ def main():
     return start_bot_with_smart_port()
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
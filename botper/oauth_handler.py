@@ -4,11 +4,11 @@ OAuth handler for Webex Integration
 This handles OAuth flow to get user tokens for creating meetings
 """
 import os
-import requests
 from urllib.parse import urlencode
-from dotenv import load_dotenv
+from core.config import load_config
+from utils.http import shared_session
 
-load_dotenv()
+load_config()
 
 class WebexOAuthHandler:
     def __init__(self):
@@ -16,6 +16,7 @@ class WebexOAuthHandler:
         self.client_secret = os.getenv("WEBEX_CLIENT_SECRET")
         self.redirect_uri = os.getenv("WEBEX_REDIRECT_URI", "http://localhost:8000/auth/webex/callback")
         self.base_url = "https://webexapis.com/v1"
+        self.session = shared_session()  # Pooled, with deadlines and a circuit breaker per host
         
         if not self.client_id or not self.client_secret:
             print("Warning: WEBEX_CLIENT_ID and WEBEX_CLIENT_SECRET not found in environment")
@@ -53,7 +54,7 @@ class WebexOAuthHandler:
             'redirect_uri': self.redirect_uri
         }
         
-        response = requests.post(token_url, data=data)
+        response = self.session.post(token_url, data=data)
         
         if response.status_code == 200:
             token_data = response.json()
@@ -80,7 +81,7 @@ class WebexOAuthHandler:
             'refresh_token': refresh_token
         }
         
-        response = requests.post(token_url, data=data)
+        response = self.session.post(token_url, data=data)
         
         if response.status_code == 200:
             token_data = response.json()
@@ -100,7 +101,7 @@ class WebexOAuthHandler:
             'Content-Type': 'application/json'
         }
         
-        response = requests.get(f"{self.base_url}/people/me", headers=headers)
+        response = self.session.get(f"{self.base_url}/people/me", headers=headers)
         
         if response.status_code == 200:
             return response.json()
@@ -114,9 +115,30 @@ class WebexOAuthHandler:
             'Content-Type': 'application/json'
         }
         
-        response = requests.post(f"{self.base_url}/meetings", headers=headers, json=meeting_details)
+        response = self.session.post(f"{self.base_url}/meetings", headers=headers, json=meeting_details)
         
         if response.status_code == 200:
             return response.json()
         else:
-            raise Exception(f"Failed to create meeting: {response.status_code} - {response.text}")
\ No newline at end of file
+            raise Exception(f"Failed to create meeting: {response.status_code} - {response.text}")
+
+    def list_meetings(self, access_token, params=None):
+        """List the user's meetings, following Webex pagination links"""
+        headers = {
+            'Authorization': f'Bearer {access_token}',
+            'Content-Type': 'application/json'
+        }
+        
+        meetings = []
+        url = f"{self.base_url}/meetings"
+        while url:
+            response = self.session.get(url, headers=headers, params=params)
+            if response.status_code != 200:
+                error = Exception(f"Failed to list meetings: {response.status_code} - {response.text}")
+                error.status_code = response.status_code
+                raise error
+            meetings.extend(response.json().get('items', []))
+            # The next-page URL already carries the query string
+            url = response.links.get('next', {}).get('url')
+            params = None
+        return meetings
@@ -1,72 +1,204 @@
 
 import os
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from bson.errors import InvalidId
 from fastapi import FastAPI, Request
-from ..core.base_bot import BaseBot
-from ..core.tasks import TaskManager
-from ..core.meetings import MeetingManager
-from ..utils.helpers import format_task_card
-from dotenv import load_dotenv
+from fastapi.concurrency import run_in_threadpool
+from core.base_bot import BaseBot
+from core.tasks import TaskManager
+from core.meetings import MeetingManager
+from core.workers import WorkerPool
+from core.outbox import Outbox
+from core.commands import CommandRouter, CommandContext, register_task_commands
+from utils.helpers import format_task_card, format_search_card
+from utils.json_codec import FastJSONResponse
+from utils.cards import GREETING_CARD, TASK_FORM_CARD, MODIFY_TASK_CARD
+from platforms.teams_connector import TeamsConnector
+from core.config import load_config
 
-load_dotenv()
+load_config()
 
 TEAMS_BOT_ID = os.getenv("TEAMS_BOT_ID")
 TEAMS_BOT_PASSWORD = os.getenv("TEAMS_BOT_PASSWORD")
 
+# Same greeting card as Webex, minus meetings (Teams meeting scheduling is not built yet)
+TEAMS_GREETING_CARD = GREETING_CARD.bind(
+	subtitle="I will help you set up your tasks and schedule your meetings!",
+	facts=[
+		{"title": "📋 Create Task:", "value": "task <task description>"},
+		{"title": "📝 List Tasks:", "value": "list"},
+		{"title": "🔍 Find Tasks:", "value": "find <words>"},
+		{"title": "🗑️ Delete Task:", "value": "delete <task id>"},
+		{"title": "📞 Schedule Meeting:", "value": "schedule meeting"}
+	],
+	actions=[
+		{"type": "Action.Submit", "title": "📋 Create Task", "data": {"action": "create_task_prompt"}},
+		{"type": "Action.Submit", "title": "📝 List Tasks", "data": {"action": "list_tasks"}}
+	]
+)
+
 class TeamsBot(BaseBot):
-	def __init__(self):
-		self.task_manager = TaskManager()
-		self.meeting_manager = MeetingManager()
-		self.app = FastAPI()
+	platform = "teams"
+
+	def __init__(self, app=None, task_manager=None, meeting_manager=None, workers=None, outbox=None, live_updates=None):
+		self.task_manager = task_manager or TaskManager()
+		self.meeting_manager = meeting_manager or MeetingManager()
+		self.workers = workers or WorkerPool()
+		self.outbox = outbox or Outbox()
+		self.connector = TeamsConnector(TEAMS_BOT_ID, TEAMS_BOT_PASSWORD)
+		self.outbox.register_sender('teams', self.deliver_message, update=self.connector.update, delete=self.connector.delete)
+		self.live_updates = live_updates
+		self.app = app or FastAPI(default_response_class=FastJSONResponse)
+		self.commands = self.build_commands()
 		self.setup_routes()
 
+	def build_commands(self):
+		"""Chat commands plus the card actions our task, search and greeting cards submit."""
+		router = register_task_commands(CommandRouter(), self)
+		router.action('delete', lambda ctx, data: self.handle_task_command("delete", ctx.target, {"task_id": data.get('task_id')}))
+		router.action('toggle_complete', lambda ctx, data: self.handle_toggle_complete(ctx.target, data.get('task_id'), data.get('current_status', False)))
+		router.action('modify', self.action_modify)
+		router.action('update', lambda ctx, data: self.handle_update_task(ctx.target, data.get('task_id'), data.get('new_title', '').strip()))
+		router.action('cancel', lambda ctx, data: self.handle_task_command("list", ctx.target))
+		router.action('create_task_prompt', lambda ctx, data: self.send_message(ctx.target, "Please enter your task details:", card=TASK_FORM_CARD.render()))
+		router.action('create_task_submit', lambda ctx, data: self.handle_task_command("create", ctx.target, {"title": data.get('task_title', '').strip()}))
+		router.action('cancel_form', lambda ctx, data: self.send_message(ctx.target, "Action cancelled."))
+		router.action('list_tasks', lambda ctx, data: self.handle_task_command("list", ctx.target))
+		router.action('search', lambda ctx, data: self.handle_task_command("search", ctx.target, {"query": data.get('query', '').strip(), "page": int(data.get('page', 0))}))
+		return router
+
+	def handle_activity(self, authorization, data):
+		"""Verify and process one Bot Framework activity (runs in the threadpool)."""
+		# Only Bot Framework-signed activities may set where replies (and our app token) go
+		try:
+			self.connector.verify_request(authorization, data)
+		except Exception as e:
+			print(f"Rejected Teams activity: {e}")
+			return FastJSONResponse({"status": "unauthorized"}, status_code=401)
+		# Remember service URL / bot identity so replies can be sent later
+		self.connector.save_reference(data)
+		conversation = data.get('conversation', {})
+		self.task_manager.tenants.remember('teams', conversation.get('id'), conversation.get('tenantId') or data.get('channelData', {}).get('tenant', {}).get('id'))
+		text = data.get('text') or ''
+		conversation_id = data.get('conversation', {}).get('id', '')
+		ctx = CommandContext('teams', conversation_id, person_id=data.get('from', {}).get('id'), text=text)
+		# Action.Submit arrives as a message activity carrying the card's data in `value`
+		value = data.get('value')
+		if isinstance(value, dict) and value.get('action'):
+			if not self.commands.dispatch_action(ctx, value):
+				print(f"Unknown Teams card action: {value.get('action')}")
+		else:
+			self.commands.dispatch_text(ctx, text)
+		return {"status": "ok"}
+
 	def setup_routes(self):
 		@self.app.post("/teams/webhook")
 		async def webhook(request: Request):
 			data = await request.json()
-			# Simplified: parse incoming Teams message
-			text = data.get('text', '').strip().lower()
-			conversation_id = data.get('conversation', {}).get('id', '')
-			if text == "hello" or text == "hi":
-				self.send_greeting(conversation_id)
-			elif text.startswith("task"):
-				task_title = data.get('text', '')[5:].strip()
-				if task_title:
-					self.handle_task_command("create", conversation_id, {"title": task_title})
-			elif text == "list":
-				self.handle_task_command("list", conversation_id)
-			elif text.startswith("delete"):
-				task_id = data.get('text', '')[7:].strip()
-				self.handle_task_command("delete", conversation_id, {"task_id": task_id})
-			# Add more command handling as needed
-			return {"status": "ok"}
+			# Key fetches, Mongo and dispatch all block: keep them off the shared event loop
+			return await run_in_threadpool(self.handle_activity, request.headers.get('Authorization'), data)
 
 	def send_greeting(self, conversation_id):
 		greeting = "Hello This is Botper !  Check my menu ,I will help you set up your tasks and schedule your meetings !"
-		menu = "Commands:\n- task <task description>\n- list\n- delete <task id>\n- schedule meeting"
-		self.send_message(conversation_id, f"{greeting}\n{menu}")
+		menu = "Commands:\n- task <task description>\n- list\n- find <words>\n- delete <task id>\n- schedule meeting"
+		self.send_message(conversation_id, f"{greeting}\n{menu}", card=TEAMS_GREETING_CARD.render())
+
+	def memory_stats(self):
+		return {'conversation_references': len(self.connector.references)}
 
-	def start(self):
+	def start(self, port=8001):
+		self.current_port = port
 		import uvicorn
-		uvicorn.run(self.app, host="0.0.0.0", port=8001)
+		uvicorn.run(self.app, host="0.0.0.0", port=port)
 
-	def send_message(self, conversation_id, message, card=None):
-		# Placeholder: Integrate with Teams SDK to send message/card
-		pass
+	def send_message(self, conversation_id, message, card=None, replace_key=None):
+		"""Queue a message on the durable outbox; delivery and retries happen in the background."""
+		try:
+			self.outbox.enqueue('teams', conversation_id, message, card, replace_key=replace_key)
+		except Exception as e:
+			print(f"Error queueing Teams message: {e}")
+
+	def deliver_message(self, conversation_id, message, card=None):
+		"""Send a message through the Bot Framework connector now; raises so the outbox can retry."""
+		return self.connector.send(conversation_id, message, card=card)
 
 	def handle_task_command(self, command, conversation_id, data=None):
 		if command == "create":
+			if not data["title"]:
+				self.send_message(conversation_id, "Task title cannot be empty!")
+				return
 			task = {"title": data["title"], "completed": False}
-			self.task_manager.create_task(task)
+			try:
+				self.task_manager.create_task(task, tenant=self.tenant_for(conversation_id))
+			except Exception as e:
+				self.send_message(conversation_id, f"Could not create task: {e}")
+				return
 			self.send_message(conversation_id, f"Task created: {data['title']}")
-			self.handle_task_command("list", conversation_id)
+			self.refresh_task_list(conversation_id)
 		elif command == "list":
-			tasks = self.task_manager.list_tasks()
-			card = format_task_card(tasks, platform="teams")
-			self.send_message(conversation_id, "Here are your tasks:", card=card)
+			self.send_task_list(conversation_id)
+			if self.live_updates is not None:
+				self.live_updates.track_view(self.platform, conversation_id, self.tenant_for(conversation_id))
 		elif command == "delete":
-			self.task_manager.delete_task(data["task_id"])
+			try:
+				deleted = self.task_manager.delete_task(data["task_id"], tenant=self.tenant_for(conversation_id))
+			except (InvalidId, TypeError):
+				deleted = None
+			if deleted is None:
+				self.send_message(conversation_id, f"Task not found: {data['task_id']}")
+				return
 			self.send_message(conversation_id, f"Task deleted: {data['task_id']}")
-			self.handle_task_command("list", conversation_id)
+			self.refresh_task_list(conversation_id)
+		elif command == "search":
+			tasks, has_more = self.task_manager.search_tasks(data["query"], page=data.get("page", 0), tenant=self.tenant_for(conversation_id))
+			card = format_search_card(tasks, data["query"], page=data.get("page", 0), has_more=has_more, platform="teams")
+			self.send_message(conversation_id, f"Tasks matching '{data['query']}':", card=card)
+
+	def action_modify(self, ctx, data):
+		task_id = data.get('task_id')
+		try:
+			task = self.task_manager.get_task(task_id, {'title': 1}, tenant=self.tenant_for(ctx.target))
+		except Exception:
+			task = None
+		if task:
+			self.send_message(ctx.target, "Please modify your task:", card=MODIFY_TASK_CARD.render(title=task["title"], task_id=task_id))
+		else:
+			self.send_message(ctx.target, "Task not found!")
+
+	def handle_update_task(self, conversation_id, task_id, new_title):
+		if not new_title:
+			self.send_message(conversation_id, "Task title cannot be empty!")
+			return
+		try:
+			result = self.task_manager.update_task(task_id, {"title": new_title}, tenant=self.tenant_for(conversation_id))
+		except Exception as e:
+			self.send_message(conversation_id, f"Could not update task: {e}")
+			return
+		if result.modified_count > 0:
+			self.send_message(conversation_id, "Task updated.")
+			self.refresh_task_list(conversation_id)
+		else:
+			self.send_message(conversation_id, "Task not found or no changes made.")
+
+	def handle_toggle_complete(self, conversation_id, task_id, current_status):
+		try:
+			result = self.task_manager.update_task(task_id, {"completed": not current_status}, tenant=self.tenant_for(conversation_id))
+		except Exception as e:
+			self.send_message(conversation_id, f"Could not update task: {e}")
+			return
+		if result.modified_count > 0:
+			self.send_message(conversation_id, f"Task marked as {'reopened' if current_status else 'completed'}.")
+			self.refresh_task_list(conversation_id)
+		else:
+			self.send_message(conversation_id, "Task not found or no changes made.")
+
+	def send_task_list(self, conversation_id):
+		tasks = self.task_manager.list_task_records(tenant=self.tenant_for(conversation_id))
+		card = format_task_card(tasks, platform="teams")
+		self.send_message(conversation_id, "Here are your tasks:", card=card, replace_key="task_list")
 
 	def handle_meeting_command(self, command, conversation_id, data=None):
 		# Meeting scheduling logic (prompt for date, users, etc.)
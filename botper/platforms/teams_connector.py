@@ -0,0 +1,162 @@
+
+import os
+import threading
+import time
+from urllib.parse import urlsplit
+import jwt
+from core.database import MongoDB
+from utils.http import create_session
+from utils.cache import BoundedDict
+from utils.json_codec import loads
+from utils.cards import encode_with_card
+
+TOKEN_URL = "https://login.microsoftonline.com/botframework.com/oauth2/v2.0/token"
+TOKEN_SCOPE = "https://api.botframework.com/.default"
+# Refresh the app token this many seconds before Azure AD says it expires
+TOKEN_REFRESH_MARGIN = 300
+# Incoming activities carry a JWT signed with these keys (Bot Framework channel auth)
+OPENID_CONFIG_URL = "https://login.botframework.com/v1/.well-known/openidconfiguration"
+TOKEN_ISSUER = "https://api.botframework.com"
+# Clock skew tolerated when checking the JWT's exp/nbf
+TOKEN_LEEWAY = 300
+# Hosts replies (carrying our app token) may go to; an activity naming any other serviceUrl is rejected
+SERVICE_URL_HOSTS = tuple(os.getenv("TEAMS_SERVICE_URL_HOSTS", "smba.trafficmanager.net,.botframework.com").split(","))
+# Conversation references kept in memory; older ones are re-read from Mongo when needed
+CONVERSATION_CACHE_SIZE = int(os.getenv("BOTPER_CONVERSATION_CACHE_SIZE", "10000"))
+
+def allowed_service_url(url):
+	parts = urlsplit(url)
+	host = (parts.hostname or '').lower()
+	return parts.scheme == 'https' and any(host == allowed.lstrip('.') or (allowed.startswith('.') and host.endswith(allowed)) for allowed in SERVICE_URL_HOSTS)
+
+class TeamsConnector:
+	"""Sends activities through the Bot Framework connector REST API.
+
+	The Azure AD app token is cached until shortly before it expires, and
+	conversation references (service URL, bot and tenant ids) are kept in
+	memory and in the `teams_conversations` collection, keyed by conversation
+	id, so sending needs neither a token fetch nor a lookup round-trip.
+	"""
+
+	def __init__(self, app_id, app_password):
+		self.app_id = app_id
+		self.app_password = app_password
+		self.session = create_session()
+		self.token = None
+		self.token_expires_at = 0
+		self.token_lock = threading.Lock()
+		self.jwks_client = None
+		self.references = BoundedDict(CONVERSATION_CACHE_SIZE)
+		self.col = MongoDB().db['teams_conversations']
+
+	def get_token(self):
+		if self.token and time.time() < self.token_expires_at:
+			return self.token
+		with self.token_lock:
+			if self.token and time.time() < self.token_expires_at:
+				return self.token
+			response = self.session.post(TOKEN_URL, data={
+				'grant_type': 'client_credentials',
+				'client_id': self.app_id,
+				'client_secret': self.app_password,
+				'scope': TOKEN_SCOPE
+			})
+			if response.status_code != 200:
+				raise Exception(f"Teams token request failed: {response.status_code} - {response.text}")
+			token_data = response.json()
+			self.token = token_data['access_token']
+			self.token_expires_at = time.time() + int(token_data.get('expires_in', 3600)) - TOKEN_REFRESH_MARGIN
+			return self.token
+
+	def signing_keys(self):
+		if self.jwks_client is None:
+			response = self.session.get(OPENID_CONFIG_URL)
+			if response.status_code != 200:
+				raise Exception(f"Bot Framework OpenID config request failed: {response.status_code}")
+			# PyJWKClient caches the key set and refetches it for unknown key ids
+			self.jwks_client = jwt.PyJWKClient(response.json()['jwks_uri'])
+		return self.jwks_client
+
+	def verify_request(self, authorization, activity):
+		"""Check the Bot Framework JWT on an incoming activity; raises if it is missing or invalid."""
+		if not self.app_id:
+			raise Exception("TEAMS_BOT_ID not configured")
+		if not authorization or not authorization.startswith("Bearer "):
+			raise Exception("missing bearer token")
+		token = authorization[len("Bearer "):]
+		key = self.signing_keys().get_signing_key_from_jwt(token)
+		claims = jwt.decode(token, key.key, algorithms=["RS256"], audience=self.app_id, issuer=TOKEN_ISSUER, leeway=TOKEN_LEEWAY)
+		# The token is issued for one service URL; the activity must not point replies elsewhere
+		if claims.get('serviceurl', claims.get('serviceUrl')) not in (None, activity.get('serviceUrl')):
+			raise Exception("serviceUrl does not match the token")
+		if not allowed_service_url(activity.get('serviceUrl', '')):
+			raise Exception(f"serviceUrl host not allowed: {activity.get('serviceUrl')}")
+		return claims
+
+	def save_reference(self, activity):
+		"""Remember where to reply for the conversation an incoming activity came from."""
+		conversation = activity.get('conversation', {})
+		conversation_id = conversation.get('id')
+		if not conversation_id or not activity.get('serviceUrl'):
+			return
+		reference = {
+			'conversation_id': conversation_id,
+			'service_url': activity['serviceUrl'].rstrip('/'),
+			'bot': activity.get('recipient', {}),
+			'tenant_id': conversation.get('tenantId') or activity.get('channelData', {}).get('tenant', {}).get('id'),
+			'is_group': conversation.get('isGroup', False)
+		}
+		if self.references.get(conversation_id) == reference:
+			return
+		self.references[conversation_id] = reference
+		self.col.update_one({'conversation_id': conversation_id}, {'$set': reference}, upsert=True)
+
+	def get_reference(self, conversation_id):
+		reference = self.references.get(conversation_id)
+		if reference is None:
+			reference = self.col.find_one({'conversation_id': conversation_id}, {'_id': 0})
+			if reference is not None:
+				self.references[conversation_id] = reference
+		return reference
+
+	def build_activity(self, reference, conversation_id, text):
+		return {
+			'type': 'message',
+			'text': text,
+			'from': reference.get('bot') or {'id': self.app_id},
+			'conversation': {'id': conversation_id}
+		}
+
+	def request(self, method, conversation_id, path="", activity=None, card=None):
+		reference = self.get_reference(conversation_id)
+		if reference is None:
+			raise Exception(f"No conversation reference for Teams conversation {conversation_id}")
+		if not allowed_service_url(reference['service_url']):
+			# Saved before service URLs were checked: never send the app token there
+			error = Exception(f"Refusing to send to untrusted Teams service URL {reference['service_url']}")
+			error.status_code = 400
+			raise error
+		url = f"{reference['service_url']}/v3/conversations/{conversation_id}/activities{path}"
+		headers = {'Authorization': f"Bearer {self.get_token()}", 'Content-Type': 'application/json'}
+		response = self.session.request(method, url, data=encode_with_card(activity, card) if activity is not None else None, headers=headers)
+		if response.status_code == 401:
+			# Token revoked or rotated early: drop it so the retry fetches a new one
+			self.token = None
+		if response.status_code not in (200, 201, 202, 204):
+			error = Exception(f"Teams {method} failed: {response.status_code} - {response.text}")
+			if response.status_code != 401:
+				error.status_code = response.status_code
+			raise error
+		return loads(response.content).get('id') if response.content else None
+
+	def send(self, conversation_id, text, card=None):
+		activity = self.build_activity(self.get_reference(conversation_id) or {}, conversation_id, text)
+		return self.request('POST', conversation_id, activity=activity, card=card)
+
+	def update(self, conversation_id, activity_id, text, card=None):
+		activity = self.build_activity(self.get_reference(conversation_id) or {}, conversation_id, text)
+		activity['id'] = activity_id
+		return self.request('PUT', conversation_id, f"/{activity_id}", activity=activity, card=card)
+
+	def delete(self, conversation_id, activity_id):
+		return self.request('DELETE', conversation_id, f"/{activity_id}")
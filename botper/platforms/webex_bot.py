@@ -1,397 +1,678 @@
 import os
 import sys
+import hmac
+import threading
+import hashlib
 from pathlib import Path
 sys.path.append(str(Path(__file__).parent.parent))
 
 from webexteamssdk import WebexTeamsAPI
+from bson.errors import InvalidId
 from fastapi import FastAPI, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import RedirectResponse, HTMLResponse, FileResponse
 from fastapi.staticfiles import StaticFiles
 from core.base_bot import BaseBot
 from core.tasks import TaskManager
-from utils.helpers import format_task_card
+from core.tenants import DEFAULT_TENANT
+from core.meetings import MeetingManager, day_range, week_range
+from core.workers import WorkerPool
+from core.outbox import Outbox
+from core.commands import CommandRouter, CommandContext, register_task_commands
+from core.token_store import TokenStore
+from core.capture import WebhookRecorder, CAPTURE_DIR
+from platforms.webex_calendar import WebexCalendarSync
+from utils.helpers import format_task_card, format_search_card, format_meeting_card
+from utils.http import create_session
+from utils.cache import TTLCache, BoundedDict
+from utils.json_codec import FastJSONResponse, loads
+from utils.cards import GREETING_CARD, MEETING_OPTIONS_CARD, TASK_FORM_CARD, MODIFY_TASK_CARD, MEETING_CREATED_CARD, MEETING_NOTIFICATION_CARD, MEETING_REMINDER_CARD, encode_with_card
 from oauth_handler import WebexOAuthHandler
-from dotenv import load_dotenv
+from core.config import load_config
 
-load_dotenv()
+load_config()
 
 WEBEX_BOT_TOKEN = os.getenv("WEBEX_BOT_TOKEN")
+WEBEX_MESSAGES_URL = "https://webexapis.com/v1/messages"
+# Secret the webhooks were registered with (setup_webhook.py); unset accepts unsigned events
+WEBEX_WEBHOOK_SECRET = os.getenv("WEBEX_WEBHOOK_SECRET")
 # Configuration for meeting notifications (set to False to disable)
 ENABLE_MEETING_NOTIFICATIONS = os.getenv("ENABLE_MEETING_NOTIFICATIONS", "true").lower() == "true"
+# People and rooms looked up from the API are cached; memberships/rooms events invalidate them
+WEBEX_ENTITY_CACHE_SIZE = int(os.getenv("WEBEX_ENTITY_CACHE_SIZE", "1000"))
+WEBEX_ENTITY_CACHE_TTL = float(os.getenv("WEBEX_ENTITY_CACHE_TTL", "300"))
+# Webhook event ids remembered to drop redeliveries
+WEBEX_DEDUP_SIZE = int(os.getenv("WEBEX_DEDUP_SIZE", "100"))
+# Meeting requests waiting for their meetings webhook (also expire after an hour)
+WEBEX_PENDING_MEETINGS_MAX = int(os.getenv("WEBEX_PENDING_MEETINGS_MAX", "500"))
+# Room cache key for the list of "botper" spaces that get notifications
+BOTPER_ROOMS_KEY = "__botper_rooms__"
+
+WEBEX_GREETING_CARD = GREETING_CARD.bind(
+	subtitle="I am here to help you creating tasks, webex meetings and have them listed!",
+	facts=[
+		{"title": "📋 Create Task:", "value": "Type 'task [description]'"},
+		{"title": "📝 List Tasks:", "value": "Type 'list'"},
+		{"title": "🔍 Find Tasks:", "value": "Type 'find [words]'"},
+		{"title": "📞 Schedule Meeting:", "value": "Type 'meetings'"},
+		{"title": "📅 Your Meetings:", "value": "Type 'meetings today' or 'this week'"},
+		{"title": "✅ Complete Task", "value": ""},
+		{"title": "🗑️ Delete Task", "value": ""},
+		{"title": "✏️ Edit Task", "value": ""}
+	],
+	actions=[
+		{"type": "Action.Submit", "title": "📋 Create Task", "data": {"action": "create_task_prompt"}},
+		{"type": "Action.Submit", "title": "📝 List Tasks", "data": {"action": "list_tasks"}},
+		{"type": "Action.OpenUrl", "title": "📞 Schedule Meeting", "url": "http://localhost:8000/auth/webex"}
+	]
+)
 
 class WebexBot(BaseBot):
-	def __init__(self):
+	platform = "webex"
+
+	def __init__(self, app=None, task_manager=None, meeting_manager=None, workers=None, outbox=None, live_updates=None):
 		try:
 			self.api = WebexTeamsAPI(access_token=WEBEX_BOT_TOKEN)
 			self.access_token = WEBEX_BOT_TOKEN
-			self.task_manager = TaskManager()
-			self.app = FastAPI()
+			self.session = create_session()  # Keep-alive connection for outbound messages
+			self.people_cache = TTLCache(WEBEX_ENTITY_CACHE_SIZE, WEBEX_ENTITY_CACHE_TTL)
+			self.room_cache = TTLCache(WEBEX_ENTITY_CACHE_SIZE, WEBEX_ENTITY_CACHE_TTL)
+			self.recorder = WebhookRecorder('webex') if CAPTURE_DIR else None  # Opt-in traffic capture for replay
+			self.task_manager = task_manager or TaskManager()
+			self.meeting_manager = meeting_manager or MeetingManager()
+			self.workers = workers or WorkerPool()
+			self.outbox = outbox or Outbox()
+			self.outbox.register_sender('webex', self.deliver_message, delete=self.delete_message)
+			self.live_updates = live_updates
+			self.app = app or FastAPI(default_response_class=FastJSONResponse)
 			self.oauth_handler = WebexOAuthHandler()
-			self.user_tokens = {}  # Store user OAuth tokens (in production, use a database)
-			self.processed_messages = set()  # Track processed message IDs to avoid duplicates
-			self.pending_meeting_tasks = {}  # Track meeting title for linking task
-			self.processed_events = set()  # Track processed calendar events
+			self.token_store = TokenStore('webex')  # Users' OAuth tokens, persisted in Mongo
+			self.calendar_sync = WebexCalendarSync(self.oauth_handler, self.token_store, self.task_manager, self.meeting_manager)
+			self.processed_messages = BoundedDict(WEBEX_DEDUP_SIZE)  # Recently processed event IDs, to skip duplicates
+			self.dedup_lock = threading.Lock()
+			self.pending_meeting_tasks = BoundedDict(WEBEX_PENDING_MEETINGS_MAX)  # Track meeting title for linking task
 			self.enable_notifications = ENABLE_MEETING_NOTIFICATIONS  # Control meeting notifications
+			self.commands = self.build_commands()
 			self.setup_routes()
-			# Calendar monitoring disabled - bot token doesn't have meeting API access
 		except Exception as e:
 			print(f"Error in __init__: {e}")
 
-	def setup_routes(self):
-		@self.app.post("/webex/webhook")
-		async def webhook(request: Request):
-			data = await request.json()
-			
-			# Extract unique identifier for deduplication
-			event_id = data.get('data', {}).get('id', '')
+	def build_commands(self):
+		"""Build the chat command and card action tables once at startup."""
+		router = register_task_commands(CommandRouter(), self)
+		router.command("meetings", lambda ctx, args: self.show_meeting_creation_form(ctx.target, "Meeting options:"), exact=True)
+		router.command("meeting", self.command_meeting)
+		router.command("schedule meeting", self.command_meeting)
+		for text, period in (("meetings today", "today"), ("today", "today"), ("meetings this week", "week"), ("this week", "week")):
+			router.command(text, lambda ctx, args, period=period: self.handle_meeting_command(period, ctx.target, {"person_email": ctx.person_email}), exact=True)
+
+		router.action('delete', lambda ctx, data: self.handle_task_command("delete", ctx.target, {"task_id": data.get('task_id')}))
+		router.action('toggle_complete', lambda ctx, data: self.handle_toggle_complete(ctx.target, data.get('task_id'), data.get('current_status', False)))
+		router.action('modify', self.action_modify)
+		router.action('update', lambda ctx, data: self.handle_update_task(ctx.target, data.get('task_id'), data.get('new_title', '').strip()))
+		router.action('cancel', self.action_cancel)
+		# Greeting card actions
+		router.action('create_task_prompt', lambda ctx, data: self.show_task_creation_form(ctx.target))
+		router.action('list_tasks', lambda ctx, data: self.handle_task_command("list", ctx.target))
+		router.action('schedule_meeting_prompt', lambda ctx, data: self.show_meeting_creation_form(ctx.target))
+		router.action('create_task_submit', self.action_create_task_submit)
+		router.action('quick_meeting_submit', self.action_quick_meeting_submit)
+		router.action('cancel_form', lambda ctx, data: self.send_message(ctx.target, "Action cancelled."))
+		router.action('search', lambda ctx, data: self.handle_task_command("search", ctx.target, {"query": data.get('query', '').strip(), "page": int(data.get('page', 0))}))
+		return router
+
+	def command_meeting(self, ctx, meeting_title):
+		if meeting_title:
+			# Try to create meeting via OAuth first, then fallback to redirect
+			self.handle_meeting_request(ctx.target, ctx.person_id, ctx.person_email, meeting_title)
+
+	def action_modify(self, ctx, data):
+		task_id = data.get('task_id')
+		# Get current task details for the modify form
+		try:
+			current_task = self.task_manager.get_task(task_id, {'title': 1}, tenant=self.tenant_for(ctx.target))
+		except Exception:
+			current_task = None
+		if current_task:
+			self.handle_modify_task(ctx.target, task_id, current_task["title"])
+		else:
+			self.send_message(ctx.target, "ERROR: Task not found!")
+
+	def action_cancel(self, ctx, data):
+		self.send_message(ctx.target, "Modification cancelled.")
+		self.handle_task_command("list", ctx.target)
+
+	def action_create_task_submit(self, ctx, data):
+		task_title = data.get('task_title', '').strip()
+		if task_title:
+			self.handle_task_command("create", ctx.target, {"title": task_title})
+		else:
+			self.send_message(ctx.target, "ERROR: Task title cannot be empty!")
+
+	def action_quick_meeting_submit(self, ctx, data):
+		meeting_title = data.get('meeting_title', '').strip()
+		if not meeting_title:
+			self.send_message(ctx.target, "ERROR: Meeting title cannot be empty!")
+			return
+		try:
+			# Get person info for meeting creation
+			person = self.get_person(ctx.person_id)
+			person_email = person.emails[0] if person.emails else "user@company.com"
+			self.handle_meeting_request(ctx.target, ctx.person_id, person_email, meeting_title)
+		except Exception as meeting_error:
+			self.send_message(ctx.target, f"ERROR: Failed to create meeting: {meeting_error}")
+
+	def get_person(self, person_id):
+		return self.people_cache.get_or_load(person_id, lambda: self.api.people.get(person_id))
+
+	def get_bot_person(self):
+		"""The bot's own identity, checked on every incoming event."""
+		return self.people_cache.get_or_load("me", self.api.people.me)
+
+	def get_room(self, room_id):
+		return self.room_cache.get_or_load(room_id, lambda: self.api.rooms.get(room_id))
+
+	def botper_rooms(self):
+		"""Spaces with "botper" in the title (case insensitive) that the bot is a member of."""
+		return self.room_cache.get_or_load(BOTPER_ROOMS_KEY, lambda: [room for room in self.api.rooms.list() if room.title and "botper" in room.title.lower()])
+
+	def invalidate_entities(self, data):
+		"""Drop cached people/rooms that a memberships or rooms event says have changed."""
+		resource = data.get('resource')
+		event_data = data.get('data', {})
+		if resource == 'rooms':
+			self.room_cache.invalidate(event_data.get('id'))
+			self.room_cache.invalidate(BOTPER_ROOMS_KEY)
+		elif resource == 'memberships':
+			self.room_cache.invalidate(event_data.get('roomId'))
+			self.room_cache.invalidate(BOTPER_ROOMS_KEY)
+			self.people_cache.invalidate(event_data.get('personId'))
+
+	def learn_room_tenant(self, data):
+		"""Remember the org of the event's room: the org owning it, else the acting person's org.
+
+		The envelope's orgId is the org that registered the webhook (the
+		bot's), so it says nothing about the room.
+		"""
+		room_id = data.get('data', {}).get('roomId')
+		if not room_id:
+			return
+		tenants = self.task_manager.tenants
+		try:
+			org_id = getattr(self.get_room(room_id), 'ownerId', None)
+			if not org_id and tenants.resolve('webex', room_id) == DEFAULT_TENANT:
+				# Spaces without an owning org take the org of the first person seen acting in them
+				actor_id = data.get('actorId') or data.get('data', {}).get('personId')
+				if actor_id and actor_id != self.get_bot_person().id:
+					org_id = getattr(self.get_person(actor_id), 'orgId', None)
+			tenants.remember('webex', room_id, org_id)
+		except Exception as e:
+			print(f"Could not determine org of room {room_id}: {e}")
+
+	def memory_stats(self):
+		return {
+			'processed_messages': len(self.processed_messages),
+			'pending_meeting_tasks': len(self.pending_meeting_tasks),
+			'people_cache': self.people_cache.stats(),
+			'room_cache': self.room_cache.stats(),
+			'capture': self.recorder.stats() if self.recorder is not None else None
+		}
+
+	def verify_signature(self, body, signature):
+		"""Check Webex's X-Spark-Signature: hex HMAC-SHA1 of the raw body keyed by the webhook secret."""
+		if not signature:
+			return False
+		expected = hmac.new(WEBEX_WEBHOOK_SECRET.encode(), body, hashlib.sha1).hexdigest()
+		return hmac.compare_digest(expected, signature)
+
+	def handle_event(self, body):
+		"""Process one verified webhook event (runs in the threadpool)."""
+		data = loads(body)
+		
+		# Extract unique identifier for deduplication
+		event_id = data.get('data', {}).get('id', '')
+		# Events are handled on several threadpool threads: check and mark in one step
+		with self.dedup_lock:
 			if event_id in self.processed_messages:
 				print(f"Skipping duplicate event: {event_id}")
 				return {"status": "ok", "message": "duplicate event"}
+			# Remember it; the oldest ids are dropped past WEBEX_DEDUP_SIZE
+			self.processed_messages[event_id] = True
+		
+		self.invalidate_entities(data)
+		# Tasks are partitioned by org: learn which org this room belongs to
+		self.learn_room_tenant(data)
+		
+		# Handle Adaptive Card submissions (button clicks)
+		if data.get('resource') == 'attachmentActions' and data.get('event') == 'created':
+			action_id = data['data']['id']
+			room_id = data['data']['roomId']
+			person_id = data['data']['personId']
 			
-			# Add to processed messages (keep last 100 to prevent memory leak)
-			self.processed_messages.add(event_id)
-			if len(self.processed_messages) > 100:
-				self.processed_messages.pop()
+			# Get bot's own person ID to avoid responding to own actions
+			try:
+				bot_person = self.get_bot_person()
+				if person_id == bot_person.id:
+					print("Ignoring action from bot itself")
+					return {"status": "ok"}
+			except Exception as e:
+				print(f"Error getting bot info: {e}")
+				return {"status": "error", "message": "Could not verify bot identity"}
 			
-			# Handle Adaptive Card submissions (button clicks)
-			if data.get('resource') == 'attachmentActions' and data.get('event') == 'created':
-				action_id = data['data']['id']
-				room_id = data['data']['roomId']
-				person_id = data['data']['personId']
-				
-				# Get bot's own person ID to avoid responding to own actions
-				try:
-					bot_person = self.api.people.me()
-					if person_id == bot_person.id:
-						print("Ignoring action from bot itself")
-						return {"status": "ok"}
-				except Exception as e:
-					print(f"Error getting bot info: {e}")
-					return {"status": "error", "message": "Could not verify bot identity"}
+			try:
+				# Get the action data
+				action = self.api.attachment_actions.get(action_id)
+				action_data = action.inputs
+				print(f"Processing action: {action_data}")
 				
-				try:
-					# Get the action data
-					action = self.api.attachment_actions.get(action_id)
-					action_data = action.inputs
-					print(f"Processing action: {action_data}")
-					
-					if action_data.get('action') == 'delete':
-						task_id = action_data.get('task_id')
-						self.handle_task_command("delete", room_id, {"task_id": task_id})
-					elif action_data.get('action') == 'toggle_complete':
-						task_id = action_data.get('task_id')
-						current_status = action_data.get('current_status', False)
-						self.handle_toggle_complete(room_id, task_id, current_status)
-					elif action_data.get('action') == 'modify':
-						task_id = action_data.get('task_id')
-						# Get current task details for the modify form
-						tasks = self.task_manager.list_tasks()
-						current_task = next((task for task in tasks if str(task["_id"]) == task_id), None)
-						if current_task:
-							self.handle_modify_task(room_id, task_id, current_task["title"])
-						else:
-							self.send_message(room_id, "ERROR: Task not found!")
-					elif action_data.get('action') == 'update':
-						task_id = action_data.get('task_id')
-						new_title = action_data.get('new_title', '').strip()
-						self.handle_update_task(room_id, task_id, new_title)
-					elif action_data.get('action') == 'cancel':
-						self.send_message(room_id, "Modification cancelled.")
-						self.handle_task_command("list", room_id)
-					# Handle new greeting card actions
-					elif action_data.get('action') == 'create_task_prompt':
-						self.show_task_creation_form(room_id)
-					elif action_data.get('action') == 'list_tasks':
-						self.handle_task_command("list", room_id)
-					elif action_data.get('action') == 'schedule_meeting_prompt':
-						self.show_meeting_creation_form(room_id)
-					elif action_data.get('action') == 'create_task_submit':
-						task_title = action_data.get('task_title', '').strip()
-						if task_title:
-							self.handle_task_command("create", room_id, {"title": task_title})
-						else:
-							self.send_message(room_id, "ERROR: Task title cannot be empty!")
-					elif action_data.get('action') == 'quick_meeting_submit':
-						meeting_title = action_data.get('meeting_title', '').strip()
-						if meeting_title:
-							try:
-								# Get person info for meeting creation
-								person = self.api.people.get(person_id)
-								person_email = person.emails[0] if person.emails else "user@company.com"
-								self.handle_meeting_request(room_id, person_id, person_email, meeting_title)
-							except Exception as meeting_error:
-								self.send_message(room_id, f"ERROR: Failed to create meeting: {meeting_error}")
-						else:
-							self.send_message(room_id, "ERROR: Meeting title cannot be empty!")
-					elif action_data.get('action') == 'cancel_form':
-						self.send_message(room_id, "Action cancelled.")
-						
-				except Exception as e:
-					print(f"Error processing action {action_id}: {e}")
-					return {"status": "error", "message": f"Could not process action: {e}"}
-			
-			# Handle meeting webhooks (automatic task creation)
-			elif data.get('resource') == 'meetings' and data.get('event') == 'created':
-				try:
-					meeting_data = data.get('data', {})
-					meeting_id = meeting_data.get('id', '')
-					host_email = meeting_data.get('hostEmail', '')
-					
-					print(f"Meeting webhook received: {meeting_id} for host: {host_email}")
-					
-					# Process the meeting webhook
-					self.handle_meeting_webhook(meeting_data)
+				ctx = CommandContext('webex', room_id, person_id=person_id)
+				if not self.commands.dispatch_action(ctx, action_data):
+					print(f"Unknown card action: {action_data.get('action')}")
 					
-				except Exception as e:
-					print(f"Error processing meeting webhook: {e}")
-					return {"status": "error", "message": f"Could not process meeting webhook: {e}"}
+			except Exception as e:
+				print(f"Error processing action {action_id}: {e}")
+				return {"status": "error", "message": f"Could not process action: {e}"}
+		
+		# Handle meeting webhooks (automatic task creation)
+		elif data.get('resource') == 'meetings' and data.get('event') == 'created':
+			try:
+				meeting_data = data.get('data', {})
+				meeting_id = meeting_data.get('id', '')
+				host_email = meeting_data.get('hostEmail', '')
 				
-			# Handle regular messages
-			elif data.get('resource') == 'messages' and data.get('event') == 'created':
-				message_id = data['data']['id']
-				room_id = data['data']['roomId']
-				person_id = data['data']['personId']
-				person_email = data['data'].get('personEmail', 'user@company.com')
+				print(f"Meeting webhook received: {meeting_id} for host: {host_email}")
 				
-				# Get bot's own person ID to avoid responding to own messages
-				try:
-					bot_person = self.api.people.me()
-					if person_id == bot_person.id:
-						print("Ignoring message from bot itself")
-						return {"status": "ok"}
-				except Exception as e:
-					print(f"Error getting bot info: {e}")
-					# Continue processing even if bot verification fails
+				# Process the meeting webhook
+				self.handle_meeting_webhook(meeting_data)
 				
-				try:
-					# Add retry logic for message retrieval
-					import time
-					max_retries = 3
-					retry_delay = 1
-					
-					for attempt in range(max_retries):
-						try:
-							msg = self.api.messages.get(message_id)
-							break
-						except Exception as retry_e:
-							if attempt == max_retries - 1:
-								# Last attempt failed
-								if "404" in str(retry_e) or "Not Found" in str(retry_e):
-									print(f"Message {message_id} not found - likely from inaccessible room or deleted. Skipping.")
-									return {"status": "ok", "message": "message not accessible"}
-								else:
-									raise retry_e
+			except Exception as e:
+				print(f"Error processing meeting webhook: {e}")
+				return {"status": "error", "message": f"Could not process meeting webhook: {e}"}
+			
+		# Handle regular messages
+		elif data.get('resource') == 'messages' and data.get('event') == 'created':
+			message_id = data['data']['id']
+			room_id = data['data']['roomId']
+			person_id = data['data']['personId']
+			person_email = data['data'].get('personEmail', 'user@company.com')
+			
+			# Get bot's own person ID to avoid responding to own messages
+			try:
+				bot_person = self.get_bot_person()
+				if person_id == bot_person.id:
+					print("Ignoring message from bot itself")
+					return {"status": "ok"}
+			except Exception as e:
+				print(f"Error getting bot info: {e}")
+				# Continue processing even if bot verification fails
+			
+			try:
+				# Add retry logic for message retrieval
+				import time
+				max_retries = 3
+				retry_delay = 1
+				
+				for attempt in range(max_retries):
+					try:
+						msg = self.api.messages.get(message_id)
+						break
+					except Exception as retry_e:
+						if attempt == max_retries - 1:
+							# Last attempt failed
+							if "404" in str(retry_e) or "Not Found" in str(retry_e):
+								print(f"Message {message_id} not found - likely from inaccessible room or deleted. Skipping.")
+								return {"status": "ok", "message": "message not accessible"}
 							else:
-								print(f"Retry {attempt + 1} for message {message_id}: {retry_e}")
-								time.sleep(retry_delay)
-								retry_delay *= 2  # Exponential backoff
-					
-					# Check if message has text content
-					if not hasattr(msg, 'text') or not msg.text:
-						print(f"Message {message_id} has no text content - likely a file or card")
-						return {"status": "ok", "message": "no text content"}
-					
-					text = msg.text.strip().lower()
-					print(f"Processing message: '{text}' from person: {person_id}")
-					
-					if text == "hello" or text == "help":
-						self.send_greeting(room_id)
-					elif text.startswith("task"):
-						task_title = msg.text[5:].strip()
-						if task_title:
-							self.handle_task_command("create", room_id, {"title": task_title})
-					elif text == "list":
-						self.handle_task_command("list", room_id)
-					elif text.startswith("delete"):
-						task_id = msg.text[7:].strip()
-						self.handle_task_command("delete", room_id, {"task_id": task_id})
-					elif text == "meetings":
-						# Show meeting options card
-						meeting_options_card = {
-							"$schema": "http://adaptivecards.io/schemas/adaptive-card.json",
-							"type": "AdaptiveCard",
-							"version": "1.3",
-							"body": [
-								{
-									"type": "TextBlock",
-									"text": "Schedule a meeting ",
-									"weight": "Bolder",
-									"size": "Large",
-									"horizontalAlignment": "Center",
-									"color": "Good"
-								},
-								{
-									"type": "TextBlock",
-									"text": "Click on the following link to create a meeting :",
-									"wrap": True,
-									"horizontalAlignment": "Center",
-									"spacing": "Medium"
-								},
-								{
-									"type": "TextBlock",
-									"text": "[Schedule Webex Meeting](http://localhost:8000/auth/webex)",
-									"wrap": True,
-									"horizontalAlignment": "Center",
-									"isSubtle": True
-								}
-							]
-						}
-						self.send_message(room_id, "Meeting options:", card=meeting_options_card)
-					elif text.startswith("schedule meeting") or text.startswith("meeting"):
-						meeting_title = msg.text.replace("schedule meeting", "").replace("meeting", "").strip()
-						if meeting_title:
-							# Try to create meeting via OAuth first, then fallback to redirect
-							self.handle_meeting_request(room_id, person_id, person_email, meeting_title)
-
-				except Exception as e:
-					error_msg = str(e)
-					if "404" in error_msg or "Not Found" in error_msg:
-						print(f"Message {message_id} not found - bot may not have access to this room")
-						return {"status": "ok", "message": "message not accessible"}
-					elif "403" in error_msg or "Forbidden" in error_msg:
-						print(f"Access denied for message {message_id} - insufficient permissions")
-						return {"status": "ok", "message": "access denied"}
-					else:
-						print(f"Error processing message {message_id}: {e}")
-						return {"status": "error", "message": f"Could not process message: {e}"}
+								raise retry_e
+						else:
+							print(f"Retry {attempt + 1} for message {message_id}: {retry_e}")
+							time.sleep(retry_delay)
+							retry_delay *= 2  # Exponential backoff
 				
-			# Handle meeting creation events
-			elif data.get('resource') == 'meetings' and data.get('event') == 'created':
-				meeting_id = data['data']['id']
-				meeting_title = data['data']['title']
-				meeting_link = data['data']['webLink']
-				host_email = data['data']['hostEmail']
+				# Check if message has text content
+				if not hasattr(msg, 'text') or not msg.text:
+					print(f"Message {message_id} has no text content - likely a file or card")
+					return {"status": "ok", "message": "no text content"}
 				
-				print(f"New meeting created: {meeting_title} (ID: {meeting_id})")
+				print(f"Processing message: '{msg.text.strip()}' from person: {person_id}")
 				
-				# Optionally, create a task for the meeting
-				task = {
-					"title": f"📞 {meeting_title}",
-					"completed": False,
-					"type": "meeting",
-					"meeting_link": meeting_link,
-					"platform": "webex"
-				}
-				self.task_manager.create_task(task)
+				ctx = CommandContext('webex', room_id, person_id=person_id, person_email=person_email, text=msg.text)
+				self.commands.dispatch_text(ctx, msg.text)
+
+			except Exception as e:
+				error_msg = str(e)
+				if "404" in error_msg or "Not Found" in error_msg:
+					print(f"Message {message_id} not found - bot may not have access to this room")
+					return {"status": "ok", "message": "message not accessible"}
+				elif "403" in error_msg or "Forbidden" in error_msg:
+					print(f"Access denied for message {message_id} - insufficient permissions")
+					return {"status": "ok", "message": "access denied"}
+				else:
+					print(f"Error processing message {message_id}: {e}")
+					return {"status": "error", "message": f"Could not process message: {e}"}
+			
+		# METHOD 1: Enhanced Membership Events - Primary greeting system
+		elif data.get('resource') == 'memberships' and data.get('event') == 'created':
+			print(f"🎉 MEMBERSHIP EVENT RECEIVED - METHOD 1 ACTIVE!")
+			try:
+				membership_data = data.get('data', {})
+				room_id = membership_data.get('roomId', '')
+				person_id = membership_data.get('personId', '')
+				person_email = membership_data.get('personEmail', '')
 				
-				# Notify the user (or the room) about the new meeting
-				self.send_message(room_id, f"✅ New meeting scheduled: **{meeting_title}**\n🔗 Link: {meeting_link}")
+				print(f"📋 MEMBERSHIP DETAILS:")
+				print(f"   Room ID: {room_id}")
+				print(f"   Person ID: {person_id}")
+				print(f"   Person Email: {person_email}")
+				print(f"   Event Type: {data.get('event')}")
+				print(f"   Resource: {data.get('resource')}")
+				print(f"   Full webhook data: {data}")
 				
-			# METHOD 1: Enhanced Membership Events - Primary greeting system
-			elif data.get('resource') == 'memberships' and data.get('event') == 'created':
-				print(f"🎉 MEMBERSHIP EVENT RECEIVED - METHOD 1 ACTIVE!")
+				# Get bot's own person ID - ignore bot's own membership events
 				try:
-					membership_data = data.get('data', {})
-					room_id = membership_data.get('roomId', '')
-					person_id = membership_data.get('personId', '')
-					person_email = membership_data.get('personEmail', '')
+					bot_person = self.get_bot_person()
+					bot_id = bot_person.id
+					print(f"🤖 Bot verification: Bot ID={bot_id}, Event Person ID={person_id}")
 					
-					print(f"📋 MEMBERSHIP DETAILS:")
-					print(f"   Room ID: {room_id}")
-					print(f"   Person ID: {person_id}")
-					print(f"   Person Email: {person_email}")
-					print(f"   Event Type: {data.get('event')}")
-					print(f"   Resource: {data.get('resource')}")
-					print(f"   Full webhook data: {data}")
+					if person_id == bot_id:
+						print("⏭️ SKIPPING: This is the bot's own membership event")
+						return {"status": "ok"}
+					else:
+						print(f"✅ VALID: This is a user membership event (not bot)")
+				except Exception as e:
+					print(f"❌ Bot verification error: {e}")
+				
+				# Enhanced room verification for "botper" space
+				try:
+					print(f"🏠 ROOM VERIFICATION STARTING...")
+					room = self.get_room(room_id)
 					
-					# Get bot's own person ID - ignore bot's own membership events
-					try:
-						bot_person = self.api.people.me()
-						bot_id = bot_person.id
-						print(f"🤖 Bot verification: Bot ID={bot_id}, Event Person ID={person_id}")
-						
-						if person_id == bot_id:
-							print("⏭️ SKIPPING: This is the bot's own membership event")
-							return {"status": "ok"}
-						else:
-							print(f"✅ VALID: This is a user membership event (not bot)")
-					except Exception as e:
-						print(f"❌ Bot verification error: {e}")
+					original_title = room.title if room.title else ""
+					normalized_title = original_title.lower().strip()
+					is_botper_match = normalized_title == "botper"
 					
-					# Enhanced room verification for "botper" space
-					try:
-						print(f"🏠 ROOM VERIFICATION STARTING...")
-						room = self.api.rooms.get(room_id)
-						
-						original_title = room.title if room.title else ""
-						normalized_title = original_title.lower().strip()
-						is_botper_match = normalized_title == "botper"
+					print(f"📊 ROOM ANALYSIS:")
+					print(f"   Original Title: '{original_title}'")
+					print(f"   Normalized Title: '{normalized_title}'")
+					print(f"   Is Botper Match: {is_botper_match}")
+					print(f"   Room Type: {getattr(room, 'type', 'Unknown')}")
+					print(f"   Room Created: {getattr(room, 'created', 'Unknown')}")
+					
+					# PRECISE MATCH: Only "botper" space (case insensitive)
+					if is_botper_match:
+						print(f"🎯 PERFECT MATCH! User joined the BOTPER space!")
+						print(f"🚀 INITIATING GREETING SEQUENCE...")
 						
-						print(f"📊 ROOM ANALYSIS:")
-						print(f"   Original Title: '{original_title}'")
-						print(f"   Normalized Title: '{normalized_title}'")
-						print(f"   Is Botper Match: {is_botper_match}")
-						print(f"   Room Type: {getattr(room, 'type', 'Unknown')}")
-						print(f"   Room Created: {getattr(room, 'created', 'Unknown')}")
+						# Greeting goes through the outbox, which retries with backoff
+						self.send_greeting(room_id)
+						print(f"📨 Greeting queued for delivery")
 						
-						# PRECISE MATCH: Only "botper" space (case insensitive)
-						if is_botper_match:
-							print(f"🎯 PERFECT MATCH! User joined the BOTPER space!")
-							print(f"🚀 INITIATING GREETING SEQUENCE...")
-							
-							# Enhanced greeting delivery with multiple attempts
-							import threading
-							import time
-							
-							def robust_greeting_delivery():
-								try:
-									print(f"⏰ Starting greeting delivery sequence...")
-									
-									# Attempt 1: Immediate greeting (for fast delivery)
-									try:
-										print(f"📤 Attempt 1: Immediate greeting...")
-										self.send_greeting(room_id)
-										print(f"✅ SUCCESS: Immediate greeting sent!")
-										return
-									except Exception as immediate_error:
-										print(f"⚠️ Immediate greeting failed: {immediate_error}")
-									
-									# Attempt 2: Short delay (1 second)
-									print(f"⏰ Waiting 1 second for retry...")
-									time.sleep(1)
-									try:
-										print(f"� Attempt 2: Quick retry greeting...")
-										self.send_greeting(room_id)
-										print(f"✅ SUCCESS: Quick retry greeting sent!")
-										return
-									except Exception as quick_error:
-										print(f"⚠️ Quick retry failed: {quick_error}")
-									
-									# Attempt 3: Standard delay (2 seconds)
-									print(f"⏰ Waiting 2 more seconds for final attempt...")
-									time.sleep(2)
-									try:
-										print(f"📤 Attempt 3: Final greeting attempt...")
-										self.send_greeting(room_id)
-										print(f"✅ SUCCESS: Final greeting sent!")
-										return
-									except Exception as final_error:
-										print(f"❌ FAILURE: All greeting attempts failed: {final_error}")
-										
-								except Exception as delivery_error:
-									print(f"❌ CRITICAL: Greeting delivery system error: {delivery_error}")
-							
-							# Start robust greeting delivery in background
-							greeting_thread = threading.Thread(target=robust_greeting_delivery)
-							greeting_thread.daemon = True
-							greeting_thread.start()
-							print(f"� Robust greeting thread started with 3-attempt system")
-							
-						else:
-							print(f"❌ NOT BOTPER: Space '{original_title}' does not match 'botper' - ignoring")
-							
-					except Exception as room_error:
-						print(f"❌ ROOM VERIFICATION ERROR: {room_error}")
-						import traceback
-						print(f"🔍 Room error traceback: {traceback.format_exc()}")
+					else:
+						print(f"❌ NOT BOTPER: Space '{original_title}' does not match 'botper' - ignoring")
 						
-				except Exception as e:
-					print(f"❌ MEMBERSHIP PROCESSING ERROR: {e}")
+				except Exception as room_error:
+					print(f"❌ ROOM VERIFICATION ERROR: {room_error}")
 					import traceback
-					print(f"🔍 Full membership error traceback: {traceback.format_exc()}")
-					return {"status": "error", "message": f"Membership event processing failed: {e}"}
-				
-			return {"status": "ok"}
+					print(f"🔍 Room error traceback: {traceback.format_exc()}")
+					
+			except Exception as e:
+				print(f"❌ MEMBERSHIP PROCESSING ERROR: {e}")
+				import traceback
+				print(f"🔍 Full membership error traceback: {traceback.format_exc()}")
+				return {"status": "error", "message": f"Membership event processing failed: {e}"}
+			
+		return {"status": "ok"}
+
+	def schedule_meeting(self, form_data):
+		"""Create the meeting described by the /create-meeting form (runs in the threadpool)."""
+		user_id = form_data.get('user_id')
+		title = form_data.get('title', 'Botper Test Meeting')
+		meeting_date = form_data.get('meeting_date')
+		meeting_time = form_data.get('meeting_time', '09:00')
+		timezone = form_data.get('timezone', 'UTC-05:00')
+		duration = float(form_data.get('duration', '1'))
+		participants_str = form_data.get('participants', '')
+		
+		token_doc = self.token_store.get(user_id) if user_id else None
+		if not token_doc:
+			return HTMLResponse("""
+			<html>
+				<body style="font-family: Arial, sans-serif; text-align: center; padding: 50px;">
+					<div style="display: flex; align-items: center; justify-content: center; margin-bottom: 20px;">
+						<img src="/static/bot-icon.svg" alt="Botper Bot" style="width: 48px; height: 48px; margin-right: 10px;">
+						<h1 style="color: red; margin: 0;">❌ Error</h1>
+					</div>
+					<p>User not authorized. Please authorize first.</p>
+					<p><a href="/" style="color: #00BCF2;">← Back to Home</a></p>
+				</body>
+			</html>
+			""", status_code=400)
+		
+		try:
+			# Get user's access token
+			access_token = self.token_store.access_token(token_doc, self.oauth_handler.refresh_access_token)
+			
+			# Parse timezone offset
+			from datetime import datetime, timedelta
+			import pytz
+			import re
+			
+			# Extract offset from timezone string (e.g., "UTC-05:00" -> -5.0)
+			tz_match = re.match(r'UTC([+-])(\d{1,2}):(\d{2})', timezone)
+			if tz_match:
+				sign = -1 if tz_match.group(1) == '-' else 1
+				hours = int(tz_match.group(2))
+				minutes = int(tz_match.group(3))
+				offset_hours = sign * (hours + minutes / 60.0)
+			else:
+				offset_hours = 0  # Default to UTC
+			
+			# Parse date and time
+			if meeting_date:
+				meeting_datetime_str = f"{meeting_date} {meeting_time}"
+				meeting_datetime = datetime.strptime(meeting_datetime_str, '%Y-%m-%d %H:%M')
+			else:
+				# Default to tomorrow at the specified time
+				now = datetime.now()
+				tomorrow = now + timedelta(days=1)
+				meeting_datetime = datetime.combine(tomorrow.date(), datetime.strptime(meeting_time, '%H:%M').time())
+			
+			# Convert to UTC
+			local_tz_offset = timedelta(hours=offset_hours)
+			start_time_utc = meeting_datetime - local_tz_offset
+			end_time_utc = start_time_utc + timedelta(hours=duration)
+			
+			# Validate that the meeting is scheduled for the future (with 2-minute buffer)
+			now_utc = datetime.utcnow()
+			min_future_time = now_utc + timedelta(minutes=2)
+			
+			# Debug logging
+			print(f"Meeting scheduling debug:")
+			print(f"  Local time: {meeting_datetime} ({timezone})")
+			print(f"  UTC time: {start_time_utc}")
+			print(f"  Current UTC: {now_utc}")
+			print(f"  Min future time: {min_future_time}")
+			
+			if start_time_utc <= min_future_time:
+				# If the time is in the past, return an error
+				display_timezone = timezone.replace('UTC', 'GMT')
+				return HTMLResponse(f"""
+				<html>
+					<head><title>Meeting Scheduling Error</title></head>
+					<body style="font-family: Arial, sans-serif; text-align: center; padding: 50px;">
+						<h1 style="color: red;">❌ Invalid Meeting Time</h1>
+						<div style="max-width: 500px; margin: 20px auto; text-align: left;">
+							<p><strong>Error:</strong> The selected meeting time must be at least 2 minutes in the future.</p>
+							<p><strong>Selected:</strong> {meeting_datetime.strftime('%Y-%m-%d %H:%M')} ({display_timezone})</p>
+							<p><strong>UTC Time:</strong> {start_time_utc.strftime('%Y-%m-%d %H:%M')} UTC</p>
+							<p><strong>Current UTC:</strong> {now_utc.strftime('%Y-%m-%d %H:%M')} UTC</p>
+							<p><strong>Minimum Time:</strong> {min_future_time.strftime('%Y-%m-%d %H:%M')} UTC</p>
+							<p><strong>💡 Tip:</strong> Make sure to account for timezone differences when scheduling!</p>
+						</div>
+						<p>
+							<a href="/" style="background-color: #00BCF2; color: white; padding: 10px 20px; text-decoration: none; border-radius: 5px;">
+								← Try Again
+							</a>
+						</p>
+					</body>
+				</html>
+				""", status_code=400)
+			
+			# Parse participants
+			participants_list = []
+			if participants_str.strip():
+				participants_list = [email.strip() for email in participants_str.split(',') if email.strip()]
+			
+			# Create meeting details
+			meeting_details = {
+				'title': title,
+				'start': start_time_utc.strftime('%Y-%m-%dT%H:%M:%SZ'),
+				'end': end_time_utc.strftime('%Y-%m-%dT%H:%M:%SZ'),
+				'timezone': 'UTC',
+				'enabledAutoRecordMeeting': False,
+				'allowAnyUserToBeCoHost': False
+			}
+			
+			# Add invitees if provided
+			if participants_list:
+				meeting_details['invitees'] = [{'email': email, 'displayName': email.split('@')[0]} for email in participants_list]
+			
+			# Create meeting using user's OAuth token
+			meeting = self.oauth_handler.create_meeting(access_token, meeting_details)
+			
+			print(f"Meeting created successfully: {meeting.get('webLink', 'No link')}")
+			
+			# Create task with meeting link automatically
+			meeting_link = meeting.get('webLink', 'No link available')
+			task = {
+				"title": f"📞 {title}",
+				"completed": False,
+				"type": "meeting",
+				"meeting_link": meeting_link,
+				"platform": "webex",
+				"start_time": start_time_utc.strftime('%Y-%m-%dT%H:%M:%SZ')
+			}
+			
+			try:
+				task_result = self.task_manager.upsert_meeting_task(meeting.get('id'), task, tenant=token_doc.get('org_id'))
+				self.calendar_sync.record_meeting(meeting, token_doc.get('email'), tenant=token_doc.get('org_id'))
+				print(f"✅ Task created automatically for meeting: {title}")
+			except Exception as task_error:
+				print(f"❌ Failed to create task for meeting: {task_error}")
+			
+			# Send meeting notification to Webex spaces
+			try:
+				self.send_meeting_notification(
+					meeting_title=title,
+					meeting_link=meeting_link,
+					meeting_datetime=meeting_datetime,
+					timezone=timezone,
+					participants_list=participants_list,
+					source_room_id=None  # OAuth callback - no specific source room
+				)
+			except Exception as notification_error:
+				print(f"❌ Failed to send meeting notification: {notification_error}")
+			
+			# Format display times
+			display_start_time = meeting_datetime.strftime('%Y-%m-%d %H:%M')
+			display_timezone = timezone.replace('UTC', 'GMT')
+			
+			# Format participants for display
+			participants_display = "None"
+			if participants_list:
+				if len(participants_list) <= 3:
+					participants_display = ', '.join(participants_list)
+				else:
+					participants_display = f"{', '.join(participants_list[:3])} and {len(participants_list) - 3} more"
+			
+			# Return enhanced success page
+			return HTMLResponse(f"""
+			<html>
+				<head>
+					<title>Meeting Created Successfully</title>
+					<style>
+						body {{ font-family: Arial, sans-serif; text-align: center; padding: 20px; }}
+						.meeting-info {{ background-color: #f0f8ff; padding: 20px; border-radius: 10px; margin: 20px auto; max-width: 600px; }}
+						.next-steps {{ background-color: #e8f5e8; padding: 15px; border-radius: 8px; margin: 20px auto; max-width: 600px; }}
+						.detail-row {{ margin: 10px 0; text-align: left; }}
+						.label {{ font-weight: bold; color: #333; }}
+					</style>
+				</head>
+				<body>
+					<div style="display: flex; align-items: center; justify-content: center; margin-bottom: 20px;">
+						<img src="/static/file%20(1).svg" alt="Botper Bot" style="width: 48px; height: 48px; margin-right: 10px;">
+						<h1 style="color: #00BCF2; margin: 0;"> Meeting Created Successfully!</h1>
+					</div>
+					
+					<div class="meeting-info">
+						<h2>📞 {meeting.get('title', 'Meeting')}</h2>
+						<div class="detail-row">
+							<span class="label">Meeting ID:</span> {meeting.get('meetingNumber', 'N/A')}
+						</div>
+						<div class="detail-row">
+							<span class="label">Date & Time:</span> {display_start_time} ({display_timezone})
+						</div>
+						<div class="detail-row">
+							<span class="label">Duration:</span> {duration} hour{'s' if duration != 1 else ''}
+						</div>
+						<div class="detail-row">
+							<span class="label">Participants:</span> {participants_display}
+						</div>
+						<div class="detail-row">
+							<span class="label">Join Link:</span> 
+							<a href="{meeting.get('webLink', '#')}" target="_blank" style="color: #00BCF2; word-break: break-all;">
+								{meeting.get('webLink', 'No link available')}
+							</a>
+						</div>
+						{f'<div class="detail-row"><span class="label">Password:</span> {meeting.get("password", "N/A")}</div>' if meeting.get("password") else ''}
+					</div>
+					<br>
+                        <br>
+					<div class="Meeting has been saved in your tasks">
+						<p>✅ Your meeting has been saved in your tasks, You can join from tasks as well</p>
+					</div>
+					
+					<div style="margin: 30px 0;">
+						<a href="/auth/webex" style="background-color: #00BCF2; color: white; padding: 10px 20px; text-decoration: none; border-radius: 5px; margin: 10px;">
+							← Schedule Another Meeting
+						</a>
+						<a href="{meeting.get('webLink', '#')}" target="_blank" style="background-color: #28a745; color: white; padding: 10px 20px; text-decoration: none; border-radius: 5px; margin: 10px;">
+							 Join Meeting Now
+						</a>
+					</div>
+					
+					<p><a href="https://teams.webex.com" style="color: #00BCF2;">Return to Webex</a></p>
+				</body>
+			</html>
+			""")
+			
+		except Exception as e:
+			print(f"Error creating meeting: {e}")
+			return HTMLResponse(f"""
+			<html>
+				<body style="font-family: Arial, sans-serif; text-align: center; padding: 50px;">
+					<div style="display: flex; align-items: center; justify-content: center; margin-bottom: 20px;">
+						<img src="/static/bot-icon.svg" alt="Botper Bot" style="width: 48px; height: 48px; margin-right: 10px;">
+						<h1 style="color: red; margin: 0;">❌ Meeting Creation Failed</h1>
+					</div>
+					<p>Error: {str(e)}</p>
+					<p><a href="/" style="color: #00BCF2;">← Back to Home</a></p>
+				</body>
+			</html>
+			""", status_code=500)
+	
+
+	def setup_routes(self):
+		@self.app.post("/webex/webhook")
+		async def webhook(request: Request):
+			body = await request.body()
+			# Reject forged events on the raw bytes, before any decoding or API calls
+			if WEBEX_WEBHOOK_SECRET and not self.verify_signature(body, request.headers.get('X-Spark-Signature')):
+				return FastJSONResponse({"status": "invalid signature"}, status_code=401)
+			if self.recorder is not None:
+				self.recorder.record("/webex/webhook", body)
+			# Everything below makes blocking Mongo/Webex calls: keep it off the shared event loop
+			return await run_in_threadpool(self.handle_event, body)
 
 		# OAuth Integration Routes
 		@self.app.get("/auth/webex")
@@ -415,7 +696,7 @@ class WebexBot(BaseBot):
 				""", status_code=500)
 
 		@self.app.get("/auth/webex/callback")
-		async def oauth_callback(code: str = None, state: str = None, error: str = None):
+		def oauth_callback(code: str = None, state: str = None, error: str = None):
 			"""Handle OAuth callback from Webex"""
 			if error:
 				return HTMLResponse(f"""
@@ -452,14 +733,11 @@ class WebexBot(BaseBot):
 				# Get user info
 				user_info = self.oauth_handler.get_user_info(token_data['access_token'])
 				
-				# Store user tokens (in production, use a proper database)
+				# Store user tokens so meetings and calendar sync keep working across restarts
 				user_id = user_info['id']
-				self.user_tokens[user_id] = {
-					'access_token': token_data['access_token'],
-					'refresh_token': token_data['refresh_token'],
-					'expires_in': token_data['expires_in'],
-					'user_info': user_info
-				}
+				self.token_store.save(user_id, token_data, user_info)
+				# Pull the user's upcoming meetings in now rather than at the next sync round
+				self.workers.submit(self.calendar_sync.sync_user, self.token_store.get(user_id))
 				
 				print(f"OAuth successful for user: {user_info.get('displayName')} ({user_info.get('emails', ['unknown'])[0]})")
 				
@@ -709,239 +987,8 @@ class WebexBot(BaseBot):
 		async def create_meeting(request: Request):
 			"""Create a meeting using user's OAuth token with custom time, timezone, and participants"""
 			form_data = await request.form()
-			user_id = form_data.get('user_id')
-			title = form_data.get('title', 'Botper Test Meeting')
-			meeting_date = form_data.get('meeting_date')
-			meeting_time = form_data.get('meeting_time', '09:00')
-			timezone = form_data.get('timezone', 'UTC-05:00')
-			duration = float(form_data.get('duration', '1'))
-			participants_str = form_data.get('participants', '')
-			
-			if not user_id or user_id not in self.user_tokens:
-				return HTMLResponse("""
-				<html>
-					<body style="font-family: Arial, sans-serif; text-align: center; padding: 50px;">
-						<div style="display: flex; align-items: center; justify-content: center; margin-bottom: 20px;">
-							<img src="/static/bot-icon.svg" alt="Botper Bot" style="width: 48px; height: 48px; margin-right: 10px;">
-							<h1 style="color: red; margin: 0;">❌ Error</h1>
-						</div>
-						<p>User not authorized. Please authorize first.</p>
-						<p><a href="/" style="color: #00BCF2;">← Back to Home</a></p>
-					</body>
-				</html>
-				""", status_code=400)
-			
-			try:
-				# Get user's access token
-				access_token = self.user_tokens[user_id]['access_token']
-				
-				# Parse timezone offset
-				from datetime import datetime, timedelta
-				import pytz
-				import re
-				
-				# Extract offset from timezone string (e.g., "UTC-05:00" -> -5.0)
-				tz_match = re.match(r'UTC([+-])(\d{1,2}):(\d{2})', timezone)
-				if tz_match:
-					sign = -1 if tz_match.group(1) == '-' else 1
-					hours = int(tz_match.group(2))
-					minutes = int(tz_match.group(3))
-					offset_hours = sign * (hours + minutes / 60.0)
-				else:
-					offset_hours = 0  # Default to UTC
-				
-				# Parse date and time
-				if meeting_date:
-					meeting_datetime_str = f"{meeting_date} {meeting_time}"
-					meeting_datetime = datetime.strptime(meeting_datetime_str, '%Y-%m-%d %H:%M')
-				else:
-					# Default to tomorrow at the specified time
-					now = datetime.now()
-					tomorrow = now + timedelta(days=1)
-					meeting_datetime = datetime.combine(tomorrow.date(), datetime.strptime(meeting_time, '%H:%M').time())
-				
-				# Convert to UTC
-				local_tz_offset = timedelta(hours=offset_hours)
-				start_time_utc = meeting_datetime - local_tz_offset
-				end_time_utc = start_time_utc + timedelta(hours=duration)
-				
-				# Validate that the meeting is scheduled for the future (with 2-minute buffer)
-				now_utc = datetime.utcnow()
-				min_future_time = now_utc + timedelta(minutes=2)
-				
-				# Debug logging
-				print(f"Meeting scheduling debug:")
-				print(f"  Local time: {meeting_datetime} ({timezone})")
-				print(f"  UTC time: {start_time_utc}")
-				print(f"  Current UTC: {now_utc}")
-				print(f"  Min future time: {min_future_time}")
-				
-				if start_time_utc <= min_future_time:
-					# If the time is in the past, return an error
-					display_timezone = timezone.replace('UTC', 'GMT')
-					return HTMLResponse(f"""
-					<html>
-						<head><title>Meeting Scheduling Error</title></head>
-						<body style="font-family: Arial, sans-serif; text-align: center; padding: 50px;">
-							<h1 style="color: red;">❌ Invalid Meeting Time</h1>
-							<div style="max-width: 500px; margin: 20px auto; text-align: left;">
-								<p><strong>Error:</strong> The selected meeting time must be at least 2 minutes in the future.</p>
-								<p><strong>Selected:</strong> {meeting_datetime.strftime('%Y-%m-%d %H:%M')} ({display_timezone})</p>
-								<p><strong>UTC Time:</strong> {start_time_utc.strftime('%Y-%m-%d %H:%M')} UTC</p>
-								<p><strong>Current UTC:</strong> {now_utc.strftime('%Y-%m-%d %H:%M')} UTC</p>
-								<p><strong>Minimum Time:</strong> {min_future_time.strftime('%Y-%m-%d %H:%M')} UTC</p>
-								<p><strong>💡 Tip:</strong> Make sure to account for timezone differences when scheduling!</p>
-							</div>
-							<p>
-								<a href="/" style="background-color: #00BCF2; color: white; padding: 10px 20px; text-decoration: none; border-radius: 5px;">
-									← Try Again
-								</a>
-							</p>
-						</body>
-					</html>
-					""", status_code=400)
-				
-				# Parse participants
-				participants_list = []
-				if participants_str.strip():
-					participants_list = [email.strip() for email in participants_str.split(',') if email.strip()]
-				
-				# Create meeting details
-				meeting_details = {
-					'title': title,
-					'start': start_time_utc.strftime('%Y-%m-%dT%H:%M:%SZ'),
-					'end': end_time_utc.strftime('%Y-%m-%dT%H:%M:%SZ'),
-					'timezone': 'UTC',
-					'enabledAutoRecordMeeting': False,
-					'allowAnyUserToBeCoHost': False
-				}
-				
-				# Add invitees if provided
-				if participants_list:
-					meeting_details['invitees'] = [{'email': email, 'displayName': email.split('@')[0]} for email in participants_list]
-				
-				# Create meeting using user's OAuth token
-				meeting = self.oauth_handler.create_meeting(access_token, meeting_details)
-				
-				print(f"Meeting created successfully: {meeting.get('webLink', 'No link')}")
-				
-				# Create task with meeting link automatically
-				meeting_link = meeting.get('webLink', 'No link available')
-				task = {
-					"title": f"📞 {title}",
-					"completed": False,
-					"type": "meeting",
-					"meeting_link": meeting_link,
-					"platform": "webex",
-					"start_time": start_time_utc.strftime('%Y-%m-%dT%H:%M:%SZ')
-				}
-				
-				try:
-					task_result = self.task_manager.create_task(task)
-					print(f"✅ Task created automatically for meeting: {title}")
-				except Exception as task_error:
-					print(f"❌ Failed to create task for meeting: {task_error}")
-				
-				# Send meeting notification to Webex spaces
-				try:
-					self.send_meeting_notification(
-						meeting_title=title,
-						meeting_link=meeting_link,
-						meeting_datetime=meeting_datetime,
-						timezone=timezone,
-						participants_list=participants_list,
-						source_room_id=None  # OAuth callback - no specific source room
-					)
-				except Exception as notification_error:
-					print(f"❌ Failed to send meeting notification: {notification_error}")
-				
-				# Format display times
-				display_start_time = meeting_datetime.strftime('%Y-%m-%d %H:%M')
-				display_timezone = timezone.replace('UTC', 'GMT')
-				
-				# Format participants for display
-				participants_display = "None"
-				if participants_list:
-					if len(participants_list) <= 3:
-						participants_display = ', '.join(participants_list)
-					else:
-						participants_display = f"{', '.join(participants_list[:3])} and {len(participants_list) - 3} more"
-				
-				# Return enhanced success page
-				return HTMLResponse(f"""
-				<html>
-					<head>
-						<title>Meeting Created Successfully</title>
-						<style>
-							body {{ font-family: Arial, sans-serif; text-align: center; padding: 20px; }}
-							.meeting-info {{ background-color: #f0f8ff; padding: 20px; border-radius: 10px; margin: 20px auto; max-width: 600px; }}
-							.next-steps {{ background-color: #e8f5e8; padding: 15px; border-radius: 8px; margin: 20px auto; max-width: 600px; }}
-							.detail-row {{ margin: 10px 0; text-align: left; }}
-							.label {{ font-weight: bold; color: #333; }}
-						</style>
-					</head>
-					<body>
-						<div style="display: flex; align-items: center; justify-content: center; margin-bottom: 20px;">
-							<img src="/static/file%20(1).svg" alt="Botper Bot" style="width: 48px; height: 48px; margin-right: 10px;">
-							<h1 style="color: #00BCF2; margin: 0;"> Meeting Created Successfully!</h1>
-						</div>
-						
-						<div class="meeting-info">
-							<h2>📞 {meeting.get('title', 'Meeting')}</h2>
-							<div class="detail-row">
-								<span class="label">Meeting ID:</span> {meeting.get('meetingNumber', 'N/A')}
-							</div>
-							<div class="detail-row">
-								<span class="label">Date & Time:</span> {display_start_time} ({display_timezone})
-							</div>
-							<div class="detail-row">
-								<span class="label">Duration:</span> {duration} hour{'s' if duration != 1 else ''}
-							</div>
-							<div class="detail-row">
-								<span class="label">Participants:</span> {participants_display}
-							</div>
-							<div class="detail-row">
-								<span class="label">Join Link:</span> 
-								<a href="{meeting.get('webLink', '#')}" target="_blank" style="color: #00BCF2; word-break: break-all;">
-									{meeting.get('webLink', 'No link available')}
-								</a>
-							</div>
-							{f'<div class="detail-row"><span class="label">Password:</span> {meeting.get("password", "N/A")}</div>' if meeting.get("password") else ''}
-						</div>
-						<br>
-                        <br>
-						<div class="Meeting has been saved in your tasks">
-							<p>✅ Your meeting has been saved in your tasks, You can join from tasks as well</p>
-						</div>
-						
-						<div style="margin: 30px 0;">
-							<a href="/auth/webex" style="background-color: #00BCF2; color: white; padding: 10px 20px; text-decoration: none; border-radius: 5px; margin: 10px;">
-								← Schedule Another Meeting
-							</a>
-							<a href="{meeting.get('webLink', '#')}" target="_blank" style="background-color: #28a745; color: white; padding: 10px 20px; text-decoration: none; border-radius: 5px; margin: 10px;">
-								 Join Meeting Now
-							</a>
-						</div>
-						
-						<p><a href="https://teams.webex.com" style="color: #00BCF2;">Return to Webex</a></p>
-					</body>
-				</html>
-				""")
-				
-			except Exception as e:
-				print(f"Error creating meeting: {e}")
-				return HTMLResponse(f"""
-				<html>
-					<body style="font-family: Arial, sans-serif; text-align: center; padding: 50px;">
-						<div style="display: flex; align-items: center; justify-content: center; margin-bottom: 20px;">
-							<img src="/static/bot-icon.svg" alt="Botper Bot" style="width: 48px; height: 48px; margin-right: 10px;">
-							<h1 style="color: red; margin: 0;">❌ Meeting Creation Failed</h1>
-						</div>
-						<p>Error: {str(e)}</p>
-						<p><a href="/" style="color: #00BCF2;">← Back to Home</a></p>
-					</body>
-				</html>
-				""", status_code=500)
+			# Token refresh, the meetings API and Mongo all block: keep them off the shared event loop
+			return await run_in_threadpool(self.schedule_meeting, form_data)
 
 		# Static file serving for bot icon and other assets
 		import os
@@ -959,109 +1006,59 @@ class WebexBot(BaseBot):
 		print(f"Sending greeting to room: {room_id}")
 		greeting_text = "Hello! This is Botper I am here to help you creating tasks, webex meetings and have them listed!"
 		
-		# Create an interactive adaptive card with available options
-		greeting_card = {
-			"$schema": "http://adaptivecards.io/schemas/adaptive-card.json",
-			"type": "AdaptiveCard",
-			"version": "1.3",
-			"body": [
-				{
-					"type": "TextBlock",
-					"text": " Hello! This is Botper",
-					"weight": "Bolder",
-					"size": "Large",
-					"horizontalAlignment": "Center",
-					"color": "Good"
-				},
-				{
-					"type": "TextBlock",
-					"text": "I am here to help you creating tasks, webex meetings and have them listed!",
-					"wrap": True,
-					"horizontalAlignment": "Center",
-					"isSubtle": True,
-					"spacing": "Medium"
-				},
-				{
-					"type": "TextBlock",
-					"text": " Available Options:",
-					"weight": "Bolder",
-					"size": "Medium",
-					"spacing": "Large"
-				},
-				{
-					"type": "FactSet",
-					"facts": [
-						{
-							"title": "📋 Create Task:",
-							"value": "Type 'task [description]'"
-						},
-						{
-							"title": "📝 List Tasks:",
-							"value": "Type 'list'"
-						},
-						{
-							"title": "📞 Schedule Meeting:",
-							"value": "Type 'meetings'"
-						},
-{
-							"title": "✅ Complete Task",
-							"value": ""
-						},
-						{
-							"title": "🗑️ Delete Task",
-							"value": ""
-						},
-						{
-							"title": "✏️ Edit Task",
-							"value": ""
-						}
-					],
-					"spacing": "Medium"
-				}
-			],
-			"actions": [
-				{
-					"type": "Action.Submit",
-					"title": "📋 Create Task",
-					"data": {
-						"action": "create_task_prompt"
-					}
-				},
-				{
-					"type": "Action.Submit",
-					"title": "📝 List Tasks",
-					"data": {
-						"action": "list_tasks"
-					}
-				},
-				{
-					"type": "Action.OpenUrl",
-					"title": "📞 Schedule Meeting",
-					"url": "http://localhost:8000/auth/webex"
-				}
-			]
-		}
-		
-		self.send_message(room_id, greeting_text, card=greeting_card)
+		self.send_message(room_id, greeting_text, card=WEBEX_GREETING_CARD.render())
+
+	def register_health_checks(self, health):
+		# Token validity only changes on rotation/revocation; re-check every 30s
+		health.register('webex_token', self.check_token, ttl=30.0)
+
+	def check_token(self):
+		"""Verify the bot token by resolving the bot's own identity."""
+		if not self.access_token:
+			return False, "WEBEX_BOT_TOKEN not set"
+		me = self.api.people.me()
+		return True, me.displayName
 
 	def start(self, port=8000):
 		self.current_port = port  # Store current port for OAuth URL generation
+		self.start_background_jobs()
 		import uvicorn
 		uvicorn.run(self.app, host="0.0.0.0", port=port)
 		
 	def start_on_port(self, port):
 		self.start(port=port)
 
-	def send_message(self, room_id, message, card=None):
+	def send_message(self, room_id, message, card=None, replace_key=None):
+		"""Queue a message on the durable outbox; delivery and retries happen in the background.
+
+		With replace_key, the room's previous message with the same key is removed
+		once this one is posted, so e.g. only one task list card stays live.
+		"""
 		try:
-			print(f"Sending message to room {room_id}: {message}")
-			if card:
-				result = self.api.messages.create(roomId=room_id, text=message, attachments=[{"contentType": "application/vnd.microsoft.card.adaptive", "content": card}])
-			else:
-				result = self.api.messages.create(roomId=room_id, text=message)
-			print(f"Message sent successfully: {result.id}")
+			print(f"Queueing message to room {room_id}: {message}")
+			self.outbox.enqueue('webex', room_id, message, card, replace_key=replace_key)
 		except Exception as e:
-			print(f"Error sending message: {e}")
+			print(f"Error queueing message: {e}")
+
+	def deliver_message(self, room_id, message, card=None):
+		"""Send a message to Webex now; raises so the outbox can retry."""
+		body = {"roomId": room_id, "text": message}
+		# Posted directly so large cards are encoded by the fast JSON backend, not the SDK's json.dumps
+		response = self.session.post(WEBEX_MESSAGES_URL, data=encode_with_card(body, card), headers={
+			"Authorization": f"Bearer {self.access_token}",
+			"Content-Type": "application/json"
+		})
+		if response.status_code != 200:
+			error = Exception(f"Webex message failed: {response.status_code} - {response.text}")
+			error.status_code = response.status_code
+			raise error
+		message_id = loads(response.content)["id"]
+		print(f"Message sent successfully: {message_id}")
+		return message_id
+
+	def delete_message(self, room_id, message_id):
+		# Webex can only edit text, not cards, so replaced cards are deleted
+		self.api.messages.delete(message_id)
 
 	def send_meeting_notification(self, meeting_title, meeting_link, meeting_datetime, timezone, participants_list=None, source_room_id=None):
 		"""Send meeting scheduled notification to other Webex spaces (excluding the source room)"""
@@ -1074,48 +1071,10 @@ class WebexBot(BaseBot):
 			display_timezone = timezone.replace('UTC', 'GMT')
 			notification_text = f"meeting '{meeting_title}' scheduled"
 			
-			# Create an attractive notification card
-			notification_card = {
-				"$schema": "http://adaptivecards.io/schemas/adaptive-card.json",
-				"type": "AdaptiveCard",
-				"version": "1.3",
-				"body": [
-					{
-						"type": "TextBlock",
-						"text": "📅 Meeting Scheduled",
-						"weight": "Bolder",
-						"size": "Medium",
-						"color": "Good"
-					},
-					{
-						"type": "TextBlock",
-						"text": meeting_title,
-						"weight": "Bolder",
-						"size": "Large",
-						"wrap": True
-					},
-					{
-						"type": "FactSet",
-						"facts": [
-							{
-								"title": "📅 Date & Time:",
-								"value": f"{meeting_datetime.strftime('%Y-%m-%d %H:%M')} ({display_timezone})"
-							},
-							{
-								"title": "🔗 Join Link:",
-								"value": f"[Join Meeting]({meeting_link})"
-							}
-						]
-					}
-				],
-				"actions": [
-					{
-						"type": "Action.OpenUrl",
-						"title": " Join Now",
-						"url": meeting_link
-					}
-				]
-			}
+			facts = [
+				{"title": "📅 Date & Time:", "value": f"{meeting_datetime.strftime('%Y-%m-%d %H:%M')} ({display_timezone})"},
+				{"title": "🔗 Join Link:", "value": f"[Join Meeting]({meeting_link})"}
+			]
 			
 			# Add participants info if provided
 			if participants_list:
@@ -1125,25 +1084,21 @@ class WebexBot(BaseBot):
 				else:
 					participants_display = f"{', '.join(participants_list[:3])} and {participant_count - 3} more"
 				
-				notification_card["body"][2]["facts"].append({
-					"title": "👥 Participants:",
-					"value": participants_display
-				})
+				facts.append({"title": "👥 Participants:", "value": participants_display})
+			
+			# Rendered once and shared by every room it goes to
+			notification_card = MEETING_NOTIFICATION_CARD.render(title=meeting_title, facts=facts, link=meeting_link)
 			
 			# Send notification only to "botper" room
 			notification_count = 0
 			
 			try:
-				# Get all rooms/spaces where the bot is present
-				rooms = list(self.api.rooms.list())
-				
-				for room in rooms:
+				# "botper" spaces the bot is a member of (cached until a rooms/memberships event)
+				for room in self.botper_rooms():
 					try:
-						# Only send to rooms with "botper" in the title (case insensitive)
-						if room.title and "botper" in room.title.lower():
-							self.send_message(room.id, notification_text, card=notification_card)
-							notification_count += 1
-							print(f"✅ Meeting notification sent to botper room: {room.title}")
+						self.send_message(room.id, notification_text, card=notification_card)
+						notification_count += 1
+						print(f"✅ Meeting notification sent to botper room: {room.title}")
 						
 					except Exception as room_error:
 						print(f"❌ Failed to send notification to room {room.id}: {room_error}")
@@ -1156,23 +1111,61 @@ class WebexBot(BaseBot):
 		except Exception as e:
 			print(f"❌ Error sending meeting notifications: {e}")
 
+	def send_meeting_reminder(self, task, minutes):
+		"""Remind the room a meeting task came from (or the botper spaces) that it starts soon."""
+		title = task.get("title", "Meeting")
+		meeting_link = task.get("meeting_link", "")
+		reminder_card = MEETING_REMINDER_CARD.render(
+			heading=f"⏰ Starting in {minutes} minute{'s' if minutes != 1 else ''}",
+			title=title,
+			actions=[{"type": "Action.OpenUrl", "title": " Join Now", "url": meeting_link}] if meeting_link.startswith("http") else []
+		)
+		text = f"{title} starts in {minutes} minutes"
+		if task.get("room_id"):
+			self.send_message(task["room_id"], text, card=reminder_card)
+			return
+		for room in self.botper_rooms():
+			self.send_message(room.id, text, card=reminder_card)
+
 	def handle_task_command(self, command, room_id, data=None):
 		if command == "create":
 			task = {"title": data["title"], "completed": False}
-			result = self.task_manager.create_task(task)
+			try:
+				result = self.task_manager.create_task(task, tenant=self.tenant_for(room_id))
+			except Exception as e:
+				self.send_message(room_id, f"ERROR: Error creating task: {e}")
+				return
 			self.send_message(room_id, f"OK: Task created: {data['title']}")
-			self.handle_task_command("list", room_id)
+			self.refresh_task_list(room_id)
 		elif command == "list":
-			tasks = self.task_manager.list_tasks()
-			card = format_task_card(tasks, platform="webex")
-			self.send_message(room_id, "📋 Tasks", card=card)
+			self.send_task_list(room_id)
+			if self.live_updates is not None:
+				self.live_updates.track_view(self.platform, room_id, self.tenant_for(room_id))
 		elif command == "delete":
 			try:
-				self.task_manager.delete_task(data["task_id"])
+				if self.task_manager.delete_task(data["task_id"], tenant=self.tenant_for(room_id)) is None:
+					self.send_message(room_id, "ERROR: Task not found!")
+					return
 				self.send_message(room_id, "OK: Task deleted successfully!")
-				self.handle_task_command("list", room_id)
+				self.refresh_task_list(room_id)
+			except (InvalidId, TypeError):
+				self.send_message(room_id, "ERROR: Task not found!")
 			except Exception as e:
 				self.send_message(room_id, f"ERROR: Error deleting task: {e}")
+		elif command == "search":
+			query = data.get("query", "")
+			if not query:
+				self.send_message(room_id, "Usage: find <words in the task title>")
+				return
+			page = data.get("page", 0)
+			tasks, has_more = self.task_manager.search_tasks(query, page=page, tenant=self.tenant_for(room_id))
+			card = format_search_card(tasks, query, page=page, has_more=has_more, platform="webex")
+			self.send_message(room_id, f"🔍 Tasks matching '{query}'", card=card)
+
+	def send_task_list(self, room_id):
+		tasks = self.task_manager.list_task_records(tenant=self.tenant_for(room_id))
+		card = format_task_card(tasks, platform="webex")
+		self.send_message(room_id, "📋 Tasks", card=card, replace_key="task_list")
 
 	def handle_meeting_command(self, command, room_id, data=None):
 		"""Handle meeting-related commands (schedule, list, etc.)."""
@@ -1180,25 +1173,28 @@ class WebexBot(BaseBot):
 			meeting_title = data.get("title", "New Meeting") if data else "New Meeting"
 			self.redirect_to_webex_meeting(room_id, data.get("person_id") if data else None, meeting_title)
 		elif command == "list":
-			# List existing meeting tasks
-			tasks = self.task_manager.list_tasks()
-			meeting_tasks = [task for task in tasks if task.get("type") == "meeting"]
-			if meeting_tasks:
-				card = format_task_card(meeting_tasks, platform="webex")
+			# Upcoming meetings from this room or hosted by whoever asked, within the room's org
+			from datetime import datetime, timedelta
+			now = datetime.utcnow()
+			meetings = self.meeting_manager.meetings_between(now, now + timedelta(days=30), room_id=room_id, host_email=(data or {}).get("person_email"), tenant=self.tenant_for(room_id))
+			if meetings:
+				card = format_meeting_card(meetings, "📅 Upcoming Meetings", platform="webex")
 				self.send_message(room_id, "Here are your scheduled meetings:", card=card)
 			else:
 				self.send_message(room_id, "No meetings scheduled yet. Create a meeting in Webex and I'll automatically detect it!")
+		elif command in ("today", "week"):
+			start, end = day_range() if command == "today" else week_range()
+			# Meetings scheduled from this room or hosted by whoever asked
+			meetings = self.meeting_manager.meetings_between(start, end, room_id=room_id, host_email=(data or {}).get("person_email"), tenant=self.tenant_for(room_id))
+			heading = "📅 Meetings Today" if command == "today" else "📅 Meetings This Week"
+			self.send_message(room_id, heading, card=format_meeting_card(meetings, heading, platform="webex"))
 		else:
-			self.send_message(room_id, "Available meeting commands: schedule, list")
+			self.send_message(room_id, "Available meeting commands: schedule, list, today, this week")
 
 	def handle_meeting_request(self, room_id, person_id, person_email, meeting_title):
 		"""Handle meeting creation request - try OAuth first, fallback to redirect"""
 		# First, check if user has authorized OAuth
-		user_token = None
-		for user_id, token_data in self.user_tokens.items():
-			if token_data.get('user_info', {}).get('emails', [None])[0] == person_email:
-				user_token = token_data
-				break
+		user_token = self.token_store.find_by_email(person_email)
 		
 		if user_token:
 			# User has OAuth token - create meeting directly
@@ -1220,7 +1216,8 @@ class WebexBot(BaseBot):
 				}
 				
 				# Create meeting using user's OAuth token
-				meeting = self.oauth_handler.create_meeting(user_token['access_token'], meeting_details)
+				access_token = self.token_store.access_token(user_token, self.oauth_handler.refresh_access_token)
+				meeting = self.oauth_handler.create_meeting(access_token, meeting_details)
 				
 				# Create task with meeting link automatically
 				meeting_link = meeting.get('webLink', 'No link available')
@@ -1230,11 +1227,13 @@ class WebexBot(BaseBot):
 					"type": "meeting",
 					"meeting_link": meeting_link,
 					"platform": "webex",
-					"start_time": start_time.strftime('%Y-%m-%dT%H:%M:%SZ')
+					"start_time": start_time.strftime('%Y-%m-%dT%H:%M:%SZ'),
+					"room_id": room_id
 				}
 				
 				try:
-					task_result = self.task_manager.create_task(task)
+					task_result = self.task_manager.upsert_meeting_task(meeting.get('id'), task, tenant=self.tenant_for(room_id))
+					self.calendar_sync.record_meeting(meeting, person_email, room_id, tenant=self.tenant_for(room_id))
 					print(f"✅ Task created automatically for meeting: {meeting_title}")
 				except Exception as task_error:
 					print(f"❌ Failed to create task for meeting: {task_error}")
@@ -1267,56 +1266,7 @@ class WebexBot(BaseBot):
 	def handle_modify_task(self, room_id, task_id, current_title):
 		"""Handle modify task action - create an input form"""
 		try:
-			# Create an Adaptive Card for task modification
-			modify_card = {
-				"$schema": "http://adaptivecards.io/schemas/adaptive-card.json",
-				"type": "AdaptiveCard",
-				"version": "1.3",
-				"body": [
-					{
-						"type": "TextBlock",
-						"text": "Modify Task",
-						"weight": "Bolder",
-						"size": "Large",
-						"horizontalAlignment": "Center"
-					},
-					{
-						"type": "TextBlock",
-						"text": "Current title:",
-						"weight": "Bolder"
-					},
-					{
-						"type": "TextBlock",
-						"text": current_title,
-						"color": "Attention",
-						"isSubtle": True
-					},
-					{
-						"type": "Input.Text",
-						"id": "new_title",
-						"placeholder": "Enter new task title...",
-						"value": current_title
-					}
-				],
-				"actions": [
-					{
-						"type": "Action.Submit",
-						"title": "Save Changes",
-						"data": {
-							"action": "update",
-							"task_id": task_id
-						}
-					},
-					{
-						"type": "Action.Submit", 
-						"title": "Cancel",
-						"data": {
-							"action": "cancel"
-						}
-					}
-				]
-			}
-			
+			modify_card = MODIFY_TASK_CARD.render(title=current_title, task_id=task_id)
 			self.send_message(room_id, "Please modify your task:", card=modify_card)
 			
 		except Exception as e:
@@ -1329,10 +1279,10 @@ class WebexBot(BaseBot):
 				self.send_message(room_id, "ERROR: Task title cannot be empty!")
 				return
 				
-			update_result = self.task_manager.update_task(task_id, {"title": new_title.strip()})
+			update_result = self.task_manager.update_task(task_id, {"title": new_title.strip()}, tenant=self.tenant_for(room_id))
 			if update_result.modified_count > 0:
 				self.send_message(room_id, f"OK: Task updated successfully!")
-				self.handle_task_command("list", room_id)
+				self.refresh_task_list(room_id)
 			else:
 				self.send_message(room_id, "ERROR: Task not found or no changes made.")
 				
@@ -1344,13 +1294,13 @@ class WebexBot(BaseBot):
 		try:
 			# Toggle the completion status
 			new_status = not current_status
-			update_result = self.task_manager.update_task(task_id, {"completed": new_status})
+			update_result = self.task_manager.update_task(task_id, {"completed": new_status}, tenant=self.tenant_for(room_id))
 			
 			if update_result.modified_count > 0:
 				status_text = "completed" if new_status else "reopened"
 				self.send_message(room_id, f"✅ Task marked as {status_text}!")
 				# Refresh the task list to show the updated status
-				self.handle_task_command("list", room_id)
+				self.refresh_task_list(room_id)
 			else:
 				self.send_message(room_id, "ERROR: Task not found or no changes made.")
 				
@@ -1360,86 +1310,15 @@ class WebexBot(BaseBot):
 	def show_task_creation_form(self, room_id):
 		"""Show a form to create a new task"""
 		try:
-			task_form_card = {
-				"$schema": "http://adaptivecards.io/schemas/adaptive-card.json",
-				"type": "AdaptiveCard",
-				"version": "1.3",
-				"body": [
-					{
-						"type": "TextBlock",
-						"text": "📋 Create New Task",
-						"weight": "Bolder",
-						"size": "Large",
-						"horizontalAlignment": "Center",
-						"color": "Good"
-					},
-					{
-						"type": "Input.Text",
-						"id": "task_title",
-						"placeholder": "Enter your task description...",
-						"isRequired": True,
-						"label": "Task Description"
-					}
-				],
-				"actions": [
-					{
-						"type": "Action.Submit",
-						"title": "✅ Create Task",
-						"data": {
-							"action": "create_task_submit"
-						}
-					},
-					{
-						"type": "Action.Submit",
-						"title": "❌ Cancel",
-						"data": {
-							"action": "cancel_form"
-						}
-					}
-				]
-			}
-			
-			self.send_message(room_id, "Please enter your task details:", card=task_form_card)
+			self.send_message(room_id, "Please enter your task details:", card=TASK_FORM_CARD.render())
 			
 		except Exception as e:
 			self.send_message(room_id, f"ERROR: Error creating task form: {e}")
 
-	def show_meeting_creation_form(self, room_id):
+	def show_meeting_creation_form(self, room_id, message="Meeting creation options:"):
 		"""Show options for meeting creation"""
 		try:
-			port = getattr(self, 'current_port', 8001)
-			meeting_options_card = {
-				"$schema": "http://adaptivecards.io/schemas/adaptive-card.json",
-				"type": "AdaptiveCard",
-				"version": "1.3",
-				"body": [
-					{
-						"type": "TextBlock",
-						"text": "Schedule a meeting ",
-						"weight": "Bolder",
-						"size": "Large",
-						"horizontalAlignment": "Center",
-						"color": "Good"
-					},
-					{
-						"type": "TextBlock",
-						"text": "Click on the following link to create a meeting :",
-						"wrap": True,
-						"horizontalAlignment": "Center",
-						"spacing": "Medium"
-					},
-					{
-						"type": "TextBlock",
-						"text": "[Schedule Webex Meeting](http://localhost:8000/auth/webex)",
-						"wrap": True,
-                        "horizontalAlignment": "Center",
-						"isSubtle": True
-					}
-
-				]
-			}
-			
-			self.send_message(room_id, "Meeting creation options:", card=meeting_options_card)
+			self.send_message(room_id, message, card=MEETING_OPTIONS_CARD.render())
 			
 		except Exception as e:
 			self.send_message(room_id, f"ERROR: Error creating meeting form: {e}")
@@ -1448,7 +1327,7 @@ class WebexBot(BaseBot):
 		"""Redirect user to Webex native scheduler with automatic detection"""
 		# Get person email for meeting matching
 		try:
-			person = self.api.people.get(person_id)
+			person = self.get_person(person_id)
 			person_email = person.emails[0] if person.emails else "unknown@example.com"
 		except:
 			person_email = "unknown@example.com"
@@ -1466,7 +1345,6 @@ class WebexBot(BaseBot):
 		# Try to create the meeting automatically using Webex API
 		try:
 			# Create meeting using Webex Meetings API
-			import requests
 			from datetime import datetime, timedelta
 			
 			# Get access token from environment
@@ -1490,7 +1368,7 @@ class WebexBot(BaseBot):
 			}
 			
 			# Create meeting via API
-			response = requests.post(
+			response = self.session.post(
 				"https://webexapis.com/v1/meetings",
 				json=meeting_data,
 				headers=headers
@@ -1507,10 +1385,13 @@ class WebexBot(BaseBot):
 						"completed": False,
 						"type": "meeting", 
 						"meeting_link": meeting_link,
-						"platform": "webex"
+						"platform": "webex",
+						"start_time": meeting_info.get("start", ""),
+						"room_id": room_id
 					}
 					
-					self.task_manager.create_task(task)
+					self.task_manager.upsert_meeting_task(meeting_info.get('id'), task, tenant=self.tenant_for(room_id))
+					self.calendar_sync.record_meeting(meeting_info, person_email, room_id, tenant=self.tenant_for(room_id))
 					
 					# Send notification to Webex spaces
 					try:
@@ -1526,36 +1407,11 @@ class WebexBot(BaseBot):
 						print(f"❌ Failed to send meeting notification: {notification_error}")
 					
 					# Send success message with meeting details
-					success_card = {
-						"$schema": "http://adaptivecards.io/schemas/adaptive-card.json",
-						"type": "AdaptiveCard",
-						"version": "1.3",
-						"body": [
-							{
-								"type": "TextBlock",
-								"text": "✅ Meeting Created Successfully!",
-								"weight": "Bolder",
-								"size": "Large",
-								"color": "Good"
-							},
-							{
-								"type": "TextBlock",
-								"text": f"📞 {meeting_title}",
-								"weight": "Bolder"
-							},
-							{
-								"type": "TextBlock",
-								"text": f"🕐 {start_time.strftime('%m/%d/%Y at %I:%M %p')}",
-								"isSubtle": True
-							},
-							{
-								"type": "TextBlock",
-								"text": f"🔗 [Join Meeting]({meeting_link})",
-								"wrap": True
-							}
-						]
-					}
-					
+					success_card = MEETING_CREATED_CARD.render(
+						title=f"📞 {meeting_title}",
+						when=f"🕐 {start_time.strftime('%m/%d/%Y at %I:%M %p')}",
+						link=f"🔗 [Join Meeting]({meeting_link})"
+					)
 					self.send_message(room_id, f"✅ **Meeting created and task added automatically!**", card=success_card)
 					return
 			
@@ -1563,37 +1419,7 @@ class WebexBot(BaseBot):
 			print(f"Error creating meeting automatically: {e}")
 		
 		# Fallback: If automatic creation fails, show manual instructions
-		fallback_card = {
-				"$schema": "http://adaptivecards.io/schemas/adaptive-card.json",
-				"type": "AdaptiveCard",
-				"version": "1.3",
-				"body": [
-					{
-						"type": "TextBlock",
-						"text": "Schedule a meeting ",
-						"weight": "Bolder",
-						"size": "Large",
-						"horizontalAlignment": "Center",
-						"color": "Good"
-					},
-					{
-						"type": "TextBlock",
-						"text": "Click on the following link to create a meeting :",
-						"wrap": True,
-						"horizontalAlignment": "Center",
-						"spacing": "Medium"
-					},
-					{
-						"type": "TextBlock",
-						"text": "[Schedule Webex Meeting](http://localhost:8000/auth/webex)",
-						"wrap": True,
-                        "horizontalAlignment": "Center",
-						"isSubtle": True
-					}
-
-				]
-			}
-		
+		self.show_meeting_creation_form(room_id, f"Could not create '{meeting_title}' automatically. Schedule it from here:")
 
 	def handle_meeting_link_save(self, room_id, person_id, meeting_title, meeting_link):
 		"""Save the meeting as a task with the provided link"""
@@ -1614,7 +1440,7 @@ class WebexBot(BaseBot):
 				"platform": "webex"
 			}
 			
-			result = self.task_manager.create_task(task)
+			result = self.task_manager.create_task(task, tenant=self.tenant_for(room_id))
 			
 			# Clean up session
 			if session_key in self.pending_meeting_tasks:
@@ -1630,7 +1456,7 @@ class WebexBot(BaseBot):
 			self.send_message(room_id, confirmation)
 			
 			# Show updated task list
-			self.handle_task_command("list", room_id)
+			self.refresh_task_list(room_id)
 			
 		except Exception as e:
 			self.send_message(room_id, f"❌ Error saving meeting: {e}")
@@ -1682,7 +1508,13 @@ class WebexBot(BaseBot):
 				if session_key_to_remove:
 					del self.pending_meeting_tasks[session_key_to_remove]
 			else:
-				print(f"No matching request found for meeting: '{meeting_title}' by {host_email}")
+				host = self.token_store.find_by_email(host_email) if host_email else None
+				if host:
+					# Not requested through Botper, but the host authorized us: track it like calendar sync would
+					self.calendar_sync.upsert_meeting(meeting_data, host_email, tenant=host.get('org_id'))
+					print(f"Synced meeting '{meeting_title}' for authorized host {host_email}")
+				else:
+					print(f"No matching request found for meeting: '{meeting_title}' by {host_email}")
 				
 		except Exception as e:
 			print(f"Error handling meeting webhook: {e}")
@@ -1726,10 +1558,12 @@ class WebexBot(BaseBot):
 				"type": "meeting",
 				"meeting_link": web_link,
 				"platform": "webex",
-				"start_time": start_time
+				"start_time": start_time,
+				"room_id": room_id
 			}
 			
-			result = self.task_manager.create_task(task)
+			result = self.task_manager.upsert_meeting_task(meeting_data.get('id'), task, tenant=self.tenant_for(room_id))
+			self.calendar_sync.record_meeting(meeting_data, request.get('person_email'), room_id, tenant=self.tenant_for(room_id))
 			
 			# Send automatic confirmation
 			confirmation = f"🎉 **MEETING AUTOMATICALLY DETECTED!**\n\n"
@@ -1749,7 +1583,7 @@ class WebexBot(BaseBot):
 			self.send_message(room_id, confirmation)
 			
 			# Show updated task list
-			self.handle_task_command("list", room_id)
+			self.refresh_task_list(room_id)
 			
 			print(f"✅ Automatically created task for meeting: {meeting_title}")
 			
@@ -1761,163 +1595,20 @@ class WebexBot(BaseBot):
 			except:
 				pass
 
-	def start_calendar_monitoring(self):
-		"""Start monitoring calendar events for Webex meetings - DISABLED"""
-		# NOTE: Calendar monitoring disabled because bot tokens don't have meeting API scopes
-		# This feature requires user OAuth tokens with meeting:schedules_read scope
-		print("📝 Calendar monitoring disabled - requires OAuth user tokens")
-		return
-		
-		# Original code kept for reference but disabled:
-		# import threading
-		# import time
-		# 
-		# def calendar_monitor():
-		# 	print("🗓️ Starting Webex calendar monitoring...")
-		# 	while True:
-		# 		try:
-		# 			self.check_calendar_events()
-		# 			time.sleep(30)  # Check every 30 seconds
-		# 		except Exception as e:
-		# 			print(f"❌ Calendar monitoring error: {e}")
-		# 			time.sleep(60)  # Wait longer on error
-		
-		# Start monitoring in background thread
-		# monitor_thread = threading.Thread(target=calendar_monitor, daemon=True)
-		# monitor_thread.start()
+	def start_background_jobs(self):
+		self.start_calendar_monitoring()
 
-	# def check_calendar_events(self):
-	# 	"""Check calendar for new Webex meetings and create tasks"""
-	# 	import requests
-	# 	from datetime import datetime, timedelta
-	# 	
-	# 	try:
-	# 		print("🔍 Checking for calendar events...")
-	# 		
-	# 		# Get events from Webex Events API
-	# 		headers = {
-	# 			"Authorization": f"Bearer {self.access_token}",
-	# 			"Content-Type": "application/json"
-	# 		}
-	# 		
-	# 		# Get meetings for the next 7 days
-	# 		from_date = datetime.now().isoformat() + "Z" 
-	# 		to_date = (datetime.now() + timedelta(days=7)).isoformat() + "Z"
-	# 		
-	# 		print(f"📅 Searching meetings from {from_date} to {to_date}")
-	# 		
-	# 		# Try Webex Meetings API (most likely to work)
-	# 		meetings_url = f"https://webexapis.com/v1/meetings"
-	# 		params = {
-	# 			"from": from_date,
-	# 			"to": to_date,
-	# 			"max": 100
-	# 		}
-	# 		
-	# 		print(f"🌐 Calling: {meetings_url}")
-	# 		response = requests.get(meetings_url, headers=headers, params=params)
-	# 		print(f"📡 Response status: {response.status_code}")
-	# 		
-	# 		if response.status_code == 200:
-	# 			meetings_data = response.json()
-	# 			meetings = meetings_data.get('items', [])
-	# 			print(f"📋 Found {len(meetings)} meetings")
-	# 			
-	# 			for meeting in meetings:
-	# 				print(f"🎯 Processing meeting: {meeting.get('title', 'No title')}")
-	# 				self.process_meeting_event(meeting)
-	# 		else:
-	# 			print(f"❌ Meetings API failed with status {response.status_code}")
-	# 			print(f"📄 Response: {response.text[:200]}...")
-	# 			
-	# 			# Try alternative: Get user's own meetings
-	# 			alt_url = "https://webexapis.com/v1/meetings"
-	# 			alt_response = requests.get(alt_url, headers=headers)
-	# 			print(f"🔄 Alternative API status: {alt_response.status_code}")
-	# 			
-	# 			if alt_response.status_code == 200:
-	# 				alt_data = alt_response.json()
-	# 				alt_meetings = alt_data.get('items', [])
-	# 				print(f"📋 Alternative found {len(alt_meetings)} meetings")
-	# 				
-	# 				for meeting in alt_meetings:
-	# 					self.process_meeting_event(meeting)
-	# 			
-	# 	except Exception as e:
-	# 		print(f"❌ Error checking calendar events: {e}")
-	# 		import traceback
-	# 		print(f"🔍 Full error: {traceback.format_exc()}")
+	def stop_background_jobs(self, timeout=None):
+		self.calendar_sync.stop(timeout)
 
-	# def process_calendar_event(self, event):
-	# 	"""Process a calendar event and create task if it's a Webex meeting"""
-	# 	try:
-	# 		event_id = event.get('id')
-	# 		event_title = event.get('title', 'Webex Meeting')
-	# 		event_start = event.get('start')
-	# 		web_link = event.get('webLink')
-	# 		
-	# 		# Check if we've already processed this event
-	# 		if event_id in self.processed_events:
-	# 			return
-	# 		
-	# 		# Only process if it has a Webex link
-	# 		if web_link and 'webex.com' in web_link:
-	# 			# Mark as processed
-	# 			self.processed_events.add(event_id)
-	# 			
-	# 			# Create task
-	# 			task = {
-	# 				"title": f"Scheduled meeting ({event_title})",
-	# 				"completed": False,
-	# 				"type": "meeting",
-	# 				"meeting_link": web_link,
-	# 				"platform": "webex",
-	# 				"meeting_time": event_start
-	# 			}
-	# 			
-	# 			result = self.task_manager.create_task(task)
-	# 			print(f"✅ Auto-created task from calendar: {event_title}")
-	# 			
-	# 	except Exception as e:
-	# 		print(f"❌ Error processing calendar event: {e}")
+	def close(self, timeout=None):
+		"""Flush per-process state on shutdown (runs on every replica, leader or not)."""
+		if self.recorder is not None:
+			self.recorder.stop(timeout)
 
-	# def process_meeting_event(self, meeting):
-	# 	"""Process a meeting event from meetings API"""
-	# 	try:
-	# 		meeting_id = meeting.get('id')
-	# 		meeting_title = meeting.get('title', 'Webex Meeting')
-	# 		meeting_start = meeting.get('start')
-	# 		web_link = meeting.get('webLink')
-	# 		
-	# 		print(f"🔍 Processing meeting ID: {meeting_id}")
-	# 		print(f"📝 Title: {meeting_title}")
-	# 		print(f"🔗 Link: {web_link}")
-	# 		print(f"⏰ Start: {meeting_start}")
-	# 		
-	# 		# Check if we've already processed this meeting
-	# 		if meeting_id in self.processed_events:
-	# 			print(f"⏭️ Already processed meeting: {meeting_id}")
-	# 			return
-	# 		
-	# 		# Mark as processed
-	# 		self.processed_events.add(meeting_id)
-	# 		print(f"✅ Marked as processed: {meeting_id}")
-	# 		
-	# 		# Create task
-	# 		task = {
-	# 			"title": f"Scheduled meeting ({meeting_title})",
-	# 			"completed": False,
-	# 			"type": "meeting",
-	# 			"meeting_link": web_link,
-	# 			"platform": "webex",
-	# 			"meeting_time": meeting_start
-	# 		}
-	# 		
-	# 		print(f"📋 Creating task: {task['title']}")
-	# 		result = self.task_manager.create_task(task)
-	# 		print(f"🎉 Auto-created task from meeting API: {meeting_title}")
-	# 		
-	# 	except Exception as e:
-	# 		print(f"❌ Error processing meeting: {e}")
-	# 		import traceback
-	# 		print(f"🔍 Full error: {traceback.format_exc()}")
\ No newline at end of file
+	def start_calendar_monitoring(self):
+		"""Periodically sync authorized users' Webex meetings into tasks."""
+		if not self.oauth_handler.client_id:
+			print("📝 Calendar sync disabled - WEBEX_CLIENT_ID not configured")
+			return
+		self.calendar_sync.start()
@@ -0,0 +1,124 @@
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+# Seconds between sync rounds over every authorized user
+CALENDAR_SYNC_INTERVAL = float(os.getenv("BOTPER_CALENDAR_SYNC_INTERVAL", "300"))
+# Users synced in parallel; each holds one Webex API call at a time
+CALENDAR_SYNC_CONCURRENCY = int(os.getenv("BOTPER_CALENDAR_SYNC_CONCURRENCY", "4"))
+# How far ahead meetings are turned into tasks
+CALENDAR_SYNC_HORIZON_DAYS = int(os.getenv("BOTPER_CALENDAR_SYNC_HORIZON_DAYS", "14"))
+# Re-read this much before the watermark to absorb clock skew between us and Webex
+WATERMARK_OVERLAP = timedelta(minutes=5)
+
+def format_time(dt):
+	return dt.strftime('%Y-%m-%dT%H:%M:%SZ')
+
+class WebexCalendarSync:
+	"""Turns meetings from authorized users' Webex calendars into tasks.
+
+	Each user's token is read from the TokenStore and refreshed when close
+	to expiry. Per user, the `calendar` watermark records how far the last
+	successful sync got; the next one only asks Webex for meetings starting
+	after it (minus a small overlap) up to the horizon, so past meetings are
+	never fetched again. Meetings are upserted by meeting id, which makes
+	repeated syncs and the `meetings` webhook idempotent. Each meeting is
+	also stored in the `meetings` collection for range views.
+	"""
+
+	def __init__(self, oauth_handler, token_store, task_manager, meeting_manager, interval=CALENDAR_SYNC_INTERVAL, concurrency=CALENDAR_SYNC_CONCURRENCY):
+		self.oauth_handler = oauth_handler
+		self.token_store = token_store
+		self.task_manager = task_manager
+		self.meeting_manager = meeting_manager
+		self.interval = interval
+		self.concurrency = concurrency
+		self.stopping = threading.Event()
+		self.thread = None
+
+	def start(self):
+		if self.thread is not None:
+			return
+		self.stopping.clear()
+		self.thread = threading.Thread(target=self._run, name="botper-calendar-sync", daemon=True)
+		self.thread.start()
+
+	def stop(self, timeout=None):
+		self.stopping.set()
+		if self.thread is not None:
+			self.thread.join(timeout)
+			self.thread = None
+
+	def _run(self):
+		while not self.stopping.is_set():
+			try:
+				self.sync_all()
+			except Exception as e:
+				print(f"Calendar sync error: {e}")
+			self.stopping.wait(self.interval)
+
+	def sync_all(self):
+		"""Sync every user with a stored token, at most `concurrency` at a time; returns meetings upserted."""
+		users = self.token_store.all()
+		if not users:
+			return 0
+		with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="botper-calendar") as pool:
+			return sum(pool.map(self._sync_user_safely, users))
+
+	def _sync_user_safely(self, doc):
+		try:
+			return self.sync_user(doc)
+		except Exception as e:
+			print(f"Calendar sync failed for {doc.get('email') or doc['user_id']}: {e}")
+			return 0
+
+	def sync_user(self, doc):
+		now = datetime.utcnow()
+		watermark = doc.get('watermarks', {}).get('calendar')
+		start = watermark - WATERMARK_OVERLAP if watermark else now
+		params = {'from': format_time(start), 'to': format_time(now + timedelta(days=CALENDAR_SYNC_HORIZON_DAYS)), 'max': 100}
+		try:
+			meetings = self.oauth_handler.list_meetings(self.token_store.access_token(doc, self.oauth_handler.refresh_access_token), params)
+		except Exception as e:
+			if getattr(e, 'status_code', None) != 401 or not doc.get('refresh_token'):
+				raise
+			# Revoked before our recorded expiry: force one refresh and retry
+			doc['expires_at'] = 0
+			meetings = self.oauth_handler.list_meetings(self.token_store.access_token(doc, self.oauth_handler.refresh_access_token), params)
+		for meeting in meetings:
+			self.upsert_meeting(meeting, doc.get('email'), tenant=doc.get('org_id'))
+		self.token_store.set_watermark(doc['user_id'], 'calendar', now)
+		return len(meetings)
+
+	def record_meeting(self, meeting, host_email=None, room_id=None, tenant=None):
+		"""Store one Webex meeting object in the meetings collection."""
+		if not meeting.get('id'):
+			return None
+		record = {
+			"title": meeting.get('title', 'Webex Meeting'),
+			"platform": "webex",
+			"meeting_link": meeting.get('webLink', ''),
+			"start_time": meeting.get('start', ''),
+			"end_time": meeting.get('end', ''),
+			"timezone": meeting.get('timezone'),
+			"host_email": meeting.get('hostEmail') or host_email
+		}
+		if room_id:
+			record["room_id"] = room_id
+		return self.meeting_manager.upsert_meeting(meeting['id'], record, tenant=tenant)
+
+	def upsert_meeting(self, meeting, host_email=None, tenant=None):
+		"""Create or refresh the meeting record and task for one Webex meeting object."""
+		self.record_meeting(meeting, host_email, tenant=tenant)
+		task = {
+			"title": f"📞 {meeting.get('title', 'Webex Meeting')}",
+			"completed": False,
+			"type": "meeting",
+			"meeting_link": meeting.get('webLink', 'No link available'),
+			"platform": "webex",
+			"start_time": meeting.get('start', ''),
+			"host_email": meeting.get('hostEmail') or host_email
+		}
+		return self.task_manager.upsert_meeting_task(meeting.get('id'), task, tenant=tenant)
@@ -1,69 +1,151 @@
 
 import os
+import sys
+import hmac
+import hashlib
+import time
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from bson.errors import InvalidId
 from fastapi import FastAPI, Request
-from ..core.base_bot import BaseBot
-from ..core.tasks import TaskManager
-from ..core.meetings import MeetingManager
-from ..utils.helpers import format_task_card
-from dotenv import load_dotenv
+from core.base_bot import BaseBot
+from core.tasks import TaskManager
+from core.meetings import MeetingManager
+from core.workers import WorkerPool
+from core.outbox import Outbox
+from core.commands import CommandRouter, CommandContext, register_task_commands
+from utils.helpers import format_task_card, format_search_card
+from utils.json_codec import FastJSONResponse, loads
+from platforms.zoom_connector import ZoomConnector
+from core.config import load_config
+
+load_config()
 
-load_dotenv()
+ZOOM_CLIENT_ID = os.getenv("ZOOM_CLIENT_ID")
+ZOOM_CLIENT_SECRET = os.getenv("ZOOM_CLIENT_SECRET")
+ZOOM_BOT_JID = os.getenv("ZOOM_BOT_JID")
+ZOOM_ACCOUNT_ID = os.getenv("ZOOM_ACCOUNT_ID")
+# Webhook secret token from the Zoom app; every event must carry its signature
+ZOOM_SECRET_TOKEN = os.getenv("ZOOM_SECRET_TOKEN")
+# Signed events older (or newer) than this many seconds are rejected as replays
+ZOOM_SIGNATURE_MAX_AGE = 300
 
 class ZoomBot(BaseBot):
-	def __init__(self):
-		self.task_manager = TaskManager()
-		self.meeting_manager = MeetingManager()
-		self.app = FastAPI()
+	platform = "zoom"
+
+	def __init__(self, app=None, task_manager=None, meeting_manager=None, workers=None, outbox=None, live_updates=None):
+		if not ZOOM_SECRET_TOKEN:
+			raise Exception("ZOOM_SECRET_TOKEN is not set: Zoom webhooks cannot be verified")
+		self.task_manager = task_manager or TaskManager()
+		self.meeting_manager = meeting_manager or MeetingManager()
+		self.workers = workers or WorkerPool()
+		self.outbox = outbox or Outbox()
+		self.connector = ZoomConnector(ZOOM_CLIENT_ID, ZOOM_CLIENT_SECRET, ZOOM_BOT_JID, ZOOM_ACCOUNT_ID)
+		self.outbox.register_sender('zoom', self.deliver_message, update=self.connector.update, delete=self.connector.delete)
+		self.live_updates = live_updates
+		self.app = app or FastAPI(default_response_class=FastJSONResponse)
+		self.commands = register_task_commands(CommandRouter(), self)
 		self.setup_routes()
 
 	def setup_routes(self):
 		@self.app.post("/zoom/webhook")
 		async def webhook(request: Request):
-			data = await request.json()
-			# Simplified: parse incoming Zoom message
-			text = data.get('payload', {}).get('cmd', '').strip().lower()
-			to_jid = data.get('payload', {}).get('toJid', '')
-			if text == "hello" or text == "hi":
-				self.send_greeting(to_jid)
-			elif text.startswith("task"):
-				task_title = text[5:].strip()
-				if task_title:
-					self.handle_task_command("create", to_jid, {"title": task_title})
-			elif text == "list":
-				self.handle_task_command("list", to_jid)
-			elif text.startswith("delete"):
-				task_id = text[7:].strip()
-				self.handle_task_command("delete", to_jid, {"task_id": task_id})
-			# Add more command handling as needed
+			body = await request.body()
+			# Reject forged or replayed events before parsing them or queueing any work
+			if not self.verify_signature(body, request.headers.get('x-zm-request-timestamp'), request.headers.get('x-zm-signature')):
+				return FastJSONResponse({"status": "unauthorized"}, status_code=401)
+			data = loads(body)
+			# Zoom checks the endpoint by asking us to sign a plain token
+			if data.get('event') == 'endpoint.url_validation':
+				plain_token = data.get('payload', {}).get('plainToken', '')
+				encrypted = hmac.new(ZOOM_SECRET_TOKEN.encode(), plain_token.encode(), hashlib.sha256).hexdigest()
+				return {"plainToken": plain_token, "encryptedToken": encrypted}
+			# Acknowledge right away (Zoom times out slow webhooks); handle on the worker pool
+			if not self.workers.submit(self.handle_notification, data):
+				return FastJSONResponse({"status": "busy"}, status_code=503)
 			return {"status": "ok"}
 
+	def verify_signature(self, body, timestamp, signature):
+		"""Check x-zm-signature: v0= hex HMAC-SHA256 of "v0:{timestamp}:{body}" keyed by the secret token."""
+		if not ZOOM_SECRET_TOKEN or not timestamp or not signature:
+			return False
+		try:
+			if abs(time.time() - int(timestamp)) > ZOOM_SIGNATURE_MAX_AGE:
+				return False
+		except ValueError:
+			return False
+		message = b"v0:" + timestamp.encode() + b":" + body
+		expected = "v0=" + hmac.new(ZOOM_SECRET_TOKEN.encode(), message, hashlib.sha256).hexdigest()
+		return hmac.compare_digest(expected, signature)
+
+	def handle_notification(self, data):
+		"""Process a chatbot notification off the request path."""
+		payload = data.get('payload', {})
+		text = payload.get('cmd', '')
+		to_jid = payload.get('toJid', '')
+		self.connector.save_account(to_jid, payload.get('accountId'))
+		self.task_manager.tenants.remember('zoom', to_jid, payload.get('accountId'))
+		ctx = CommandContext('zoom', to_jid, person_id=payload.get('userJid'), text=text)
+		self.commands.dispatch_text(ctx, text)
+
 	def send_greeting(self, to_jid):
 		greeting = "Hello This is Botper !  Check my menu ,I will help you set up your tasks and schedule your meetings !"
-		menu = "Commands:\n- task <task description>\n- list\n- delete <task id>\n- schedule meeting"
+		menu = "Commands:\n- task <task description>\n- list\n- find <words>\n- delete <task id>\n- schedule meeting"
 		self.send_message(to_jid, f"{greeting}\n{menu}")
 
-	def start(self):
+	def memory_stats(self):
+		return {'conversation_accounts': len(self.connector.accounts)}
+
+	def start(self, port=8002):
+		self.current_port = port
 		import uvicorn
-		uvicorn.run(self.app, host="0.0.0.0", port=8002)
+		uvicorn.run(self.app, host="0.0.0.0", port=port)
 
-	def send_message(self, to_jid, message, card=None):
-		# Placeholder: Integrate with Zoom SDK to send message/card
-		pass
+	def send_message(self, to_jid, message, card=None, replace_key=None):
+		"""Queue a message on the durable outbox; delivery and retries happen in the background."""
+		try:
+			self.outbox.enqueue('zoom', to_jid, message, card, replace_key=replace_key)
+		except Exception as e:
+			print(f"Error queueing Zoom message: {e}")
+
+	def deliver_message(self, to_jid, message, card=None):
+		"""Send a chatbot message to Zoom now; raises so the outbox can retry."""
+		return self.connector.send(to_jid, message, card=card)
 
 	def handle_task_command(self, command, to_jid, data=None):
 		if command == "create":
 			task = {"title": data["title"], "completed": False}
-			self.task_manager.create_task(task)
+			try:
+				self.task_manager.create_task(task, tenant=self.tenant_for(to_jid))
+			except Exception as e:
+				self.send_message(to_jid, f"Could not create task: {e}")
+				return
 			self.send_message(to_jid, f"Task created: {data['title']}")
-			self.handle_task_command("list", to_jid)
+			self.refresh_task_list(to_jid)
 		elif command == "list":
-			tasks = self.task_manager.list_tasks()
-			card = format_task_card(tasks, platform="zoom")
-			self.send_message(to_jid, "Here are your tasks:", card=card)
+			self.send_task_list(to_jid)
+			if self.live_updates is not None:
+				self.live_updates.track_view(self.platform, to_jid, self.tenant_for(to_jid))
 		elif command == "delete":
-			self.task_manager.delete_task(data["task_id"])
+			try:
+				deleted = self.task_manager.delete_task(data["task_id"], tenant=self.tenant_for(to_jid))
+			except (InvalidId, TypeError):
+				deleted = None
+			if deleted is None:
+				self.send_message(to_jid, f"Task not found: {data['task_id']}")
+				return
 			self.send_message(to_jid, f"Task deleted: {data['task_id']}")
-			self.handle_task_command("list", to_jid)
+			self.refresh_task_list(to_jid)
+		elif command == "search":
+			tasks, has_more = self.task_manager.search_tasks(data["query"], page=data.get("page", 0), tenant=self.tenant_for(to_jid))
+			card = format_search_card(tasks, data["query"], page=data.get("page", 0), has_more=has_more, platform="zoom")
+			self.send_message(to_jid, f"Tasks matching '{data['query']}':", card=card)
+
+	def send_task_list(self, to_jid):
+		tasks = self.task_manager.list_task_records(tenant=self.tenant_for(to_jid))
+		card = format_task_card(tasks, platform="zoom")
+		self.send_message(to_jid, "Here are your tasks:", card=card, replace_key="task_list")
 
 	def handle_meeting_command(self, command, to_jid, data=None):
 		# Meeting scheduling logic (prompt for date, users, etc.)
@@ -0,0 +1,105 @@
+
+import os
+import threading
+import time
+from core.database import MongoDB
+from utils.http import create_session
+from utils.cache import BoundedDict
+from utils.json_codec import dumps, loads
+
+TOKEN_URL = "https://zoom.us/oauth/token"
+CHAT_URL = "https://api.zoom.us/v2/im/chat/messages"
+# Refresh the chatbot token this many seconds before Zoom says it expires
+TOKEN_REFRESH_MARGIN = 300
+# Conversation -> account mappings kept in memory; older ones are re-read from Mongo when needed
+CONVERSATION_CACHE_SIZE = int(os.getenv("BOTPER_CONVERSATION_CACHE_SIZE", "10000"))
+
+class ZoomConnector:
+	"""Sends Zoom chatbot messages with a cached client-credentials token.
+
+	The token is reused until shortly before expiry, requests go over one
+	keep-alive session, and the account id each chat belongs to is kept in
+	memory and in the `zoom_conversations` collection keyed by to_jid.
+	"""
+
+	def __init__(self, client_id, client_secret, bot_jid, default_account_id=None):
+		self.client_id = client_id
+		self.client_secret = client_secret
+		self.bot_jid = bot_jid
+		self.default_account_id = default_account_id
+		self.session = create_session()
+		self.token = None
+		self.token_expires_at = 0
+		self.token_lock = threading.Lock()
+		self.accounts = BoundedDict(CONVERSATION_CACHE_SIZE)
+		self.col = MongoDB().db['zoom_conversations']
+
+	def get_token(self):
+		if self.token and time.time() < self.token_expires_at:
+			return self.token
+		with self.token_lock:
+			if self.token and time.time() < self.token_expires_at:
+				return self.token
+			response = self.session.post(
+				TOKEN_URL,
+				params={'grant_type': 'client_credentials'},
+				auth=(self.client_id, self.client_secret)
+			)
+			if response.status_code != 200:
+				raise Exception(f"Zoom token request failed: {response.status_code} - {response.text}")
+			token_data = response.json()
+			self.token = token_data['access_token']
+			self.token_expires_at = time.time() + int(token_data.get('expires_in', 3600)) - TOKEN_REFRESH_MARGIN
+			return self.token
+
+	def save_account(self, to_jid, account_id):
+		if not to_jid or not account_id or self.accounts.get(to_jid) == account_id:
+			return
+		self.accounts[to_jid] = account_id
+		self.col.update_one({'to_jid': to_jid}, {'$set': {'account_id': account_id}}, upsert=True)
+
+	def get_account(self, to_jid):
+		account_id = self.accounts.get(to_jid)
+		if account_id is None:
+			doc = self.col.find_one({'to_jid': to_jid}, {'account_id': 1})
+			account_id = doc['account_id'] if doc else self.default_account_id
+			if account_id:
+				self.accounts[to_jid] = account_id
+		return account_id
+
+	def build_content(self, text, card=None):
+		content = dict(card) if card else {"head": {"text": text}}
+		if card and text:
+			content["head"] = {"text": text, "sub_head": card.get("head", {})}
+		return content
+
+	def request(self, method, url, to_jid, body=None):
+		account_id = self.get_account(to_jid)
+		if not account_id:
+			raise Exception(f"No Zoom account id known for {to_jid}")
+		payload = {'robot_jid': self.bot_jid, 'to_jid': to_jid, 'account_id': account_id}
+		if body:
+			payload.update(body)
+		headers = {'Authorization': f"Bearer {self.get_token()}", 'Content-Type': 'application/json'}
+		if method == 'DELETE':
+			response = self.session.delete(url, params=payload, headers=headers)
+		else:
+			response = self.session.request(method, url, data=dumps(payload), headers=headers)
+		if response.status_code == 401:
+			# Token revoked or rotated early: drop it so the retry fetches a new one
+			self.token = None
+		if response.status_code not in (200, 201, 204):
+			error = Exception(f"Zoom {method} failed: {response.status_code} - {response.text}")
+			if response.status_code != 401:
+				error.status_code = response.status_code
+			raise error
+		return loads(response.content).get('message_id') if response.content else None
+
+	def send(self, to_jid, text, card=None):
+		return self.request('POST', CHAT_URL, to_jid, {'content': self.build_content(text, card)})
+
+	def update(self, to_jid, message_id, text, card=None):
+		return self.request('PUT', f"{CHAT_URL}/{message_id}", to_jid, {'content': self.build_content(text, card)})
+
+	def delete(self, to_jid, message_id):
+		return self.request('DELETE', f"{CHAT_URL}/{message_id}", to_jid)
@@ -0,0 +1,34 @@
+import json
+from utils.cards import CardTemplate, Slot, encode_with_card, ADAPTIVE_CARD_TYPE, MODIFY_TASK_CARD
+
+def test_render_fills_slots_with_json_values():
+	template = CardTemplate({'type': 'AdaptiveCard', 'body': [{'text': Slot('title')}, {'facts': Slot('facts')}]})
+	rendered = json.loads(template.render(title='Say "hi" ✅', facts=[{'title': 'a', 'value': 1}]))
+	assert rendered == {'type': 'AdaptiveCard', 'body': [{'text': 'Say "hi" ✅'}, {'facts': [{'title': 'a', 'value': 1}]}]}
+
+def test_same_slot_can_appear_twice():
+	rendered = json.loads(MODIFY_TASK_CARD.render(title='Old', task_id='t1'))
+	texts = [item.get('text') for item in rendered['body']] + [item.get('value') for item in rendered['body']]
+	assert texts.count('Old') == 2
+	assert rendered['actions'][0]['data'] == {'action': 'update', 'task_id': 't1'}
+
+def test_bind_fixes_some_slots_and_leaves_the_rest():
+	template = CardTemplate({'a': Slot('a'), 'b': Slot('b')})
+	bound = template.bind(a='fixed')
+	assert bound.names == ['b']
+	assert json.loads(bound.render(b=2)) == {'a': 'fixed', 'b': 2}
+	# Binding everything yields a constant card
+	assert json.loads(bound.bind(b=3).render()) == {'a': 'fixed', 'b': 3}
+
+def test_template_without_slots_renders_as_is():
+	assert json.loads(CardTemplate({'type': 'AdaptiveCard'}).render()) == {'type': 'AdaptiveCard'}
+
+def test_encode_with_card_splices_rendered_text_unchanged():
+	card = CardTemplate({'text': Slot('text')}).render(text='hello')
+	body = json.loads(encode_with_card({'roomId': 'r1', 'markdown': 'x'}, card))
+	assert body == {'roomId': 'r1', 'markdown': 'x', 'attachments': [{'contentType': ADAPTIVE_CARD_TYPE, 'content': {'text': 'hello'}}]}
+
+def test_encode_with_card_accepts_dict_cards_and_no_card():
+	body = json.loads(encode_with_card({'text': 'x'}, {'type': 'AdaptiveCard'}, key='cards'))
+	assert body['cards'][0]['content'] == {'type': 'AdaptiveCard'}
+	assert json.loads(encode_with_card({'text': 'x'})) == {'text': 'x'}
@@ -0,0 +1,79 @@
+import pytest
+from core.commands import CommandRouter, CommandContext, register_task_commands
+
+def ctx(text=""):
+	return CommandContext('webex', 'room-1', text=text)
+
+def test_exact_commands_ignore_case_and_surrounding_space():
+	router = CommandRouter()
+	calls = []
+	router.command("list", lambda ctx, args: calls.append(args), exact=True)
+	assert router.dispatch_text(ctx(), "  LIST ") is True
+	assert calls == [""]
+	# Exact commands don't match as a prefix
+	assert router.dispatch_text(ctx(), "list all") is False
+
+def test_prefix_commands_pass_the_rest_and_prefer_the_longest_prefix():
+	router = CommandRouter()
+	calls = []
+	router.command("schedule", lambda ctx, args: calls.append(('schedule', args)))
+	router.command("schedule meeting", lambda ctx, args: calls.append(('schedule meeting', args)))
+	router.dispatch_text(ctx(), "Schedule Meeting Weekly Sync")
+	router.dispatch_text(ctx(), "schedule lunch")
+	# Arguments keep their original case
+	assert calls == [('schedule meeting', 'Weekly Sync'), ('schedule', 'lunch')]
+
+def test_prefix_must_end_at_a_word_boundary():
+	router = CommandRouter()
+	router.command("task", lambda ctx, args: None)
+	assert router.dispatch_text(ctx(), "tasks") is False
+	assert router.dispatch_text(ctx(), "") is False
+
+def test_actions_dispatch_on_the_action_value():
+	router = CommandRouter()
+	calls = []
+	router.action("delete", lambda ctx, data: calls.append(data['task_id']))
+	assert router.dispatch_action(ctx(), {'action': 'delete', 'task_id': 'abc'}) is True
+	assert router.dispatch_action(ctx(), {'action': 'unknown'}) is False
+	assert router.dispatch_action(ctx(), {}) is False
+	assert calls == ['abc']
+
+def test_stats_count_calls_and_errors_per_command():
+	router = CommandRouter()
+	router.command("ok", lambda ctx, args: None, exact=True)
+
+	def fail(ctx, data):
+		raise RuntimeError("boom")
+
+	router.action("fail", fail)
+	router.dispatch_text(ctx(), "ok")
+	router.dispatch_text(ctx(), "ok")
+	with pytest.raises(RuntimeError):
+		router.dispatch_action(ctx(), {'action': 'fail'})
+	stats = router.stats()
+	assert stats['ok']['count'] == 2 and stats['ok']['errors'] == 0
+	assert stats['action:fail'] == dict(stats['action:fail'], count=1, errors=1)
+	assert stats['ok']['avg_ms'] >= 0
+
+class RecordingBot:
+	def __init__(self):
+		self.calls = []
+
+	def send_greeting(self, target):
+		self.calls.append(('greet', target))
+
+	def handle_task_command(self, command, target, data=None):
+		self.calls.append((command, target, data))
+
+def test_task_commands_are_the_same_on_every_platform():
+	bot = RecordingBot()
+	router = register_task_commands(CommandRouter(), bot)
+	for text in ("hi", "task Buy milk", "task", "list", "delete 42", "find milk", "find"):
+		router.dispatch_text(ctx(), text)
+	assert bot.calls == [
+		('greet', 'room-1'),
+		('create', 'room-1', {'title': 'Buy milk'}),
+		('list', 'room-1', None),
+		('delete', 'room-1', {'task_id': '42'}),
+		('search', 'room-1', {'query': 'milk', 'page': 0})
+	]
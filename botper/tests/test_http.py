@@ -0,0 +1,46 @@
+import time
+import pytest
+from utils.http import CircuitBreaker, CircuitOpenError
+
+def test_breaker_opens_after_consecutive_failures():
+	breaker = CircuitBreaker('api.example.com', failure_threshold=3, reset_timeout=60)
+	for _ in range(2):
+		breaker.before_call()
+		breaker.record_failure()
+	assert breaker.state() == 'closed'
+	breaker.record_failure()
+	assert breaker.state() == 'open'
+	with pytest.raises(CircuitOpenError) as raised:
+		breaker.before_call()
+	# Transient for the outbox: retried, not dead-lettered
+	assert raised.value.status_code == 503
+
+def test_success_resets_the_failure_count():
+	breaker = CircuitBreaker('api.example.com', failure_threshold=2, reset_timeout=60)
+	breaker.record_failure()
+	breaker.record_success()
+	breaker.record_failure()
+	assert breaker.state() == 'closed'
+
+def test_half_open_lets_one_trial_through():
+	breaker = CircuitBreaker('api.example.com', failure_threshold=1, reset_timeout=0.05)
+	breaker.record_failure()
+	time.sleep(0.06)
+	assert breaker.state() == 'half-open'
+	breaker.before_call()
+	# Everyone else keeps failing fast while the trial is in flight
+	with pytest.raises(CircuitOpenError):
+		breaker.before_call()
+	breaker.record_success()
+	assert breaker.state() == 'closed'
+	breaker.before_call()
+
+def test_failed_trial_reopens_the_breaker():
+	breaker = CircuitBreaker('api.example.com', failure_threshold=1, reset_timeout=0.05)
+	breaker.record_failure()
+	time.sleep(0.06)
+	breaker.before_call()
+	breaker.record_failure()
+	assert breaker.state() == 'open'
+	with pytest.raises(CircuitOpenError):
+		breaker.before_call()
@@ -0,0 +1,151 @@
+import threading
+import time
+import pytest
+from pymongo.errors import PyMongoError
+from core import live_updates
+from core.live_updates import TaskChangeWatcher, TaskViews, change_tenant
+
+class FakeStream:
+	"""Change stream that hands out queued events, then None (like try_next on an idle stream)."""
+
+	def __init__(self, changes, error=None):
+		self.changes = list(changes)
+		self.error = error
+		self.resume_token = None
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *exc):
+		return False
+
+	def try_next(self):
+		if self.changes:
+			change = self.changes.pop(0)
+			self.resume_token = {'_data': change['documentKey']['_id']}
+			return change
+		if self.error is not None:
+			error, self.error = self.error, None
+			raise error
+		time.sleep(0.001)
+		return None
+
+class FakeTasks:
+	def __init__(self, *streams):
+		self.streams = list(streams)
+		self.resumed_after = []
+
+	def watch(self, resume_after=None, **kwargs):
+		self.resumed_after.append(resume_after)
+		return self.streams.pop(0) if self.streams else FakeStream([])
+
+class FakeViews:
+	def __init__(self, views=()):
+		self.views = list(views)
+		self.queries = []
+
+	def owned(self, tenants=None):
+		self.queries.append(tenants)
+		return [view for view in self.views if tenants is None or view.get('tenant_id') in set(tenants) | {None}]
+
+def change(task_id, tenant=None, operation='update'):
+	event = {'operationType': operation, 'documentKey': {'_id': task_id}}
+	if tenant is not None:
+		event['fullDocument'] = {'_id': task_id, 'tenant_id': tenant}
+	return event
+
+@pytest.fixture
+def make_watcher(monkeypatch):
+	monkeypatch.setattr(live_updates, 'TaskViews', lambda: FakeViews())
+	monkeypatch.setattr(live_updates, 'REFRESH_DEBOUNCE', 0.05)
+
+	def make(tasks):
+		return TaskChangeWatcher(tasks)
+	return make
+
+def run_until(watcher, condition, timeout=2.0):
+	thread = threading.Thread(target=watcher._run, daemon=True)
+	thread.start()
+	deadline = time.monotonic() + timeout
+	while not condition() and time.monotonic() < deadline:
+		time.sleep(0.005)
+	watcher.stopping = True
+	thread.join(timeout)
+	assert not thread.is_alive()
+
+def test_burst_is_debounced_into_one_refresh_per_tenant(make_watcher):
+	watcher = make_watcher(FakeTasks(FakeStream([change(1, 'acme'), change(2, 'acme'), change(3, 'globex')])))
+	refreshes = []
+	seen = []
+	watcher.refresh_viewers = lambda tenants=None: refreshes.append(tenants)
+	watcher.subscribe(seen.append)
+	run_until(watcher, lambda: refreshes)
+	assert refreshes == [{'acme', 'globex'}]
+	# Listeners still see every raw event
+	assert [event['documentKey']['_id'] for event in seen] == [1, 2, 3]
+	assert watcher.resume_token == {'_data': 3}
+
+def test_change_without_tenant_refreshes_every_view(make_watcher):
+	watcher = make_watcher(FakeTasks(FakeStream([change(1, 'acme'), change(2, operation='delete')])))
+	refreshes = []
+	watcher.refresh_viewers = lambda tenants=None: refreshes.append(tenants)
+	run_until(watcher, lambda: refreshes)
+	assert refreshes == [None]
+
+def test_stream_error_invalidates_listeners_and_resumes(make_watcher, monkeypatch):
+	monkeypatch.setattr(live_updates.time, 'sleep', lambda seconds: None)
+	tasks = FakeTasks(FakeStream([change(1, 'acme')], error=PyMongoError("stepdown")), FakeStream([change(2, 'acme')]))
+	watcher = make_watcher(tasks)
+	refreshes = []
+	seen = []
+	watcher.refresh_viewers = lambda tenants=None: refreshes.append(tenants)
+	watcher.subscribe(seen.append)
+	run_until(watcher, lambda: len(refreshes) == 2)
+	assert {'operationType': 'invalidate'} in seen
+	# The change consumed before the error is still refreshed, then the one after resuming
+	assert refreshes == [{'acme'}, {'acme'}]
+	# The second watch resumes after the last event the first stream delivered
+	assert tasks.resumed_after[:2] == [None, {'_data': 1}]
+
+def test_refresh_viewers_renders_only_matching_owned_views(make_watcher):
+	watcher = make_watcher(FakeTasks())
+	watcher.views = FakeViews([
+		{'_id': 'webex:r1', 'platform': 'webex', 'target': 'r1', 'tenant_id': 'acme'},
+		{'_id': 'webex:r2', 'platform': 'webex', 'target': 'r2', 'tenant_id': 'globex'},
+		{'_id': 'teams:c1', 'platform': 'teams', 'target': 'c1', 'tenant_id': None},
+		{'_id': 'zoom:j1', 'platform': 'zoom', 'target': 'j1', 'tenant_id': 'acme'}
+	])
+	rendered = []
+
+	def failing(target):
+		rendered.append(('teams', target))
+		raise RuntimeError("send failed")
+
+	watcher.register('webex', lambda target: rendered.append(('webex', target)))
+	watcher.register('teams', failing)
+	# No zoom refresher registered: its view is skipped
+	watcher.refresh_viewers({'acme'})
+	assert rendered == [('webex', 'r1'), ('teams', 'c1')]
+	assert watcher.views.queries == [{'acme'}]
+
+def test_owned_views_query_is_scoped_to_this_replica_and_tenants(monkeypatch):
+	monkeypatch.setattr(live_updates, 'get_instance_id', lambda: 'host:1')
+	queries = []
+
+	class Col:
+		def find(self, query, projection):
+			queries.append(query)
+			return []
+
+	views = TaskViews.__new__(TaskViews)
+	views.col = Col()
+	views.owned(['acme'])
+	views.owned()
+	assert queries[0]['owner'] == 'host:1'
+	assert queries[0]['tenant_id'] == {'$in': ['acme', None]}
+	assert 'tenant_id' not in queries[1]
+
+def test_change_tenant_falls_back_to_the_pre_image():
+	assert change_tenant({'fullDocument': {'tenant_id': 'acme'}}) == 'acme'
+	assert change_tenant({'fullDocument': None, 'fullDocumentBeforeChange': {'tenant_id': 'globex'}}) == 'globex'
+	assert change_tenant({'operationType': 'drop'}) is None
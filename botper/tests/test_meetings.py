@@ -0,0 +1,14 @@
+from datetime import datetime
+from core.meetings import day_range, week_range
+
+def test_day_range_is_the_utc_day_containing_now():
+	assert day_range(datetime(2024, 2, 29, 23, 59, 59)) == (datetime(2024, 2, 29), datetime(2024, 3, 1))
+	assert day_range(datetime(2024, 3, 1)) == (datetime(2024, 3, 1), datetime(2024, 3, 2))
+
+def test_week_range_runs_monday_to_monday():
+	# Wednesday 2024-01-03 -> Monday 2024-01-01 .. Monday 2024-01-08
+	assert week_range(datetime(2024, 1, 3, 12)) == (datetime(2024, 1, 1), datetime(2024, 1, 8))
+	# Sunday still belongs to the week that started on Monday
+	assert week_range(datetime(2024, 1, 7, 23)) == (datetime(2024, 1, 1), datetime(2024, 1, 8))
+	# Across a year boundary
+	assert week_range(datetime(2025, 1, 1)) == (datetime(2024, 12, 30), datetime(2025, 1, 6))
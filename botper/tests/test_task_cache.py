@@ -0,0 +1,82 @@
+from core.task_cache import TaskListCache
+
+class Record:
+	__slots__ = ('_id', 'title', 'completed')
+
+	def __init__(self, _id, title, completed=False):
+		self._id = _id
+		self.title = title
+		self.completed = completed
+
+def titles(records):
+	return [record.title for record in records]
+
+def foreign_update(task_id, tenant):
+	return {'operationType': 'update', 'documentKey': {'_id': task_id}, 'fullDocument': {'_id': task_id, 'tenant_id': tenant}}
+
+def test_put_then_get_returns_a_copy():
+	cache = TaskListCache(max_entries=10)
+	cache.put('acme', [Record(1, 'a')])
+	records = cache.get('acme')
+	records.append(Record(2, 'b'))
+	assert titles(cache.get('acme')) == ['a']
+
+def test_change_during_read_keeps_the_list_out_of_the_cache():
+	cache = TaskListCache(max_entries=10)
+	generation = cache.generation('acme')
+	# Another replica writes while our Mongo read is in flight
+	cache.on_change(foreign_update(7, 'acme'))
+	assert cache.put('acme', [Record(1, 'stale')], generation=generation) is False
+	assert cache.get('acme') is None
+
+def test_change_for_another_tenant_does_not_block_put():
+	cache = TaskListCache(max_entries=10)
+	generation = cache.generation('acme')
+	cache.on_change(foreign_update(7, 'globex'))
+	assert cache.put('acme', [Record(1, 'a')], generation=generation) is True
+	assert titles(cache.get('acme')) == ['a']
+
+def test_change_with_unknown_tenant_blocks_every_read_under_way():
+	cache = TaskListCache(max_entries=10)
+	generation = cache.generation('acme')
+	cache.on_change({'operationType': 'delete', 'documentKey': {'_id': 7}})
+	assert cache.put('acme', [Record(1, 'a')], generation=generation) is False
+
+def test_local_write_during_read_keeps_the_list_out_of_the_cache():
+	cache = TaskListCache(max_entries=10)
+	generation = cache.generation('acme')
+	cache.added('acme', Record(2, 'new'))
+	assert cache.put('acme', [Record(1, 'a')], generation=generation) is False
+
+def test_own_writes_are_applied_in_place_and_their_echo_ignored():
+	cache = TaskListCache(max_entries=10)
+	cache.put('acme', [Record(1, 'a')])
+	cache.added('acme', Record(2, 'b'))
+	cache.updated(1, {'completed': True})
+	# The change stream echoes our own writes back: they must not evict the list
+	cache.on_change({'operationType': 'insert', 'documentKey': {'_id': 2}, 'fullDocument': {'_id': 2, 'tenant_id': 'acme'}})
+	cache.on_change(foreign_update(1, 'acme'))
+	records = cache.get('acme')
+	assert titles(records) == ['a', 'b']
+	assert records[0].completed is True
+
+def test_foreign_change_evicts_the_cached_list():
+	cache = TaskListCache(max_entries=10)
+	cache.put('acme', [Record(1, 'a')])
+	cache.on_change(foreign_update(1, 'acme'))
+	assert cache.get('acme') is None
+
+def test_removed_drops_the_record():
+	cache = TaskListCache(max_entries=10)
+	cache.put('acme', [Record(1, 'a'), Record(2, 'b')])
+	cache.removed(1, tenant='acme')
+	assert titles(cache.get('acme')) == ['b']
+
+def test_least_recently_used_tenant_is_evicted():
+	cache = TaskListCache(max_entries=2)
+	cache.put('a', [])
+	cache.put('b', [])
+	cache.get('a')
+	cache.put('c', [])
+	assert cache.get('b') is None
+	assert cache.get('a') == []
@@ -0,0 +1,70 @@
+
+import threading
+import time
+from collections import OrderedDict
+
+class TTLCache:
+	"""Thread-safe LRU cache whose entries also expire after ttl seconds."""
+
+	def __init__(self, max_entries=1000, ttl=300.0):
+		self.max_entries = max_entries
+		self.ttl = ttl
+		self.entries = OrderedDict()
+		self.lock = threading.Lock()
+		self.hits = 0
+		self.misses = 0
+
+	def get(self, key):
+		with self.lock:
+			entry = self.entries.get(key)
+			if entry is None or time.monotonic() > entry[0]:
+				if entry is not None:
+					del self.entries[key]
+				self.misses += 1
+				return None
+			self.entries.move_to_end(key)
+			self.hits += 1
+			return entry[1]
+
+	def put(self, key, value):
+		with self.lock:
+			self.entries[key] = (time.monotonic() + self.ttl, value)
+			self.entries.move_to_end(key)
+			while len(self.entries) > self.max_entries:
+				self.entries.popitem(last=False)
+
+	def get_or_load(self, key, load):
+		"""Cached value for key, calling load() and caching its result on a miss."""
+		value = self.get(key)
+		if value is None:
+			value = load()
+			if value is not None:
+				self.put(key, value)
+		return value
+
+	def invalidate(self, key):
+		with self.lock:
+			self.entries.pop(key, None)
+
+	def clear(self):
+		with self.lock:
+			self.entries.clear()
+
+	def __len__(self):
+		return len(self.entries)
+
+	def stats(self):
+		with self.lock:
+			return {'entries': len(self.entries), 'max_entries': self.max_entries, 'hits': self.hits, 'misses': self.misses}
+
+class BoundedDict(OrderedDict):
+	"""dict that forgets its oldest entries once it holds more than max_entries."""
+
+	def __init__(self, max_entries=1000):
+		super().__init__()
+		self.max_entries = max_entries
+
+	def __setitem__(self, key, value):
+		super().__setitem__(key, value)
+		while len(self) > self.max_entries:
+			self.popitem(last=False)
@@ -0,0 +1,273 @@
+
+import json
+import re
+from utils.json_codec import dumps
+
+ADAPTIVE_CARD_TYPE = "application/vnd.microsoft.card.adaptive"
+_SLOT_PATTERN = re.compile(r'"__slot:(\w+)__"')
+
+class Slot:
+	"""Placeholder for a value filled in when a CardTemplate is rendered."""
+
+	def __init__(self, name):
+		self.name = name
+
+def _mark_slots(node):
+	if isinstance(node, Slot):
+		return f"__slot:{node.name}__"
+	if isinstance(node, dict):
+		return {key: _mark_slots(value) for key, value in node.items()}
+	if isinstance(node, list):
+		return [_mark_slots(value) for value in node]
+	return node
+
+def _encode(value):
+	return dumps(value).decode('utf-8')
+
+class CardTemplate:
+	"""Adaptive Card serialized once at import; render() only encodes the slot values.
+
+	The JSON around the slots is kept as pre-encoded text fragments and the
+	rendered card is JSON text, which the outbox stores as-is and the
+	Webex/Teams senders splice into the request body (see encode_with_card).
+	"""
+
+	def __init__(self, card=None, fragments=None, names=None):
+		if card is not None:
+			text = json.dumps(_mark_slots(card), ensure_ascii=False, separators=(',', ':'))
+			parts = _SLOT_PATTERN.split(text)
+			fragments, names = parts[0::2], parts[1::2]
+		self.fragments = fragments
+		self.names = names
+
+	def bind(self, **values):
+		"""New template with some slots filled in for good, e.g. per-platform parts."""
+		fragments = [self.fragments[0]]
+		names = []
+		for name, fragment in zip(self.names, self.fragments[1:]):
+			if name in values:
+				fragments[-1] += _encode(values[name]) + fragment
+			else:
+				names.append(name)
+				fragments.append(fragment)
+		return CardTemplate(fragments=fragments, names=names)
+
+	def render(self, **values):
+		if not self.names:
+			return self.fragments[0]
+		parts = [self.fragments[0]]
+		for name, fragment in zip(self.names, self.fragments[1:]):
+			parts.append(_encode(values[name]))
+			parts.append(fragment)
+		return "".join(parts)
+
+def encode_with_card(body, card=None, key="attachments"):
+	"""dumps(body) with the card attached under key; rendered templates are not re-encoded."""
+	encoded = dumps(body)
+	if not card:
+		return encoded
+	content = card.encode('utf-8') if isinstance(card, str) else dumps(card)
+	return b''.join([encoded[:-1], b',"', key.encode('utf-8'), b'":[{"contentType":"', ADAPTIVE_CARD_TYPE.encode('utf-8'), b'","content":', content, b'}]}'])
+
+def _card(body, actions=None):
+	card = {
+		"$schema": "http://adaptivecards.io/schemas/adaptive-card.json",
+		"type": "AdaptiveCard",
+		"version": "1.3",
+		"body": body
+	}
+	if actions is not None:
+		card["actions"] = actions
+	return card
+
+GREETING_CARD = CardTemplate(_card([
+	{
+		"type": "TextBlock",
+		"text": " Hello! This is Botper",
+		"weight": "Bolder",
+		"size": "Large",
+		"horizontalAlignment": "Center",
+		"color": "Good"
+	},
+	{
+		"type": "TextBlock",
+		"text": Slot("subtitle"),
+		"wrap": True,
+		"horizontalAlignment": "Center",
+		"isSubtle": True,
+		"spacing": "Medium"
+	},
+	{
+		"type": "TextBlock",
+		"text": " Available Options:",
+		"weight": "Bolder",
+		"size": "Medium",
+		"spacing": "Large"
+	},
+	{
+		"type": "FactSet",
+		"facts": Slot("facts"),
+		"spacing": "Medium"
+	}
+], Slot("actions")))
+
+MEETING_OPTIONS_CARD = CardTemplate(_card([
+	{
+		"type": "TextBlock",
+		"text": "Schedule a meeting ",
+		"weight": "Bolder",
+		"size": "Large",
+		"horizontalAlignment": "Center",
+		"color": "Good"
+	},
+	{
+		"type": "TextBlock",
+		"text": "Click on the following link to create a meeting :",
+		"wrap": True,
+		"horizontalAlignment": "Center",
+		"spacing": "Medium"
+	},
+	{
+		"type": "TextBlock",
+		"text": "[Schedule Webex Meeting](http://localhost:8000/auth/webex)",
+		"wrap": True,
+		"horizontalAlignment": "Center",
+		"isSubtle": True
+	}
+]))
+
+TASK_FORM_CARD = CardTemplate(_card([
+	{
+		"type": "TextBlock",
+		"text": "📋 Create New Task",
+		"weight": "Bolder",
+		"size": "Large",
+		"horizontalAlignment": "Center",
+		"color": "Good"
+	},
+	{
+		"type": "Input.Text",
+		"id": "task_title",
+		"placeholder": "Enter your task description...",
+		"isRequired": True,
+		"label": "Task Description"
+	}
+], [
+	{
+		"type": "Action.Submit",
+		"title": "✅ Create Task",
+		"data": {"action": "create_task_submit"}
+	},
+	{
+		"type": "Action.Submit",
+		"title": "❌ Cancel",
+		"data": {"action": "cancel_form"}
+	}
+]))
+
+MODIFY_TASK_CARD = CardTemplate(_card([
+	{
+		"type": "TextBlock",
+		"text": "Modify Task",
+		"weight": "Bolder",
+		"size": "Large",
+		"horizontalAlignment": "Center"
+	},
+	{
+		"type": "TextBlock",
+		"text": "Current title:",
+		"weight": "Bolder"
+	},
+	{
+		"type": "TextBlock",
+		"text": Slot("title"),
+		"color": "Attention",
+		"isSubtle": True
+	},
+	{
+		"type": "Input.Text",
+		"id": "new_title",
+		"placeholder": "Enter new task title...",
+		"value": Slot("title")
+	}
+], [
+	{
+		"type": "Action.Submit",
+		"title": "Save Changes",
+		"data": {"action": "update", "task_id": Slot("task_id")}
+	},
+	{
+		"type": "Action.Submit",
+		"title": "Cancel",
+		"data": {"action": "cancel"}
+	}
+]))
+
+MEETING_CREATED_CARD = CardTemplate(_card([
+	{
+		"type": "TextBlock",
+		"text": "✅ Meeting Created Successfully!",
+		"weight": "Bolder",
+		"size": "Large",
+		"color": "Good"
+	},
+	{
+		"type": "TextBlock",
+		"text": Slot("title"),
+		"weight": "Bolder"
+	},
+	{
+		"type": "TextBlock",
+		"text": Slot("when"),
+		"isSubtle": True
+	},
+	{
+		"type": "TextBlock",
+		"text": Slot("link"),
+		"wrap": True
+	}
+]))
+
+MEETING_NOTIFICATION_CARD = CardTemplate(_card([
+	{
+		"type": "TextBlock",
+		"text": "📅 Meeting Scheduled",
+		"weight": "Bolder",
+		"size": "Medium",
+		"color": "Good"
+	},
+	{
+		"type": "TextBlock",
+		"text": Slot("title"),
+		"weight": "Bolder",
+		"size": "Large",
+		"wrap": True
+	},
+	{
+		"type": "FactSet",
+		"facts": Slot("facts")
+	}
+], [
+	{
+		"type": "Action.OpenUrl",
+		"title": " Join Now",
+		"url": Slot("link")
+	}
+]))
+
+MEETING_REMINDER_CARD = CardTemplate(_card([
+	{
+		"type": "TextBlock",
+		"text": Slot("heading"),
+		"weight": "Bolder",
+		"size": "Medium",
+		"color": "Attention"
+	},
+	{
+		"type": "TextBlock",
+		"text": Slot("title"),
+		"weight": "Bolder",
+		"size": "Large",
+		"wrap": True
+	}
+], Slot("actions")))
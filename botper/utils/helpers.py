@@ -160,3 +160,93 @@ def format_task_card(tasks, platform="webex"):
 	except Exception as e:
 		print(f"Error in format_task_card: {e}")
 		return {}
+
+def format_search_card(tasks, query, page=0, has_more=False, platform="webex"):
+	"""
+	Returns a task card for one page of search results.
+	For webex/teams the card gets a results header, a refine box and a
+	"More results" button that submits the next page.
+	"""
+	try:
+		card = format_task_card(tasks, platform=platform)
+		if platform not in ("webex", "teams") or not card:
+			return card
+		card["body"][0]["text"] = f"🔍 Results for '{query}'" + (f" (page {page + 1})" if page else "")
+		if not tasks:
+			card["body"][-1]["text"] = "No matching tasks."
+		card["body"].append({
+			"type": "Input.Text",
+			"id": "query",
+			"placeholder": "Search tasks...",
+			"value": query
+		})
+		actions = [{
+			"type": "Action.Submit",
+			"title": "🔍 Search",
+			"data": {"action": "search", "page": 0}
+		}]
+		if has_more:
+			actions.append({
+				"type": "Action.Submit",
+				"title": "More results ▶",
+				"data": {"action": "search", "query": query, "page": page + 1}
+			})
+		card["actions"] = actions
+		return card
+	except Exception as e:
+		print(f"Error in format_search_card: {e}")
+		return {}
+
+def format_meeting_card(meetings, heading="📅 Meetings", platform="webex"):
+	"""
+	Returns an Adaptive Card listing meetings (from the meetings collection)
+	with their UTC start time and a Join button each.
+	"""
+	try:
+		body = [{
+			"type": "TextBlock",
+			"text": heading,
+			"weight": "Bolder",
+			"size": "Large",
+			"horizontalAlignment": "Center"
+		}]
+		for meeting in meetings:
+			start_at = meeting.get('start_at')
+			when = start_at.strftime('%a %m/%d %H:%M UTC') if start_at else meeting.get('start_time', '')
+			columns = [
+				{
+					"type": "Column",
+					"width": "stretch",
+					"items": [
+						{"type": "TextBlock", "text": f"📞 {meeting.get('title', 'Meeting')}", "weight": "Bolder", "wrap": True},
+						{"type": "TextBlock", "text": f"🕐 {when}", "isSubtle": True, "spacing": "None"}
+					]
+				}
+			]
+			if (meeting.get('meeting_link') or '').startswith('http'):
+				columns.append({
+					"type": "Column",
+					"width": "auto",
+					"items": [{
+						"type": "ActionSet",
+						"actions": [{"type": "Action.OpenUrl", "title": "Join", "url": meeting['meeting_link']}]
+					}]
+				})
+			body.append({"type": "ColumnSet", "columns": columns, "separator": len(body) > 1})
+		if not meetings:
+			body.append({
+				"type": "TextBlock",
+				"text": "No meetings in this period.",
+				"wrap": True,
+				"horizontalAlignment": "Center",
+				"color": "Attention"
+			})
+		return {
+			"$schema": "http://adaptivecards.io/schemas/adaptive-card.json",
+			"type": "AdaptiveCard",
+			"version": "1.3",
+			"body": body
+		}
+	except Exception as e:
+		print(f"Error in format_meeting_card: {e}")
+		return {}
@@ -0,0 +1,117 @@
+
+import os
+import threading
+import time
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+
+# Default (connect, read) deadlines in seconds for every outbound call
+HTTP_CONNECT_TIMEOUT = float(os.getenv("BOTPER_HTTP_CONNECT_TIMEOUT", "3.05"))
+HTTP_READ_TIMEOUT = float(os.getenv("BOTPER_HTTP_READ_TIMEOUT", "15"))
+# Consecutive failures (connection errors, timeouts, 5xx) that open a host's breaker
+HTTP_BREAKER_FAILURES = int(os.getenv("BOTPER_HTTP_BREAKER_FAILURES", "5"))
+# Seconds an open breaker fails fast before letting a trial call through
+HTTP_BREAKER_RESET = float(os.getenv("BOTPER_HTTP_BREAKER_RESET", "30"))
+
+class CircuitOpenError(Exception):
+	"""Raised without touching the network while a host's breaker is open."""
+	# Transient: the outbox retries it with backoff instead of dead-lettering
+	status_code = 503
+
+class CircuitBreaker:
+	"""Per-host breaker: closed -> open after repeated failures -> half-open trial -> closed."""
+
+	def __init__(self, host, failure_threshold=HTTP_BREAKER_FAILURES, reset_timeout=HTTP_BREAKER_RESET):
+		self.host = host
+		self.failure_threshold = failure_threshold
+		self.reset_timeout = reset_timeout
+		self.failures = 0
+		self.opened_at = None
+		self.trial = False
+		self.lock = threading.Lock()
+
+	def before_call(self):
+		with self.lock:
+			if self.opened_at is None:
+				return
+			if self.trial or time.monotonic() - self.opened_at < self.reset_timeout:
+				raise CircuitOpenError(f"{self.host} is failing; circuit open, not calling it")
+			# Half-open: this call is the trial, everyone else keeps failing fast
+			self.trial = True
+
+	def record_success(self):
+		with self.lock:
+			if self.opened_at is not None:
+				print(f"Circuit closed for {self.host}")
+			self.failures = 0
+			self.opened_at = None
+			self.trial = False
+
+	def record_failure(self):
+		with self.lock:
+			self.failures += 1
+			self.trial = False
+			if self.opened_at is not None or self.failures >= self.failure_threshold:
+				if self.opened_at is None:
+					print(f"Circuit opened for {self.host} after {self.failures} failures")
+				self.opened_at = time.monotonic()
+
+	def state(self):
+		with self.lock:
+			if self.opened_at is None:
+				return 'closed'
+			return 'half-open' if self.trial or time.monotonic() - self.opened_at >= self.reset_timeout else 'open'
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+def breaker_for(host):
+	"""The breaker for a host, shared by every session in the process."""
+	breaker = _breakers.get(host)
+	if breaker is None:
+		with _breakers_lock:
+			breaker = _breakers.setdefault(host, CircuitBreaker(host))
+	return breaker
+
+def breaker_states():
+	return {host: breaker.state() for host, breaker in list(_breakers.items())}
+
+class TransportSession(requests.Session):
+	"""requests.Session that applies default deadlines and the per-host circuit breakers."""
+
+	def __init__(self, timeout=None):
+		super().__init__()
+		self.timeout = timeout or (HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT)
+
+	def request(self, method, url, **kwargs):
+		kwargs.setdefault('timeout', self.timeout)
+		breaker = breaker_for(urlsplit(url).hostname)
+		breaker.before_call()
+		try:
+			response = super().request(method, url, **kwargs)
+		except requests.RequestException:
+			breaker.record_failure()
+			raise
+		if response.status_code >= 500:
+			breaker.record_failure()
+		else:
+			breaker.record_success()
+		return response
+
+def create_session(pool_connections=4, pool_maxsize=16, timeout=None):
+	"""TransportSession with keep-alive connection pools for http and https."""
+	session = TransportSession(timeout)
+	adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+	session.mount("https://", adapter)
+	session.mount("http://", adapter)
+	return session
+
+_shared_session = None
+
+def shared_session():
+	"""Process-wide session for code without a session of its own (OAuth, scripts)."""
+	global _shared_session
+	if _shared_session is None:
+		_shared_session = create_session()
+	return _shared_session
@@ -0,0 +1,44 @@
+
+import json
+import os
+from fastapi.responses import JSONResponse
+
+try:
+	import orjson
+except ImportError:
+	orjson = None
+
+def _stdlib_dumps(obj):
+	return json.dumps(obj, ensure_ascii=False, separators=(',', ':'), default=str).encode('utf-8')
+
+def _orjson_dumps(obj):
+	return orjson.dumps(obj, default=str)
+
+BACKENDS = {'stdlib': (_stdlib_dumps, json.loads)}
+if orjson is not None:
+	BACKENDS['orjson'] = (_orjson_dumps, orjson.loads)
+
+_dumps, _loads = BACKENDS['stdlib']
+
+def set_backend(name):
+	"""Switch every dumps/loads caller to one of BACKENDS ('orjson' or 'stdlib')."""
+	global _dumps, _loads
+	if name not in BACKENDS:
+		raise Exception(f"JSON backend '{name}' is not available (have: {', '.join(BACKENDS)})")
+	_dumps, _loads = BACKENDS[name]
+
+def dumps(obj):
+	"""Compact UTF-8 JSON bytes; values JSON can't hold (ObjectId, datetime) become strings."""
+	return _dumps(obj)
+
+def loads(data):
+	return _loads(data)
+
+# BOTPER_JSON picks the backend; orjson is used by default when installed
+set_backend(os.getenv("BOTPER_JSON") or ('orjson' if orjson is not None else 'stdlib'))
+
+class FastJSONResponse(JSONResponse):
+	"""JSONResponse rendered with the configured backend."""
+
+	def render(self, content):
+		return dumps(content)
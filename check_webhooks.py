@@ -1,10 +1,17 @@
 #!/usr/bin/env python3
 import os
-import requests
+import sys
+from pathlib import Path
 from dotenv import load_dotenv
+sys.path.append(str(Path(__file__).parent / 'botper'))
+
+from utils.http import shared_session
 
 load_dotenv()
 
+# Keep-alive session with connect/read deadlines, reused by every call below
+session = shared_session()
+
 WEBEX_BOT_TOKEN = os.getenv("WEBEX_BOT_TOKEN")
 
 def list_webhooks():
@@ -13,7 +20,7 @@ def list_webhooks():
         'Content-Type': 'application/json'
     }
     
-    response = requests.get('https://webexapis.com/v1/webhooks', headers=headers)
+    response = session.get('https://webexapis.com/v1/webhooks', headers=headers)
     if response.status_code == 200:
         webhooks = response.json().get('items', [])
         print(f"Found {len(webhooks)} webhooks:")
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Replay captured webhook traffic (BOTPER_CAPTURE_DIR) against a test instance.
+Events are sent in capture order at their original spacing divided by --speed
+(0 sends as fast as possible). With WEBEX_WEBHOOK_SECRET set, every body is
+re-signed so the instance's signature check passes.
+
+Requests go through a plain pooled session with no circuit breaker, so every
+event reaches the instance and slow answers show up as latency, not errors.
+
+Usage: python replay_webhooks.py capture.jsonl.gz [...] [--target URL] [--speed N] [--concurrency N] [--timeout S]
+"""
+import argparse
+import gzip
+import hashlib
+import hmac
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+import requests
+from requests.adapters import HTTPAdapter
+from dotenv import load_dotenv
+sys.path.append(str(Path(__file__).parent / 'botper'))
+
+from utils.json_codec import dumps, loads
+
+load_dotenv()
+
+def read_events(paths):
+    """Captured events from every file, oldest first"""
+    events = []
+    for path in paths:
+        try:
+            with gzip.open(path, 'rb') as f:
+                for line in f:
+                    events.append(loads(line))
+        except EOFError:
+            # Capture still being written: use the events flushed so far
+            print(f"⚠️  {path} ends mid-stream (capture still running?), using what was flushed")
+    events.sort(key=lambda event: event['t'])
+    return events
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+def replay(events, target, speed, concurrency, secret, timeout):
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=concurrency)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    statuses = Counter()
+    latencies = []
+    lags = []
+    lock = threading.Lock()
+
+    def send(event):
+        body = dumps(event['body'])
+        headers = {'Content-Type': 'application/json'}
+        if secret:
+            headers['X-Spark-Signature'] = hmac.new(secret.encode(), body, hashlib.sha1).hexdigest()
+        started = time.perf_counter()
+        try:
+            status = session.post(target.rstrip('/') + event['path'], data=body, headers=headers, timeout=timeout).status_code
+        except Exception as e:
+            status = type(e).__name__
+        with lock:
+            statuses[status] += 1
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    first = events[0]['t']
+    wall_start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for event in events:
+            due = (event['t'] - first) / speed if speed else 0.0
+            wait = due - (time.perf_counter() - wall_start)
+            if wait > 0:
+                time.sleep(wait)
+            else:
+                lags.append(-wait * 1000)
+            pool.submit(send, event)
+    elapsed = time.perf_counter() - wall_start
+
+    print(f"\n📊 Replayed {len(events)} events in {elapsed:.1f}s ({len(events) / elapsed:.1f}/s)")
+    print(f"   Captured span: {events[-1]['t'] - first:.1f}s at speed x{speed or 'max'}")
+    print(f"   Status codes: {dict(statuses)}")
+    print(f"   Latency ms: p50 {percentile(latencies, 50):.1f}  p95 {percentile(latencies, 95):.1f}  p99 {percentile(latencies, 99):.1f}  max {max(latencies):.1f}")
+    if speed and lags:
+        print(f"   Behind schedule: {len(lags)} events, worst {max(lags):.1f} ms")
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay captured webhook traffic against a test instance")
+    parser.add_argument('captures', nargs='+', help="capture files (*.jsonl.gz)")
+    parser.add_argument('--target', default="http://localhost:8000", help="base URL of the instance under test")
+    parser.add_argument('--speed', type=float, default=1.0, help="time compression factor; 0 = no delays")
+    parser.add_argument('--concurrency', type=int, default=16, help="requests in flight at once; 1 keeps strict order")
+    parser.add_argument('--timeout', type=float, default=30.0, help="seconds to wait for each response; 0 waits forever")
+    args = parser.parse_args()
+
+    events = read_events(args.captures)
+    if not events:
+        print("❌ No events in the given captures")
+        return
+    counts = Counter(f"{event['body'].get('resource')}/{event['body'].get('event')}" for event in events)
+    print(f"🔁 {len(events)} events: {dict(counts.most_common())}")
+    replay(events, args.target, args.speed, args.concurrency, os.getenv("WEBEX_WEBHOOK_SECRET"), args.timeout or None)
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,8 @@
 #!/usr/bin/env python3
 """
-Botper startup script - now redirects to main.py with smart startup
+Botper startup script - runs main.py's smart startup in this same interpreter
 """
-import subprocess
 import sys
-import os
 from pathlib import Path
 
 def main():
@@ -12,22 +10,18 @@ def main():
     print("=" * 30)
     print("Starting integrated bot with smart port management...")
     print()
-    
-    # Change to project directory
-    project_root = Path(__file__).parent
-    os.chdir(project_root)
-    
-    # Run main.py from botper directory
+
+    # Load botper/main.py in-process instead of spawning a second interpreter
+    botper_dir = Path(__file__).parent / 'botper'
+    sys.path.insert(0, str(botper_dir))
     try:
-        result = subprocess.run([
-            sys.executable, 
-            'botper/main.py'
-        ], cwd=project_root)
-        return result.returncode
+        import main as botper_main
     except Exception as e:
         print(f"Error: {e}")
         print("Make sure you're in the correct directory and botper/main.py exists")
         return 1
 
+    return botper_main.main()
+
 if __name__ == "__main__":
-    sys.exit(main())
\ No newline at end of file
+    sys.exit(main())
@@ -3,12 +3,22 @@
 Script to set up Webex webhook
 """
 import os
-import requests
+import secrets
+import sys
+from pathlib import Path
 from dotenv import load_dotenv
+sys.path.append(str(Path(__file__).parent / 'botper'))
+
+from utils.http import shared_session
 
 load_dotenv()
 
+# Keep-alive session with connect/read deadlines, reused by every call below
+session = shared_session()
+
 WEBEX_BOT_TOKEN = os.getenv("WEBEX_BOT_TOKEN")
+# Webex signs every event with this secret (X-Spark-Signature); the bot rejects unsigned ones
+WEBEX_WEBHOOK_SECRET = os.getenv("WEBEX_WEBHOOK_SECRET")
 NGROK_URL = "https://johnsie-unentangling-kolton.ngrok-free.dev"  # Current ngrok URL
 WEBHOOK_URL = f"{NGROK_URL}/webex/webhook"
 
@@ -19,7 +29,7 @@ def list_existing_webhooks():
         'Content-Type': 'application/json'
     }
     
-    response = requests.get('https://webexapis.com/v1/webhooks', headers=headers)
+    response = session.get('https://webexapis.com/v1/webhooks', headers=headers)
     if response.status_code == 200:
         webhooks = response.json().get('items', [])
         print(f"Found {len(webhooks)} existing webhooks:")
@@ -37,7 +47,7 @@ def delete_webhook(webhook_id):
         'Content-Type': 'application/json'
     }
     
-    response = requests.delete(f'https://webexapis.com/v1/webhooks/{webhook_id}', headers=headers)
+    response = session.delete(f'https://webexapis.com/v1/webhooks/{webhook_id}', headers=headers)
     if response.status_code == 204:
         print(f"✅ Deleted webhook: {webhook_id}")
     else:
@@ -54,10 +64,11 @@ def create_webhook(webhook_name, resource_type, event_type):
         'name': webhook_name,
         'targetUrl': WEBHOOK_URL,
         'resource': resource_type,
-        'event': event_type
+        'event': event_type,
+        'secret': WEBEX_WEBHOOK_SECRET
     }
     
-    response = requests.post('https://webexapis.com/v1/webhooks', 
+    response = session.post('https://webexapis.com/v1/webhooks', 
                            headers=headers, 
                            json=webhook_data)
     
@@ -79,6 +90,13 @@ def main():
         print("❌ WEBEX_BOT_TOKEN not found in .env file")
         return
     
+    global WEBEX_WEBHOOK_SECRET
+    if not WEBEX_WEBHOOK_SECRET:
+        WEBEX_WEBHOOK_SECRET = secrets.token_hex(32)
+        print("⚠️  WEBEX_WEBHOOK_SECRET not found in .env - generated one for these webhooks.")
+        print("   Add this line to .env and restart the bot so it can verify events:")
+        print(f"   WEBEX_WEBHOOK_SECRET={WEBEX_WEBHOOK_SECRET}\n")
+    
     print("🔍 Checking existing webhooks...")
     existing_webhooks = list_existing_webhooks()
     
@@ -101,6 +119,13 @@ def main():
     # Create webhook for meetings (automatic task creation)
     print("\n🎬 Creating meeting webhook...")
     create_webhook('Botper Meeting Webhook', 'meetings', 'created')
+    
+    # Membership and space changes greet new users and keep the bot's people/room cache fresh
+    print("\n👥 Creating membership webhook...")
+    create_webhook('Botper Membership Webhook', 'memberships', 'all')
+    
+    print("\n🏠 Creating room webhook...")
+    create_webhook('Botper Room Webhook', 'rooms', 'updated')
 
 if __name__ == "__main__":
     main()
\ No newline at end of file